@@ -1,4 +1,5 @@
 from functools import lru_cache
+from typing import Literal, Optional
 from pydantic_settings import BaseSettings
 from dotenv import find_dotenv
 
@@ -9,6 +10,49 @@ class Settings(BaseSettings):
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     BACKEND_CORS_ORIGINS: list[str] = ["http://localhost:3000"]
+    PRINCIPAL_CACHE_SIZE: int = 10_000
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 60
+    UNREAD_RECONCILE_INTERVAL_SECONDS: int = 3600
+    DIRECTORY_REFRESH_SECONDS: int = 3600
+    OUTBOX_BATCH_SIZE: int = 100
+    OUTBOX_CONCURRENCY: int = 32
+    OUTBOX_MAX_ATTEMPTS: int = 5
+    OUTBOX_SEND_TIMEOUT_SECONDS: float = 5.0
+    OUTBOX_POLL_INTERVAL_SECONDS: float = 1.0
+    WS_SEND_QUEUE_SIZE: int = 100
+    WS_SEND_TIMEOUT_SECONDS: float = 10.0
+    WS_HEARTBEAT_INTERVAL_SECONDS: float = 20.0
+    WS_HEARTBEAT_TIMEOUT_SECONDS: float = 60.0
+    WS_REPLAY_LIMIT: int = 100
+    NOTIFICATION_COALESCE_WINDOW_SECONDS: int = 600
+    # Read notifications older than this leave the hot table; "archive" moves
+    # them to notifications_archive, "delete" drops them
+    NOTIFICATION_RETENTION_DAYS: int = 90
+    NOTIFICATION_RETENTION_MODE: Literal["archive", "delete"] = "archive"
+    NOTIFICATION_RETENTION_BATCH_SIZE: int = 1000
+    NOTIFICATION_RETENTION_INTERVAL_SECONDS: int = 3600
+    # "local" keeps uploads in app/uploads; "s3" needs the s3 extra (boto3)
+    STORAGE_BACKEND: Literal["local", "s3"] = "local"
+    S3_BUCKET: str = ""
+    S3_ENDPOINT_URL: Optional[str] = None
+    S3_REGION: Optional[str] = None
+    S3_ACCESS_KEY_ID: Optional[str] = None
+    S3_SECRET_ACCESS_KEY: Optional[str] = None
+    # Base URL uploads are served from, e.g. a CDN in front of the bucket
+    S3_PUBLIC_URL: Optional[str] = None
+    # Widths of the resized WebP copies made of each uploaded image
+    IMAGE_VARIANT_WIDTHS: list[int] = [320, 640, 1280]
+    IMAGE_VARIANT_QUALITY: int = 80
+    IMAGE_VARIANT_WORKERS: int = 2
+    # Behind nginx: an internal location aliasing the uploads directory
+    # (e.g. /_uploads/). nginx then sends upload bodies, not the app.
+    UPLOADS_ACCEL_REDIRECT: Optional[str] = None
+    # Rendered post and comment pages. "memory" is per worker and bounded by
+    # READ_CACHE_MAX_BYTES; "redis" is shared via REDIS_URL (the redis extra)
+    READ_CACHE_BACKEND: Literal["memory", "redis"] = "memory"
+    READ_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    READ_CACHE_TTL_SECONDS: int = 86400
+    REDIS_URL: str = "redis://localhost:6379/0"
 
     class Config:
         env_file = find_dotenv(".env")
@@ -1,22 +1,39 @@
+from datetime import datetime, timezone
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
 from app.config import get_settings
 
 settings = get_settings()
 
-# Use psycopg3 dialect for PostgreSQL
-engine = create_engine(
-    settings.DATABASE_URL.replace("postgresql://", "postgresql+psycopg://")
+
+def _database_url(async_driver: bool = False) -> str:
+    # psycopg3 serves both the sync and the asyncio engine for PostgreSQL
+    url = settings.DATABASE_URL.replace("postgresql://", "postgresql+psycopg://")
+    if async_driver and url.startswith("sqlite://"):
+        # Local SQLite databases need aiosqlite for the async engine
+        url = url.replace("sqlite://", "sqlite+aiosqlite://", 1)
+    return url
+
+
+# Sync engine for schema management and offline maintenance jobs
+engine = create_engine(_database_url())
+
+# Request handlers run on the event loop and use the async engine, so a
+# database round-trip never blocks other requests or WebSocket traffic.
+async_engine = create_async_engine(_database_url(async_driver=True))
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
 )
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
 
 
-def get_db():
-    db = SessionLocal()
-    try:
+def utcnow() -> datetime:
+    """The current UTC time, naive, as plain DateTime columns hold it."""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+async def get_db():
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
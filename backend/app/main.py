@@ -1,24 +1,81 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
 import os
-from app.database import engine, Base
 
-from app.routes import auth, posts, comments, tags, users, notifications, uploads
+from app.routes import (
+    auth,
+    posts,
+    comments,
+    tags,
+    users,
+    notifications,
+    uploads,
+    search,
+    metrics,
+    autocomplete,
+)
 
 from app.config import get_settings
 from app.models import relationships
+from app.routes.uploads import UploadFiles, UploadSizeLimit
+from app.services.image_variants import image_variants
+from app.services.notifications import notification_service
+from app.services.outbox import outbox_dispatcher
+from app.services.read_cache import read_cache
+from app.services.storage import UPLOAD_DIR
+from app.services.tag_directory import tag_directory
+from app.services.user_directory import user_directory
+from app.utils.auth import principal_invalidations
+from app.websockets.manager import manager
 
 settings = get_settings()
-Base.metadata.create_all(bind=engine)
 
-app = FastAPI(title="StackIt API")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await user_directory.start()
+    await tag_directory.start()
+    await principal_invalidations.start()
+    await manager.start()
+    background = [
+        asyncio.create_task(outbox_dispatcher.run()),
+        asyncio.create_task(
+            user_directory.refresh_periodically(settings.DIRECTORY_REFRESH_SECONDS)
+        ),
+        asyncio.create_task(
+            tag_directory.refresh_periodically(settings.DIRECTORY_REFRESH_SECONDS)
+        ),
+        asyncio.create_task(
+            notification_service.reconcile_periodically(
+                settings.UNREAD_RECONCILE_INTERVAL_SECONDS
+            )
+        ),
+        asyncio.create_task(
+            notification_service.apply_retention_periodically(
+                settings.NOTIFICATION_RETENTION_INTERVAL_SECONDS
+            )
+        ),
+    ]
+    yield
+    for task in background:
+        task.cancel()
+    image_variants.stop()
+    await manager.stop()
+    await principal_invalidations.stop()
+    await tag_directory.stop()
+    await user_directory.stop()
+    await read_cache.close()
+
+
+app = FastAPI(title="StackIt API", lifespan=lifespan)
 
 # Mount uploads directory for serving static files
-uploads_dir = os.path.join(os.path.dirname(__file__), "uploads")
-os.makedirs(uploads_dir, exist_ok=True)
-app.mount("/uploads", StaticFiles(directory=uploads_dir), name="uploads")
+os.makedirs(UPLOAD_DIR, exist_ok=True)
+app.mount("/uploads", UploadFiles(directory=UPLOAD_DIR), name="uploads")
 
+app.add_middleware(UploadSizeLimit)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.BACKEND_CORS_ORIGINS,
@@ -34,6 +91,9 @@ app.include_router(comments.router, tags=["Comments"])
 app.include_router(tags.router, tags=["Tags"])
 app.include_router(notifications.router, tags=["Notifications"])
 app.include_router(uploads.router, tags=["Uploads"])
+app.include_router(search.router, tags=["Search"])
+app.include_router(metrics.router, tags=["Metrics"])
+app.include_router(autocomplete.router, tags=["Autocomplete"])
 
 
 @app.get("/")
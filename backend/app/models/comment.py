@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Boolean, DateTime
+from sqlalchemy import Column, Integer, String, ForeignKey, Boolean, DateTime, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.database import Base
@@ -6,6 +6,10 @@ from app.database import Base
 
 class Comment(Base):
     __tablename__ = "comments"
+    __table_args__ = (
+        # A post's answers, paged by id
+        Index("ix_comments_post_id_id", "post_id", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     body = Column(String)
@@ -17,5 +21,5 @@ class Comment(Base):
         "CommentVote", back_populates="comment", cascade="all, delete-orphan"
     )
 
-    user_id = Column(Integer, ForeignKey("users.id"))
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
     post_id = Column(Integer, ForeignKey("posts.id"))
@@ -0,0 +1,35 @@
+from enum import Enum
+from sqlalchemy import (
+    Column,
+    Integer,
+    DateTime,
+    ForeignKey,
+    Enum as SQLEnum,
+)
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class KarmaReason(str, Enum):
+    # Karma a user already had when the ledger was introduced
+    OPENING_BALANCE = "opening_balance"
+    POST_CREATED = "post_created"
+    COMMENT_CREATED = "comment_created"
+    COMMENT_ACCEPTED = "comment_accepted"
+    COMMENT_UPVOTED = "comment_upvoted"
+    COMMENT_DOWNVOTED = "comment_downvoted"
+
+
+class KarmaLedgerEntry(Base):
+    """Append-only record of every karma change; users.karma is its running sum."""
+
+    __tablename__ = "karma_ledger"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(
+        Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+    delta = Column(Integer, nullable=False)
+    reason = Column(SQLEnum(KarmaReason), nullable=False)
+    reference_id = Column(Integer)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -1,4 +1,3 @@
-from datetime import datetime
 from enum import Enum
 from sqlalchemy import (
     Column,
@@ -8,9 +7,13 @@ from sqlalchemy import (
     DateTime,
     ForeignKey,
     Enum as SQLEnum,
+    Index,
+    column,
+    text,
 )
 from sqlalchemy.orm import relationship
-from app.database import Base
+from sqlalchemy.sql import func
+from app.database import Base, utcnow
 
 
 class NotificationType(str, Enum):
@@ -21,13 +24,57 @@ class NotificationType(str, Enum):
 
 class Notification(Base):
     __tablename__ = "notifications"
+    __table_args__ = (
+        # Inbox pages and replay on reconnect: user_id = ? AND id < / > ?
+        Index("ix_notifications_user_id_id", "user_id", "id"),
+        # Newest-first by time for one user (coalescing window, digests)
+        Index(
+            "ix_notifications_user_id_created_at",
+            "user_id",
+            column("created_at").desc(),
+        ),
+        # Unread rows are a small slice of the table: mark_all_read,
+        # coalescing and counter reconciliation only touch these
+        Index(
+            "ix_notifications_unread_user_id",
+            "user_id",
+            postgresql_where=text("NOT is_read"),
+            sqlite_where=text("NOT is_read"),
+        ),
+        # Retention walks old read rows oldest first
+        Index(
+            "ix_notifications_read_created_at",
+            "created_at",
+            postgresql_where=text("is_read"),
+            sqlite_where=text("is_read"),
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
     message = Column(String)
     is_read = Column(Boolean, default=False)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, default=utcnow)
     type = Column(SQLEnum(NotificationType))
     reference_id = Column(Integer)
+    # How many events were coalesced into this row
+    count = Column(Integer, default=1, server_default="1", nullable=False)
 
     user = relationship("User", back_populates="notifications")
+
+
+class ArchivedNotification(Base):
+    """Read notifications moved out of the hot table by the retention job."""
+
+    __tablename__ = "notifications_archive"
+    __table_args__ = (Index("ix_notifications_archive_user_id_id", "user_id", "id"),)
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"))
+    message = Column(String)
+    is_read = Column(Boolean)
+    created_at = Column(DateTime)
+    type = Column(SQLEnum(NotificationType))
+    reference_id = Column(Integer)
+    count = Column(Integer, nullable=False)
+    archived_at = Column(DateTime(timezone=True), server_default=func.now())
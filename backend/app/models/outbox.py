@@ -0,0 +1,19 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from app.database import Base, utcnow
+
+
+class OutboxMessage(Base):
+    """A live push written with its notification and delivered after commit."""
+
+    __tablename__ = "notification_outbox"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(
+        Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False
+    )
+    notification_id = Column(Integer, nullable=False, index=True)
+    message = Column(String, nullable=False)
+    unread_count = Column(Integer, nullable=False)
+    attempts = Column(Integer, nullable=False, default=0)
+    # Claimed rows are pushed into the future, so this doubles as a lease
+    available_at = Column(DateTime, nullable=False, default=utcnow, index=True)
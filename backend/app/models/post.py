@@ -1,5 +1,6 @@
-from sqlalchemy import Column, Integer, String, ForeignKey
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, ForeignKey, Index, Text
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import deferred, relationship
 from app.database import Base
 from app.models.tag import post_tags
 
@@ -10,10 +11,25 @@ class Post(Base):
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, index=True)
     body = Column(String)
-    user_id = Column(Integer, ForeignKey("users.id"))
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
+    # What GET /posts/{id} and GET /posts/{id}/comments return changes only
+    # with these; see VersionService
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+    comments_version = Column(Integer, nullable=False, default=1, server_default="1")
+
+    # Weighted title/body/accepted-answer vector kept current by
+    # app.services.search; only meaningful on PostgreSQL. SQLite databases
+    # get a standalone posts_fts FTS5 table from the migrations instead.
+    search_vector = deferred(Column(TSVECTOR().with_variant(Text(), "sqlite")))
 
     user = relationship("User", back_populates="posts")
     comments = relationship(
         "Comment", back_populates="post", cascade="all, delete-orphan"
     )
     tags = relationship("Tag", secondary=post_tags, back_populates="posts")
+
+    __table_args__ = (
+        Index("ix_posts_search_vector", "search_vector", postgresql_using="gin").ddl_if(
+            dialect="postgresql"
+        ),
+    )
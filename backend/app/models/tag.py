@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Table, ForeignKey
+from sqlalchemy import Column, Integer, String, Table, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from app.database import Base
 
@@ -6,8 +6,10 @@ from app.database import Base
 post_tags = Table(
     "post_tags",
     Base.metadata,
-    Column("post_id", Integer, ForeignKey("posts.id")),
-    Column("tag_id", Integer, ForeignKey("tags.id")),
+    Column("post_id", Integer, ForeignKey("posts.id"), primary_key=True),
+    Column("tag_id", Integer, ForeignKey("tags.id"), primary_key=True),
+    # The primary key serves tags-of-a-post; this serves posts-with-a-tag
+    Index("ix_post_tags_tag_id_post_id", "tag_id", "post_id"),
 )
 
 
@@ -13,6 +13,10 @@ class User(Base):
     hashed_password = Column(String)
     role = Column(String, default="user")
     karma = Column(Integer, default=0)
+    # Maintained alongside notifications.is_read; see NotificationService
+    unread_notifications = Column(
+        Integer, default=0, server_default="0", nullable=False
+    )
     created_by_id = Column(Integer, ForeignKey("users.id"), nullable=True)
 
     # Relationship to track who promoted this user to admin
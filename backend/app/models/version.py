@@ -0,0 +1,11 @@
+from sqlalchemy import Column, Integer, String
+from app.database import Base
+
+
+class ResourceVersion(Base):
+    """A counter bumped whenever a whole collection changes; see VersionService."""
+
+    __tablename__ = "resource_versions"
+
+    name = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False, default=1, server_default="1")
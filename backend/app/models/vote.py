@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Enum
+from sqlalchemy import Column, Integer, String, ForeignKey, Enum, UniqueConstraint
 from sqlalchemy.orm import relationship
 from app.database import Base
 import enum
@@ -11,10 +11,14 @@ class VoteType(str, enum.Enum):
 
 class CommentVote(Base):
     __tablename__ = "comment_votes"
+    # One vote per user per comment; also serves lookups by user
+    __table_args__ = (
+        UniqueConstraint("user_id", "comment_id", name="uq_comment_votes_user_comment"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
-    comment_id = Column(Integer, ForeignKey("comments.id"))
+    comment_id = Column(Integer, ForeignKey("comments.id"), index=True)
     vote_type = Column(String, nullable=False)  # "upvote" or "downvote"
 
     user = relationship("User", back_populates="comment_votes")
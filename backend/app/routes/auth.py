@@ -1,11 +1,13 @@
 from datetime import timedelta
 from typing import Annotated
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.database import get_db
 from app.models.user import User
 from app.schemas.auth import UserCreate, UserLogin, Token, User as UserSchema
 from app.config import get_settings
+from app.services.user_directory import user_directory
 from app.utils.auth import (
     authenticate_user,
     create_access_token,
@@ -21,11 +23,11 @@ router = APIRouter()
 @router.post(
     "/register", response_model=UserSchema, status_code=status.HTTP_201_CREATED
 )
-def register(user: UserCreate, db: Annotated[Session, Depends(get_db)]):
-    db_user = (
-        db.query(User)
-        .filter((User.email == user.email) | (User.username == user.username))
-        .first()
+async def register(user: UserCreate, db: Annotated[AsyncSession, Depends(get_db)]):
+    db_user = await db.scalar(
+        select(User).where(
+            (User.email == user.email) | (User.username == user.username)
+        )
     )
     if db_user:
         raise HTTPException(
@@ -33,7 +35,7 @@ def register(user: UserCreate, db: Annotated[Session, Depends(get_db)]):
         )
 
     # Check if this is the first user
-    is_first_user = db.query(User).first() is None
+    is_first_user = await db.scalar(select(User.id).limit(1)) is None
 
     hashed_password = get_password_hash(user.password)
     db_user = User(
@@ -45,14 +47,15 @@ def register(user: UserCreate, db: Annotated[Session, Depends(get_db)]):
     )
 
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await user_directory.publish(db_user.id, db_user.username)
+    await db.refresh(db_user)
     return db_user
 
 
 @router.post("/login", response_model=Token)
-def login(form_data: UserLogin, db: Annotated[Session, Depends(get_db)]):
-    user = authenticate_user(db, form_data.username, form_data.password)
+async def login(form_data: UserLogin, db: Annotated[AsyncSession, Depends(get_db)]):
+    user = await authenticate_user(db, form_data.username, form_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -67,10 +70,14 @@ def login(form_data: UserLogin, db: Annotated[Session, Depends(get_db)]):
 
 
 @router.post("/logout")
-def logout(current_user: Annotated[User, Depends(get_current_user)]):
+async def logout(current_user: Annotated[User, Depends(get_current_user)]):
     return {"message": "Successfully logged out"}
 
 
 @router.get("/me", response_model=UserSchema)
-def read_users_me(current_user: Annotated[User, Depends(get_current_user)]):
-    return current_user
+async def read_users_me(
+    current_user: Annotated[User, Depends(get_current_user)],
+    db: Annotated[AsyncSession, Depends(get_db)],
+):
+    # The principal may come from the cache; report live karma on the profile
+    return await db.get(User, current_user.id)
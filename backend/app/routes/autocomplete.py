@@ -0,0 +1,32 @@
+from typing import Literal
+from fastapi import APIRouter, Query
+from app.schemas.autocomplete import Suggestions
+from app.services.tag_directory import tag_directory
+from app.services.user_directory import user_directory
+
+router = APIRouter()
+
+
+@router.get("/autocomplete", response_model=Suggestions)
+async def autocomplete(
+    q: str = Query(..., min_length=1, max_length=50),
+    type: Literal["users", "tags"] | None = None,
+    limit: int = Query(10, ge=1, le=25),
+):
+    """Typeahead for @mentions and tags; leave out type to get both kinds."""
+    q = q.lstrip("@#")
+    suggestions = {"users": [], "tags": []}
+    if not q:
+        # A bare "@" or "#" would match, and list, every entry
+        return suggestions
+    if type in (None, "users"):
+        suggestions["users"] = [
+            {"id": id, "username": username, "karma": karma}
+            for id, username, karma in user_directory.search(q, limit)
+        ]
+    if type in (None, "tags"):
+        suggestions["tags"] = [
+            {"id": id, "title": title, "post_count": post_count}
+            for id, title, post_count in tag_directory.search(q, limit)
+        ]
+    return suggestions
@@ -1,29 +1,76 @@
-from typing import Annotated, List
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from typing import Annotated
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.database import get_db
 from app.models.comment import Comment
 from app.models.post import Post
 from app.models.user import User
 from app.models.notification import NotificationType
-from app.models.vote import CommentVote, VoteType
+from app.models.vote import VoteType
 from app.schemas.comment import CommentCreate, Comment as CommentSchema
 from app.schemas.notification import NotificationCreate
+from app.schemas.pagination import Page
 from app.services.notifications import notification_service
 from app.utils.auth import get_current_user
-from app.utils.mentions import get_mentioned_users
+from app.utils.loaders import comment_schema_loaders
+from app.utils.mentions import get_mentioned_user_ids
 from app.services.karma import karma_service
+from app.services.read_cache import comments_key, read_cache
+from app.services.search import search_service
+from app.services.versions import version_service
+from app.services.votes import vote_service
+from app.utils.etag import etag_headers, not_modified, weak_etag
+from app.utils.pagination import PageParams, paginate
+from app.utils.user import lock_users
 
 router = APIRouter()
 
 
-@router.get("/posts/{post_id}/comments", response_model=List[CommentSchema])
-def list_comments(post_id: int, db: Annotated[Session, Depends(get_db)]):
-    comments = (
-        db.query(Comment).join(Comment.user).filter(Comment.post_id == post_id).all()
-    )
-    return comments
+@router.get("/posts/{post_id}/comments", response_model=Page[CommentSchema])
+async def list_comments(
+    post_id: int,
+    request: Request,
+    response: Response,
+    db: Annotated[AsyncSession, Depends(get_db)],
+    page: Annotated[PageParams, Depends()],
+):
+    async def render() -> bytes:
+        comments, next_cursor = await paginate(
+            db,
+            select(Comment)
+            .options(*comment_schema_loaders())
+            .where(Comment.post_id == post_id),
+            Comment.id,
+            page,
+        )
+        return (
+            Page[CommentSchema]
+            .model_validate(
+                {"items": comments, "next_cursor": next_cursor}, from_attributes=True
+            )
+            .model_dump_json()
+            .encode()
+        )
+
+    # Unknown posts have no version and keep answering with an empty page
+    version = await version_service.comments_version(db, post_id)
+    if version is None:
+        body = await render()
+        return Response(body, media_type="application/json")
+
+    etag = weak_etag("comments", post_id, version)
+    if cached := not_modified(request, response, etag):
+        return cached
+    if page.cursor is None:
+        # Only first pages are cached: they are what the question page
+        # loads, and arbitrary cursors would let a client fill the cache
+        body = await read_cache.get_or_load(
+            comments_key(post_id), version, str(page.limit), render
+        )
+    else:
+        body = await render()
+    return Response(body, media_type="application/json", headers=etag_headers(etag))
 
 
 @router.post(
@@ -35,53 +82,71 @@ async def create_comment(
     post_id: int,
     comment: CommentCreate,
     current_user: Annotated[User, Depends(get_current_user)],
-    db: Annotated[Session, Depends(get_db)],
+    db: Annotated[AsyncSession, Depends(get_db)],
 ):
-    post = db.query(Post).filter(Post.id == post_id).first()
+    post = await db.get(Post, post_id)
     if not post:
         raise HTTPException(status_code=404, detail="Post not found")
 
     db_comment = Comment(body=comment.body, user_id=current_user.id, post_id=post_id)
     db.add(db_comment)
-    db.commit()
-    db.refresh(db_comment)
+    await db.flush()
 
-    # Award karma for creating a comment
-    await karma_service.award_comment_creation(db, current_user.id)
+    notifications = []
 
-    # Notify post owner about the new comment
+    # Notify post owner about the new comment; a burst of comments on one
+    # post collapses into a single "N new comments" notification
     if post.user_id != current_user.id:
-        notification = NotificationCreate(
-            user_id=post.user_id,
-            message=f"@{current_user.username} commented on your post: {post.title}",
-            type=NotificationType.COMMENT,
-            reference_id=db_comment.id,
+        notifications.append(
+            NotificationCreate(
+                user_id=post.user_id,
+                message=f"@{current_user.username} commented on your post: {post.title}",
+                type=NotificationType.COMMENT,
+                reference_id=post.id,
+                digest=f"{{count}} new comments on your post: {post.title}",
+            )
         )
-        await notification_service.create_notification(db, notification)
 
     # Handle @mentions
-    mentioned_users = get_mentioned_users(db, comment.body)
-    for user in mentioned_users:
-        if user.id != current_user.id:
-            notification = NotificationCreate(
-                user_id=user.id,
-                message=f"@{current_user.username} mentioned you in a comment",
-                type=NotificationType.MENTION,
-                reference_id=db_comment.id,
+    for user_id in get_mentioned_user_ids(comment.body):
+        if user_id != current_user.id:
+            notifications.append(
+                NotificationCreate(
+                    user_id=user_id,
+                    message=f"@{current_user.username} mentioned you in a comment",
+                    type=NotificationType.MENTION,
+                    reference_id=db_comment.id,
+                )
             )
-            await notification_service.create_notification(db, notification)
 
+    # Lock the author and recipients in id order before karma writes the
+    # author's row, so two users replying to each other cannot deadlock
+    await lock_users(db, [current_user.id, *(n.user_id for n in notifications)])
+
+    # Award karma for creating a comment
+    await karma_service.award_comment_creation(db, current_user.id, db_comment.id)
+
+    await notification_service.create_notifications(db, notifications)
+
+    await version_service.comments_changed(db, post_id)
+    await db.commit()
+    await read_cache.invalidate(comments_key(post_id))
+    await db.refresh(db_comment, ["user"])
     return db_comment
 
 
 @router.put("/comments/{comment_id}", response_model=CommentSchema)
-def update_comment(
+async def update_comment(
     comment_id: int,
     comment: CommentCreate,
     current_user: Annotated[User, Depends(get_current_user)],
-    db: Annotated[Session, Depends(get_db)],
+    db: Annotated[AsyncSession, Depends(get_db)],
 ):
-    db_comment = db.query(Comment).filter(Comment.id == comment_id).first()
+    db_comment = await db.scalar(
+        select(Comment)
+        .options(*comment_schema_loaders())
+        .where(Comment.id == comment_id)
+    )
     if not db_comment:
         raise HTTPException(status_code=404, detail="Comment not found")
     # Allow both comment owner and admins to update
@@ -91,18 +156,21 @@ def update_comment(
         )
 
     db_comment.body = comment.body
-    db.commit()
-    db.refresh(db_comment)
+    if db_comment.is_accepted:
+        await search_service.index_post(db, db_comment.post_id)
+    await version_service.comments_changed(db, db_comment.post_id)
+    await db.commit()
+    await read_cache.invalidate(comments_key(db_comment.post_id))
     return db_comment
 
 
 @router.delete("/comments/{comment_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_comment(
+async def delete_comment(
     comment_id: int,
     current_user: Annotated[User, Depends(get_current_user)],
-    db: Annotated[Session, Depends(get_db)],
+    db: Annotated[AsyncSession, Depends(get_db)],
 ):
-    db_comment = db.query(Comment).filter(Comment.id == comment_id).first()
+    db_comment = await db.get(Comment, comment_id)
     if not db_comment:
         raise HTTPException(status_code=404, detail="Comment not found")
     # Allow both comment owner and admins to delete
@@ -111,8 +179,12 @@ def delete_comment(
             status_code=403, detail="Not authorized to delete this comment"
         )
 
-    db.delete(db_comment)
-    db.commit()
+    await db.delete(db_comment)
+    if db_comment.is_accepted:
+        await search_service.index_post(db, db_comment.post_id)
+    await version_service.comments_changed(db, db_comment.post_id)
+    await db.commit()
+    await read_cache.invalidate(comments_key(db_comment.post_id))
     return None
 
 
@@ -120,13 +192,17 @@ def delete_comment(
 async def toggle_accept_comment(
     comment_id: int,
     current_user: Annotated[User, Depends(get_current_user)],
-    db: Annotated[Session, Depends(get_db)],
+    db: Annotated[AsyncSession, Depends(get_db)],
 ):
-    db_comment = db.query(Comment).filter(Comment.id == comment_id).first()
+    db_comment = await db.scalar(
+        select(Comment)
+        .options(*comment_schema_loaders())
+        .where(Comment.id == comment_id)
+    )
     if not db_comment:
         raise HTTPException(status_code=404, detail="Comment not found")
 
-    post = db.query(Post).filter(Post.id == db_comment.post_id).first()
+    post = await db.get(Post, db_comment.post_id)
     # Allow both post owner and admins to accept/unaccept comments
     if post.user_id != current_user.id and current_user.role != "admin":
         raise HTTPException(
@@ -136,15 +212,15 @@ async def toggle_accept_comment(
     if db_comment.is_accepted:
         # If comment is already accepted, unaccept it
         db_comment.is_accepted = False
-        db.commit()
-        db.refresh(db_comment)
+        await search_service.index_post(db, post.id)
+        await version_service.comments_changed(db, post.id)
+        await db.commit()
+        await read_cache.invalidate(comments_key(post.id))
         return db_comment
 
     # Check if any other comment is already accepted for this post
-    existing_accepted = (
-        db.query(Comment)
-        .filter(Comment.post_id == post.id, Comment.is_accepted == True)
-        .first()
+    existing_accepted = await db.scalar(
+        select(Comment).where(Comment.post_id == post.id, Comment.is_accepted == True)
     )
     if existing_accepted:
         raise HTTPException(
@@ -153,11 +229,10 @@ async def toggle_accept_comment(
 
     # Set comment as accepted
     db_comment.is_accepted = True
-    db.commit()
-    db.refresh(db_comment)
+    await search_service.index_post(db, post.id)
 
     # Award karma for getting comment accepted
-    await karma_service.award_comment_accepted(db, db_comment.user_id)
+    await karma_service.award_comment_accepted(db, db_comment.user_id, db_comment.id)
 
     # Notify comment author that their comment was accepted
     notification = NotificationCreate(
@@ -166,8 +241,11 @@ async def toggle_accept_comment(
         type=NotificationType.ANSWER,
         reference_id=db_comment.id,
     )
-    await notification_service.create_notification(db, notification)
+    await notification_service.create_notifications(db, [notification])
 
+    await version_service.comments_changed(db, post.id)
+    await db.commit()
+    await read_cache.invalidate(comments_key(post.id))
     return db_comment
 
 
@@ -176,62 +254,18 @@ async def vote_comment(
     comment_id: int,
     vote_type: VoteType,
     current_user: Annotated[User, Depends(get_current_user)],
-    db: Annotated[Session, Depends(get_db)],
+    db: Annotated[AsyncSession, Depends(get_db)],
 ):
-    comment = db.query(Comment).filter(Comment.id == comment_id).first()
+    comment = await db.scalar(
+        select(Comment)
+        .options(*comment_schema_loaders())
+        .where(Comment.id == comment_id)
+    )
     if not comment:
         raise HTTPException(status_code=404, detail="Comment not found")
 
-    # Check if user has already voted
-    existing_vote = (
-        db.query(CommentVote)
-        .filter(
-            CommentVote.comment_id == comment_id, CommentVote.user_id == current_user.id
-        )
-        .first()
-    )
-
-    if existing_vote:
-        if existing_vote.vote_type == vote_type:
-            # Remove vote if clicking the same button
-            db.delete(existing_vote)
-            # Update score and karma
-            if vote_type == VoteType.UPVOTE:
-                comment.score -= 1
-                await karma_service.handle_comment_vote(db, comment.user_id, False)
-            else:
-                comment.score += 1
-                await karma_service.handle_comment_vote(db, comment.user_id, True)
-        else:
-            # Change vote type if voting differently
-            existing_vote.vote_type = vote_type
-            # Update score and karma
-            if vote_type == VoteType.UPVOTE:
-                comment.score += 2  # -1 -> +1 = +2
-                await karma_service.handle_comment_vote(db, comment.user_id, True)
-                await karma_service.handle_comment_vote(
-                    db, comment.user_id, True
-                )  # Double karma change for vote switch
-            else:
-                comment.score -= 2  # +1 -> -1 = -2
-                await karma_service.handle_comment_vote(db, comment.user_id, False)
-                await karma_service.handle_comment_vote(
-                    db, comment.user_id, False
-                )  # Double karma change for vote switch
-    else:
-        # Create new vote
-        vote = CommentVote(
-            user_id=current_user.id, comment_id=comment_id, vote_type=vote_type
-        )
-        db.add(vote)
-        # Update score and karma
-        if vote_type == VoteType.UPVOTE:
-            comment.score += 1
-            await karma_service.handle_comment_vote(db, comment.user_id, True)
-        else:
-            comment.score -= 1
-            await karma_service.handle_comment_vote(db, comment.user_id, False)
-
-    db.commit()
-    db.refresh(comment)
+    await vote_service.cast_vote(db, comment, current_user.id, vote_type)
+    await version_service.comments_changed(db, comment.post_id)
+    await db.commit()
+    await read_cache.invalidate(comments_key(comment.post_id))
     return comment
@@ -0,0 +1,20 @@
+from typing import Annotated
+from fastapi import APIRouter, Depends
+from app.models.user import User
+from app.services.read_cache import read_cache
+from app.services.user_directory import user_directory
+from app.utils.auth import principal_cache
+from app.utils.user import get_current_admin_user
+
+router = APIRouter()
+
+
+@router.get("/metrics/caches")
+async def cache_metrics(
+    current_user: Annotated[User, Depends(get_current_admin_user)],
+):
+    return {
+        "principals": principal_cache.stats(),
+        "user_directory": user_directory.stats(),
+        "read_cache": await read_cache.stats(),
+    }
@@ -4,49 +4,92 @@ from fastapi import (
     WebSocket,
     WebSocketDisconnect,
     HTTPException,
-    Query,
 )
-from sqlalchemy.orm import Session
-from typing import List
-from app.database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import get_settings
+from app.database import AsyncSessionLocal, get_db
 from app.schemas.notification import Notification
+from app.schemas.pagination import Page
 from app.services.notifications import notification_service
 from app.utils.auth import get_current_user, get_user_from_token
+from app.utils.pagination import PageParams
 from app.websockets.manager import manager
 
+settings = get_settings()
+
 router = APIRouter(prefix="/notifications", tags=["Notification"])
 
 
-@router.get("/", response_model=List[Notification])
+@router.get("/", response_model=Page[Notification])
 async def get_notifications(
-    skip: int = Query(0, ge=0),
-    limit: int = Query(50, ge=1, le=100),
+    page: PageParams = Depends(),
+    current_user=Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    notifications, next_cursor = await notification_service.get_user_notifications(
+        db, current_user.id, page
+    )
+    return {"items": notifications, "next_cursor": next_cursor}
+
+
+@router.get("/unread")
+async def get_unread_count(
+    current_user=Depends(get_current_user), db: AsyncSession = Depends(get_db)
+):
+    unread_count = await notification_service.get_unread_count(db, current_user.id)
+    return {"unread_count": unread_count}
+
+
+@router.post("/{notification_id}/read")
+async def mark_as_read(
+    notification_id: int,
     current_user=Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
-    return notification_service.get_user_notifications(db, current_user.id, skip, limit)
+    if not await notification_service.mark_read(db, current_user.id, notification_id):
+        raise HTTPException(status_code=404, detail="Notification not found")
+    return {"status": "success"}
 
 
 @router.post("/read_all")
 async def mark_all_as_read(
-    current_user=Depends(get_current_user), db: Session = Depends(get_db)
+    current_user=Depends(get_current_user), db: AsyncSession = Depends(get_db)
 ):
-    notification_service.mark_all_read(db, current_user.id)
+    await notification_service.mark_all_read(db, current_user.id)
     return {"status": "success"}
 
 
 @router.websocket("/ws")
 async def websocket_endpoint(
-    websocket: WebSocket, token: str, db: Session = Depends(get_db)
+    websocket: WebSocket, token: str, last_seen_id: int | None = None
 ):
-    user = await get_user_from_token(token, db)
+    # Not Depends(get_db): that session, and its pooled connection, would be
+    # held for as long as the socket stays open. The principal is a detached
+    # snapshot, so it outlives this short-lived session.
+    async with AsyncSessionLocal() as db:
+        user = await get_user_from_token(token, db)
     if not user:
         await websocket.close(code=4001)
         return
 
-    await manager.connect(websocket, user.id)
+    # Register before reading the backlog so nothing committed in between
+    # is missed; the connection drops live duplicates of replayed rows.
+    connection = await manager.connect(websocket, user.id)
     try:
+        if last_seen_id is not None:
+            async with AsyncSessionLocal() as db:
+                missed = await notification_service.get_missed_notifications(
+                    db, user.id, last_seen_id, settings.WS_REPLAY_LIMIT
+                )
+                unread_count = await notification_service.get_unread_count(db, user.id)
+            connection.replay(missed, unread_count)
+        connection.start()
+
         while True:
+            # Clients answer heartbeat pings with "pong"
             await websocket.receive_text()
+            connection.touch()
     except WebSocketDisconnect:
-        manager.disconnect(user.id)
+        pass
+    finally:
+        manager.disconnect(connection)
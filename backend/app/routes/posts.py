@@ -1,6 +1,8 @@
-from typing import Annotated, List
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from typing import Annotated
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 from app.database import get_db
 from app.models.post import Post
 from app.models.tag import Tag
@@ -8,30 +10,55 @@ from app.models.user import User
 from app.models.notification import NotificationType
 from app.schemas.post import PostCreate, Post as PostSchema
 from app.schemas.notification import NotificationCreate
+from app.schemas.pagination import Page
 from app.services.notifications import notification_service
 from app.utils.auth import get_current_user
-from app.utils.mentions import get_mentioned_users
+from app.utils.loaders import post_schema_loaders
+from app.utils.mentions import get_mentioned_user_ids
 from app.services.karma import karma_service
+from app.services.read_cache import comments_key, post_key, read_cache
+from app.services.search import search_service
+from app.services.tag_directory import tag_directory
+from app.services.versions import POSTS, version_service
+from app.utils.etag import etag_headers, not_modified, weak_etag
+from app.utils.pagination import PageParams, paginate
+from app.utils.user import lock_users
 
 router = APIRouter()
 
 
-@router.get("/posts", response_model=List[PostSchema])
-def list_posts(db: Annotated[Session, Depends(get_db)]):
-    posts = db.query(Post).join(Post.user).all()
-    return posts
+@router.get("/posts", response_model=Page[PostSchema])
+async def list_posts(
+    request: Request,
+    response: Response,
+    db: Annotated[AsyncSession, Depends(get_db)],
+    page: Annotated[PageParams, Depends()],
+):
+    version = await version_service.collection_version(db, POSTS)
+    if cached := not_modified(request, response, weak_etag(POSTS, version)):
+        return cached
+
+    # Newest first; Post.id is the keyset so deep pages stay index range scans
+    posts, next_cursor = await paginate(
+        db,
+        select(Post).options(*post_schema_loaders()),
+        Post.id,
+        page,
+        descending=True,
+    )
+    return {"items": posts, "next_cursor": next_cursor}
 
 
 @router.post("/posts", response_model=PostSchema, status_code=status.HTTP_201_CREATED)
 async def create_post(
     post: PostCreate,
     current_user: Annotated[User, Depends(get_current_user)],
-    db: Annotated[Session, Depends(get_db)],
+    db: Annotated[AsyncSession, Depends(get_db)],
 ):
     if not post.tag_ids:
         raise HTTPException(status_code=400, detail="At least one tag is required")
 
-    tags = db.query(Tag).filter(Tag.id.in_(post.tag_ids)).all()
+    tags = (await db.scalars(select(Tag).where(Tag.id.in_(post.tag_ids)))).all()
     if len(tags) != len(post.tag_ids):
         raise HTTPException(status_code=400, detail="One or more tag IDs are invalid")
     if len(tags) == 0:
@@ -42,33 +69,65 @@ async def create_post(
     db_post.tags = tags
 
     db.add(db_post)
-    db.commit()
-    db.refresh(db_post)
+    await db.flush()
+    await search_service.index_post(db, db_post.id)
+
+    # Handle @mentions in the post
+    mentioned_user_ids = get_mentioned_user_ids(post.body)
+    notifications = [
+        NotificationCreate(
+            user_id=user_id,
+            message=f"@{current_user.username} mentioned you in a post",
+            type=NotificationType.MENTION,
+            reference_id=db_post.id,
+        )
+        for user_id in mentioned_user_ids
+        if user_id != current_user.id
+    ]
+
+    # Lock the author and everyone mentioned in id order before karma
+    # writes the author's row, so mutual mentions cannot deadlock
+    await lock_users(db, [current_user.id, *mentioned_user_ids])
 
     # Award karma for creating a post
-    await karma_service.award_post_creation(db, current_user.id)
+    await karma_service.award_post_creation(db, current_user.id, db_post.id)
 
-    # Handle @mentions in the post
-    mentioned_users = get_mentioned_users(db, post.body)
-    for user in mentioned_users:
-        if user.id != current_user.id:
-            notification = NotificationCreate(
-                user_id=user.id,
-                message=f"@{current_user.username} mentioned you in a post",
-                type=NotificationType.MENTION,
-                reference_id=db_post.id,
-            )
-            await notification_service.create_notification(db, notification)
+    await notification_service.create_notifications(db, notifications)
+
+    await version_service.collection_changed(db, POSTS)
+    await db.commit()
+    tag_directory.adjust_usage([tag.id for tag in tags], 1)
+    await db.refresh(db_post, ["user", "tags"])
 
     return db_post
 
 
 @router.get("/posts/{id}", response_model=PostSchema)
-def get_post(id: int, db: Annotated[Session, Depends(get_db)]):
-    post = db.query(Post).join(Post.user).filter(Post.id == id).first()
-    if not post:
+async def get_post(
+    id: int,
+    request: Request,
+    response: Response,
+    db: Annotated[AsyncSession, Depends(get_db)],
+):
+    # Versions are read before the data they describe, so an ETag can be
+    # older than its body (costing one more full response) but never newer
+    version = await version_service.post_version(db, id)
+    if version is None:
         raise HTTPException(status_code=404, detail="Post not found")
-    return post
+    etag = weak_etag("post", id, version)
+    if cached := not_modified(request, response, etag):
+        return cached
+
+    async def render() -> bytes:
+        post = await db.scalar(
+            select(Post).options(*post_schema_loaders()).where(Post.id == id)
+        )
+        if not post:
+            raise HTTPException(status_code=404, detail="Post not found")
+        return PostSchema.model_validate(post).model_dump_json().encode()
+
+    body = await read_cache.get_or_load(post_key(id), version, "", render)
+    return Response(body, media_type="application/json", headers=etag_headers(etag))
 
 
 @router.put("/posts/{id}", response_model=PostSchema)
@@ -76,9 +135,11 @@ async def update_post(
     id: int,
     post: PostCreate,
     current_user: Annotated[User, Depends(get_current_user)],
-    db: Annotated[Session, Depends(get_db)],
+    db: Annotated[AsyncSession, Depends(get_db)],
 ):
-    db_post = db.query(Post).filter(Post.id == id).first()
+    db_post = await db.scalar(
+        select(Post).options(selectinload(Post.tags)).where(Post.id == id)
+    )
     if not db_post:
         raise HTTPException(status_code=404, detail="Post not found")
     # Allow both post owner and admins to update
@@ -87,8 +148,9 @@ async def update_post(
             status_code=403, detail="Not authorized to update this post"
         )
 
-    # Store old body for mention comparison
-    old_mentions = get_mentioned_users(db, db_post.body)
+    # Store old mentions and tags for comparison
+    old_mentions = get_mentioned_user_ids(db_post.body)
+    old_tag_ids = {tag.id for tag in db_post.tags}
 
     # Update basic fields
     db_post.title = post.title
@@ -98,36 +160,47 @@ async def update_post(
     if not post.tag_ids:
         raise HTTPException(status_code=400, detail="At least one tag is required")
 
-    tags = db.query(Tag).filter(Tag.id.in_(post.tag_ids)).all()
+    tags = (await db.scalars(select(Tag).where(Tag.id.in_(post.tag_ids)))).all()
     if len(tags) != len(post.tag_ids):
         raise HTTPException(status_code=400, detail="One or more tag IDs are invalid")
     db_post.tags = tags
 
-    db.commit()
-    db.refresh(db_post)
+    await search_service.index_post(db, db_post.id)
 
     # Handle new @mentions in updated post body
-    new_mentions = get_mentioned_users(db, post.body)
-    for user in new_mentions:
-        if user.id != current_user.id and user not in old_mentions:
-            notification = NotificationCreate(
-                user_id=user.id,
+    new_mentions = get_mentioned_user_ids(post.body) - old_mentions
+    await notification_service.create_notifications(
+        db,
+        [
+            NotificationCreate(
+                user_id=user_id,
                 message=f"@{current_user.username} mentioned you in an updated post: {post.title}",
                 type=NotificationType.MENTION,
                 reference_id=db_post.id,
             )
-            await notification_service.create_notification(db, notification)
+            for user_id in new_mentions
+            if user_id != current_user.id
+        ],
+    )
+
+    await version_service.post_changed(db, db_post.id)
+    await db.commit()
+    await read_cache.invalidate(post_key(db_post.id))
+    new_tag_ids = {tag.id for tag in tags}
+    tag_directory.adjust_usage(new_tag_ids - old_tag_ids, 1)
+    tag_directory.adjust_usage(old_tag_ids - new_tag_ids, -1)
+    await db.refresh(db_post, ["user", "tags"])
 
     return db_post
 
 
 @router.delete("/posts/{id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_post(
+async def delete_post(
     id: int,
     current_user: Annotated[User, Depends(get_current_user)],
-    db: Annotated[Session, Depends(get_db)],
+    db: Annotated[AsyncSession, Depends(get_db)],
 ):
-    db_post = db.query(Post).filter(Post.id == id).first()
+    db_post = await db.get(Post, id, options=[selectinload(Post.tags)])
     if not db_post:
         raise HTTPException(status_code=404, detail="Post not found")
     # Allow both post owner and admins to delete
@@ -136,20 +209,37 @@ def delete_post(
             status_code=403, detail="Not authorized to delete this post"
         )
 
-    db.delete(db_post)
-    db.commit()
+    tag_ids = [tag.id for tag in db_post.tags]
+    await search_service.remove_post(db, db_post.id)
+    await db.delete(db_post)
+    await version_service.collection_changed(db, POSTS)
+    await db.commit()
+    await read_cache.invalidate(post_key(id), comments_key(id))
+    tag_directory.adjust_usage(tag_ids, -1)
     return None
 
 
-@router.get("/posts/by-tag/{tag_id}", response_model=List[PostSchema])
-def list_posts_by_tag(
+@router.get("/posts/by-tag/{tag_id}", response_model=Page[PostSchema])
+async def list_posts_by_tag(
     tag_id: int,
-    db: Annotated[Session, Depends(get_db)],
+    request: Request,
+    response: Response,
+    db: Annotated[AsyncSession, Depends(get_db)],
+    page: Annotated[PageParams, Depends()],
 ):
-    tag = db.query(Tag).filter(Tag.id == tag_id).first()
+    version = await version_service.collection_version(db, POSTS)
+    if cached := not_modified(request, response, weak_etag(POSTS, version)):
+        return cached
+
+    tag = await db.get(Tag, tag_id)
     if not tag:
         raise HTTPException(status_code=404, detail="Tag not found")
 
-    # Get posts with user data
-    posts = db.query(Post).join(Post.user).filter(Post.tags.contains(tag)).all()
-    return posts
+    posts, next_cursor = await paginate(
+        db,
+        select(Post).options(*post_schema_loaders()).where(Post.tags.contains(tag)),
+        Post.id,
+        page,
+        descending=True,
+    )
+    return {"items": posts, "next_cursor": next_cursor}
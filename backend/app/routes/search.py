@@ -0,0 +1,24 @@
+from typing import Annotated
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_db
+from app.schemas.pagination import Page
+from app.schemas.post import Post as PostSchema
+from app.services.search import search_service
+from app.utils.pagination import PageParams
+
+router = APIRouter()
+
+
+@router.get("/search", response_model=Page[PostSchema])
+async def search_posts(
+    db: Annotated[AsyncSession, Depends(get_db)],
+    page: Annotated[PageParams, Depends()],
+    q: str = Query(..., min_length=1, max_length=200),
+    tag_id: int | None = None,
+):
+    q = q.strip()
+    if not q:
+        raise HTTPException(status_code=400, detail="Search query is empty")
+    posts, next_cursor = await search_service.search(db, q, page, tag_id)
+    return {"items": posts, "next_cursor": next_cursor}
@@ -1,5 +1,30 @@
+import mimetypes
+import os
+import aiofiles.os
 from fastapi import APIRouter, UploadFile, HTTPException
-from app.services.file_service import save_upload_file, FileValidationError
+from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers, QueryParams
+from starlette.responses import FileResponse, JSONResponse, Response
+from starlette.staticfiles import NotModifiedResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.config import get_settings
+from app.services.file_service import (
+    FILE_TOO_LARGE,
+    MAX_FILE_SIZE,
+    save_upload_file,
+    FileValidationError,
+)
+from app.services.image_variants import image_variants
+from app.services.storage import IMMUTABLE_CACHE_CONTROL, is_content_key
+
+settings = get_settings()
+
+# For ?w= answered with the upload itself: a variant may exist later, so
+# this answer must not be pinned in caches for a year
+FALLBACK_CACHE_CONTROL = "public, max-age=3600"
+
+# Room in an upload's body for the multipart boundaries and part headers
+MULTIPART_OVERHEAD = 64 * 1024
 
 router = APIRouter()
 
@@ -7,9 +32,103 @@ router = APIRouter()
 @router.post("/upload")
 async def upload_file(file: UploadFile):
     try:
-        file_path = await save_upload_file(file)
-        return {"url": file_path}
+        file_path, width = await save_upload_file(file)
+        return {"url": file_path, "width": width}
     except FileValidationError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail="Failed to upload file")
+
+
+class UploadSizeLimit:
+    """Turns away oversized POST /upload bodies before they are spooled."""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        path: str = "/upload",
+        max_bytes: int = MAX_FILE_SIZE + MULTIPART_OVERHEAD,
+    ):
+        self.app = app
+        self.path = path
+        self.max_bytes = max_bytes
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] != self.path:
+            return await self.app(scope, receive, send)
+
+        length = Headers(scope=scope).get("content-length", "")
+        if length.isdigit() and int(length) > self.max_bytes:
+            response = JSONResponse({"detail": FILE_TOO_LARGE}, status_code=413)
+            return await response(scope, receive, send)
+
+        # Chunked bodies have no length up front, so count them as they arrive
+        received = 0
+
+        async def limited_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            received += len(message.get("body", b""))
+            if received > self.max_bytes:
+                raise HTTPException(status_code=413, detail=FILE_TOO_LARGE)
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+
+class UploadResponse(FileResponse):
+    # Each chunk read is a hop to the thread pool, so take fewer, larger ones
+    chunk_size = 256 * 1024
+
+
+class UploadFiles(StaticFiles):
+    """Serves /uploads, with ?w=<pixels> for resized images."""
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        if scope["method"] not in ("GET", "HEAD") or not is_content_key(path):
+            return await super().get_response(path, scope)
+
+        request_headers = Headers(scope=scope)
+        digest = os.path.splitext(os.path.basename(path))[0]
+        etag = f'"{digest}"'
+        cache_control = IMMUTABLE_CACHE_CONTROL
+        width = QueryParams(scope["query_string"]).get("w", "")
+        if width.isdigit() and image_variants.enabled:
+            width = image_variants.width_for(int(width))
+            variant_headers = Headers(
+                headers={"etag": f'"{digest}-{width}"', "cache-control": cache_control}
+            )
+            # A revalidated variant is answered from its ETag and one stat,
+            # without going through the renderer
+            if self.is_not_modified(
+                variant_headers, request_headers
+            ) and await aiofiles.os.path.exists(image_variants.path(path, width)):
+                return NotModifiedResponse(variant_headers)
+            variant = await image_variants.get(path, width)
+            if variant is None:
+                cache_control = FALLBACK_CACHE_CONTROL
+            else:
+                path = os.path.relpath(variant, self.directory)
+                etag = variant_headers["etag"]
+
+        full_path = os.path.join(self.directory, path)
+        try:
+            stat_result = await aiofiles.os.stat(full_path)
+        except FileNotFoundError:
+            raise HTTPException(status_code=404)
+
+        headers = {"etag": etag, "cache-control": cache_control}
+        if self.is_not_modified(Headers(headers=headers), request_headers):
+            return NotModifiedResponse(Headers(headers=headers))
+
+        if settings.UPLOADS_ACCEL_REDIRECT and scope["method"] == "GET":
+            headers["x-accel-redirect"] = (
+                settings.UPLOADS_ACCEL_REDIRECT.rstrip("/") + "/" + path
+            )
+            return Response(headers=headers, media_type=mimetypes.guess_type(path)[0])
+
+        response = UploadResponse(full_path, stat_result=stat_result, headers=headers)
+        # Without If-None-Match, If-Modified-Since still applies
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
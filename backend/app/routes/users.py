@@ -1,10 +1,15 @@
 from typing import Annotated
-from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.database import get_db
 from app.models.user import User
-from app.schemas.user import User as UserSchema, UserList, UserUpdate
-from app.utils.auth import get_current_user
+from app.schemas.pagination import Page
+from app.schemas.user import User as UserSchema, UserUpdate
+from app.services.user_directory import user_directory
+from app.services.versions import version_service
+from app.utils.auth import get_current_user, invalidate_principal
+from app.utils.pagination import PageParams, paginate
 from app.utils.user import (
     get_current_admin_user,
     check_user_permission,
@@ -15,22 +20,18 @@ from app.utils.user import (
 router = APIRouter()
 
 
-@router.get("/users", response_model=UserList)
+@router.get("/users", response_model=Page[UserSchema])
 async def list_users(
     current_user: Annotated[User, Depends(get_current_admin_user)],
-    db: Annotated[Session, Depends(get_db)],
-    page: int = Query(1, ge=1),
-    size: int = Query(10, ge=1, le=100),
+    db: Annotated[AsyncSession, Depends(get_db)],
+    page: Annotated[PageParams, Depends()],
 ):
-    skip = (page - 1) * size
-    total = db.query(User).count()
-    users = db.query(User).offset(skip).limit(size).all()
-
-    return {"total": total, "items": users, "page": page, "size": size}
+    users, next_cursor = await paginate(db, select(User), User.id, page)
+    return {"items": users, "next_cursor": next_cursor}
 
 
 @router.get("/users/{user_id}", response_model=UserSchema)
-async def get_user(user_id: int, db: Annotated[Session, Depends(get_db)]):
+async def get_user(user_id: int, db: Annotated[AsyncSession, Depends(get_db)]):
     return await get_user_by_id(user_id, db)
 
 
@@ -39,7 +40,7 @@ async def update_user(
     user_id: int,
     user_update: UserUpdate,
     current_user: Annotated[User, Depends(get_current_user)],
-    db: Annotated[Session, Depends(get_db)],
+    db: Annotated[AsyncSession, Depends(get_db)],
 ):
     check_user_permission(user_id, current_user)
     db_user = await get_user_by_id(user_id, db)
@@ -51,18 +52,25 @@ async def update_user(
         )
 
     if "email" in update_data or "username" in update_data:
-        check_email_username_exists(
+        await check_email_username_exists(
             db,
             email=update_data.get("email"),
             username=update_data.get("username"),
             exclude_user_id=user_id,
         )
 
+    old_username = db_user.username
+    old_name = db_user.name
     for field, value in update_data.items():
         setattr(db_user, field, value)
 
-    db.commit()
-    db.refresh(db_user)
+    if (db_user.username, db_user.name) != (old_username, old_name):
+        await version_service.user_changed(db, db_user.id)
+    await db.commit()
+    await invalidate_principal(db_user.id, old_username)
+    if db_user.username != old_username:
+        await user_directory.publish(db_user.id, db_user.username)
+    await db.refresh(db_user)
     return db_user
 
 
@@ -70,18 +78,21 @@ async def update_user(
 async def delete_user(
     user_id: int,
     current_user: Annotated[User, Depends(get_current_admin_user)],
-    db: Annotated[Session, Depends(get_db)],
+    db: Annotated[AsyncSession, Depends(get_db)],
 ):
     user = await get_user_by_id(user_id, db)
-    db.delete(user)
-    db.commit()
+    await version_service.user_changed(db, user_id)
+    await db.delete(user)
+    await db.commit()
+    await invalidate_principal(user_id, user.username)
+    await user_directory.publish(user_id, None)
 
 
 @router.post("/users/{user_id}/promote", response_model=UserSchema)
 async def promote_to_admin(
     user_id: int,
     current_user: Annotated[User, Depends(get_current_admin_user)],
-    db: Annotated[Session, Depends(get_db)],
+    db: Annotated[AsyncSession, Depends(get_db)],
 ):
     user = await get_user_by_id(user_id, db)
 
@@ -93,8 +104,10 @@ async def promote_to_admin(
 
     user.role = "admin"
     user.created_by_id = current_user.id
-    db.commit()
-    db.refresh(user)
+    await version_service.user_changed(db, user.id)
+    await db.commit()
+    await invalidate_principal(user.id, user.username)
+    await db.refresh(user)
     return user
 
 
@@ -102,7 +115,7 @@ async def promote_to_admin(
 async def demote_admin(
     user_id: int,
     current_user: Annotated[User, Depends(get_current_admin_user)],
-    db: Annotated[Session, Depends(get_db)],
+    db: Annotated[AsyncSession, Depends(get_db)],
 ):
     user = await get_user_by_id(user_id, db)
 
@@ -114,6 +127,8 @@ async def demote_admin(
 
     user.role = "user"
     user.created_by_id = None
-    db.commit()
-    db.refresh(user)
+    await version_service.user_changed(db, user.id)
+    await db.commit()
+    await invalidate_principal(user.id, user.username)
+    await db.refresh(user)
     return user
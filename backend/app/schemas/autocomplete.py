@@ -0,0 +1,19 @@
+from typing import List
+from pydantic import BaseModel
+
+
+class UserSuggestion(BaseModel):
+    id: int
+    username: str
+    karma: int
+
+
+class TagSuggestion(BaseModel):
+    id: int
+    title: str
+    post_count: int
+
+
+class Suggestions(BaseModel):
+    users: List[UserSuggestion] = []
+    tags: List[TagSuggestion] = []
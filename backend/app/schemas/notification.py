@@ -12,6 +12,10 @@ class NotificationBase(BaseModel):
 
 class NotificationCreate(NotificationBase):
     user_id: int
+    # Opt-in coalescing: a message template with a "{count}" placeholder used
+    # when this event is merged into an unread row of the same type and
+    # reference_id (e.g. "{count} new comments on your post: ...")
+    digest: Optional[str] = None
 
 
 class Notification(NotificationBase):
@@ -19,6 +23,7 @@ class Notification(NotificationBase):
     user_id: int
     is_read: bool
     created_at: datetime
+    count: int
 
     class Config:
         from_attributes = True
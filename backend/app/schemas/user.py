@@ -1,4 +1,3 @@
-from typing import List
 from pydantic import BaseModel, EmailStr
 
 
@@ -27,13 +26,6 @@ class User(UserBase):
         from_attributes = True
 
 
-class UserList(BaseModel):
-    total: int
-    items: List[User]
-    page: int
-    size: int
-
-
 class UserPublic(BaseModel):
     id: int
     name: str
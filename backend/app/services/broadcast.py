@@ -0,0 +1,49 @@
+import logging
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import AsyncSessionLocal
+from app.utils.periodic import run_every
+from app.websockets.broker import create_broker
+
+logger = logging.getLogger(__name__)
+
+
+class Broadcaster:
+    """Per-worker state whose changes are applied here and on every other worker."""
+
+    def __init__(self, channel: str):
+        self.channel = channel
+        self.broker = create_broker(self._apply, channel)
+
+    async def start(self) -> None:
+        await self.broker.start()
+
+    async def stop(self) -> None:
+        await self.broker.stop()
+
+    async def broadcast(self, id: int, data: dict) -> None:
+        # Applied here first so this worker sees its own committed change; a
+        # failed broadcast is only logged, as the change is already committed
+        await self._apply(id, data)
+        try:
+            await self.broker.publish(id, data)
+        except Exception:
+            logger.exception("Failed to broadcast %s change for %d", self.channel, id)
+
+    async def _apply(self, id: int, data: dict) -> None:
+        raise NotImplementedError
+
+
+class BroadcastDirectory(Broadcaster):
+    """A Broadcaster warmed from the database and periodically rebuilt from it."""
+
+    async def start(self) -> None:
+        async with AsyncSessionLocal() as db:
+            await self.refresh(db)
+        await super().start()
+
+    async def refresh(self, db: AsyncSession) -> None:
+        raise NotImplementedError
+
+    async def refresh_periodically(self, interval_seconds: float) -> None:
+        # Repairs any change a worker missed, e.g. while its listener reconnected
+        await run_every(interval_seconds, self.refresh, f"{self.channel} refresh")
@@ -1,49 +1,89 @@
+import asyncio
+import hashlib
 import os
+import tempfile
 import aiofiles
+import aiofiles.os
 from fastapi import UploadFile
-from uuid import uuid4
 from app.config import get_settings
+from app.services.image_variants import image_variants
+from app.services.storage import content_key, storage
+from app.utils.images import image_width
 
 settings = get_settings()
 
-UPLOAD_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "uploads")
-ALLOWED_EXTENSIONS = {"png", "jpg", "jpeg", "gif", "webp"}
 MAX_FILE_SIZE = 5 * 1024 * 1024  # 5MB
+FILE_TOO_LARGE = "File size exceeds maximum limit"
+CHUNK_SIZE = 64 * 1024
+
+# Leading bytes of each allowed image format -> stored extension. The
+# extension comes from the content, never from the client's filename.
+MAGIC_NUMBERS = {
+    b"\x89PNG\r\n\x1a\n": "png",
+    b"\xff\xd8\xff": "jpg",
+    b"GIF87a": "gif",
+    b"GIF89a": "gif",
+}
+
+CONTENT_TYPES = {
+    "png": "image/png",
+    "jpg": "image/jpeg",
+    "gif": "image/gif",
+    "webp": "image/webp",
+}
 
 
 class FileValidationError(Exception):
     pass
 
 
-async def save_upload_file(file: UploadFile) -> str:
-    """
-    Save an uploaded file and return its URL path
-    """
-    # Validate file size
-    file_size = 0
-    chunk_size = 1024
-    while chunk := await file.read(chunk_size):
-        file_size += len(chunk)
-        if file_size > MAX_FILE_SIZE:
-            raise FileValidationError("File size exceeds maximum limit")
-    await file.seek(0)
-
-    # Validate file extension
-    ext = file.filename.split(".")[-1].lower() if "." in file.filename else ""
-    if ext not in ALLOWED_EXTENSIONS:
-        raise FileValidationError("File type not allowed")
-
-    # Generate unique filename
-    filename = f"{uuid4()}.{ext}"
-    filepath = os.path.join(UPLOAD_DIR, filename)
-
-    # Create uploads directory if it doesn't exist
-    os.makedirs(UPLOAD_DIR, exist_ok=True)
-
-    # Save the file
-    async with aiofiles.open(filepath, "wb") as out_file:
-        content = await file.read()
-        await out_file.write(content)
-
-    # Return the URL path
-    return f"/uploads/{filename}"
+def _detect_extension(head: bytes) -> str | None:
+    for magic, ext in MAGIC_NUMBERS.items():
+        if head.startswith(magic):
+            return ext
+    # RIFF container: "RIFF" <4-byte size> "WEBP"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "webp"
+    return None
+
+
+async def save_upload_file(file: UploadFile) -> tuple[str, int | None]:
+    """Save an uploaded image under its content hash; its URL and pixel width."""
+    staging_dir = storage.staging_dir()
+    os.makedirs(staging_dir, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=staging_dir, prefix=".upload-", suffix=".part")
+    try:
+        ext = None
+        file_size = 0
+        digest = hashlib.sha256()
+        try:
+            async with aiofiles.open(fd, "wb", closefd=False) as out_file:
+                while chunk := await file.read(CHUNK_SIZE):
+                    if ext is None:
+                        ext = _detect_extension(chunk)
+                        if ext is None:
+                            raise FileValidationError("File type not allowed")
+                    file_size += len(chunk)
+                    if file_size > MAX_FILE_SIZE:
+                        raise FileValidationError(FILE_TOO_LARGE)
+                    digest.update(chunk)
+                    await out_file.write(chunk)
+                if ext is None:
+                    raise FileValidationError("File is empty")
+                await out_file.flush()
+                await asyncio.to_thread(os.fsync, fd)
+        finally:
+            os.close(fd)
+
+        width = await asyncio.to_thread(image_width, tmp_path)
+        key = content_key(digest.hexdigest(), ext)
+        if await storage.put(tmp_path, key, CONTENT_TYPES[ext]):
+            image_variants.schedule(key)
+    except BaseException:
+        try:
+            await aiofiles.os.remove(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
+
+    return storage.url(key), width
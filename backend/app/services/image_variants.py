@@ -0,0 +1,151 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Iterable, List, Optional, Set
+import aiofiles.os
+from app.config import get_settings
+from app.services.storage import UPLOAD_DIR, is_content_key
+from app.utils.images import render_variants
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+class ImageVariants:
+    """Resized WebP copies of local uploads, for serving at ?w=<pixels>."""
+
+    def __init__(
+        self,
+        root: str,
+        widths: Iterable[int],
+        quality: int,
+        workers: int,
+        enabled: bool = True,
+    ):
+        self.root = root
+        self.widths = sorted(widths)
+        self.quality = quality
+        self.workers = workers
+        self.enabled = enabled and bool(self.widths)
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._unavailable: Set[str] = set()
+        self._tasks: Set[asyncio.Task] = set()
+
+    def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def width_for(self, requested: int) -> int:
+        """The narrowest configured width covering requested, else the widest."""
+        for width in self.widths:
+            if width >= requested:
+                return width
+        return self.widths[-1]
+
+    def path(self, key: str, width: int) -> str:
+        return os.path.join(
+            self.root, "variants", str(width), os.path.splitext(key)[0] + ".webp"
+        )
+
+    def schedule(self, key: str) -> None:
+        """Queue every width of a newly stored upload."""
+        if self.enabled:
+            task = asyncio.create_task(self._render(key, self.widths))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def get(self, key: str, requested_width: int) -> Optional[str]:
+        """Path of key's variant nearest requested_width, rendered if needed, or None."""
+        if not self.enabled or not is_content_key(key):
+            return None
+        width = self.width_for(requested_width)
+        path = self.path(key, width)
+        if await aiofiles.os.path.exists(path):
+            return path
+        if not await aiofiles.os.path.exists(os.path.join(self.root, key)):
+            return None
+        return path if await self._render(key, [width]) else None
+
+    async def _render(self, key: str, widths: List[int]) -> bool:
+        paths = [self.path(key, width) for width in widths]
+        if any(path in self._unavailable for path in paths):
+            return False
+        jobs = {self._pending[path] for path in paths if path in self._pending}
+        missing = [
+            (width, path)
+            for width, path in zip(widths, paths)
+            if path not in self._pending
+        ]
+        if missing:
+            try:
+                job = asyncio.get_running_loop().run_in_executor(
+                    self._executor(),
+                    render_variants,
+                    os.path.join(self.root, key),
+                    missing,
+                    self.quality,
+                )
+            except RuntimeError:
+                # The pool is shut down (the app is stopping) or broken
+                logger.exception("Could not queue variants of %s", key)
+                self._pool = None
+                return False
+            queued = [path for _, path in missing]
+            for path in queued:
+                self._pending[path] = job
+            job.add_done_callback(lambda _: self._forget(queued))
+            jobs.add(job)
+
+        rendered = True
+        written = set()
+        for job in jobs:
+            try:
+                # Shielded: a client going away must not cancel a job that
+                # other requests, or the upload's own queueing, may share
+                written.update(await asyncio.shield(job))
+            except BrokenProcessPool:
+                # A worker died (e.g. killed for memory); start a fresh pool
+                logger.exception("Image worker pool broke rendering %s", key)
+                self._pool = None
+                rendered = False
+            except Exception:
+                logger.exception("Failed to render variants of %s", key)
+                self._unavailable.update(paths)
+                rendered = False
+        if rendered:
+            # Animated, oversized or narrower than the width: always served
+            # as uploaded
+            skipped = [path for path in paths if path not in written]
+            self._unavailable.update(skipped)
+            rendered = not skipped
+        return rendered
+
+    def _forget(self, paths: Iterable[str]) -> None:
+        for path in paths:
+            self._pending.pop(path, None)
+
+    def _executor(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # Spawned rather than forked: the app's threads, sockets and
+            # event loop are not safe to copy into a child
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._pool
+
+
+image_variants = ImageVariants(
+    UPLOAD_DIR,
+    settings.IMAGE_VARIANT_WIDTHS,
+    settings.IMAGE_VARIANT_QUALITY,
+    settings.IMAGE_VARIANT_WORKERS,
+    enabled=settings.STORAGE_BACKEND == "local",
+)
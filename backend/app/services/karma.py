@@ -1,5 +1,23 @@
+from collections import Counter
+from sqlalchemy import event, func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from app.models.karma import KarmaLedgerEntry, KarmaReason
 from app.models.user import User
+from app.services.user_directory import user_directory
+
+_PENDING = "karma_pending"
+
+
+@event.listens_for(Session, "after_commit")
+def _adjust_directory(session: Session) -> None:
+    for user_id, points in session.info.pop(_PENDING, Counter()).items():
+        user_directory.adjust_karma(user_id, points)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_pending(session: Session) -> None:
+    session.info.pop(_PENDING, None)
 
 
 class KarmaPoints:
@@ -12,39 +30,98 @@ class KarmaPoints:
 
 class KarmaService:
     @staticmethod
-    async def update_karma(db: Session, user_id: int, points: int) -> User:
-        """Update a user's karma points in a transaction."""
-        user = db.query(User).filter(User.id == user_id).first()
-        if user:
-            user.karma += points
-            db.commit()
-            db.refresh(user)
-        return user
+    async def update_karma(
+        db: AsyncSession,
+        user_id: int,
+        points: int,
+        reason: KarmaReason,
+        reference_id: int | None = None,
+    ) -> None:
+        """Apply a karma change and record it in the ledger."""
+        await db.execute(
+            update(User).where(User.id == user_id).values(karma=User.karma + points)
+        )
+        await db.execute(
+            insert(KarmaLedgerEntry).values(
+                user_id=user_id,
+                delta=points,
+                reason=reason,
+                reference_id=reference_id,
+            )
+        )
+        # Only reorders mention autocomplete, so it waits for the commit
+        db.sync_session.info.setdefault(_PENDING, Counter())[user_id] += points
 
     @staticmethod
-    async def award_post_creation(db: Session, user_id: int) -> User:
+    async def award_post_creation(
+        db: AsyncSession, user_id: int, post_id: int | None = None
+    ) -> None:
         """Award karma points for creating a post."""
-        return await KarmaService.update_karma(db, user_id, KarmaPoints.POST_CREATED)
+        await KarmaService.update_karma(
+            db, user_id, KarmaPoints.POST_CREATED, KarmaReason.POST_CREATED, post_id
+        )
 
     @staticmethod
-    async def award_comment_creation(db: Session, user_id: int) -> User:
+    async def award_comment_creation(
+        db: AsyncSession, user_id: int, comment_id: int | None = None
+    ) -> None:
         """Award karma points for creating a comment."""
-        return await KarmaService.update_karma(db, user_id, KarmaPoints.COMMENT_CREATED)
+        await KarmaService.update_karma(
+            db,
+            user_id,
+            KarmaPoints.COMMENT_CREATED,
+            KarmaReason.COMMENT_CREATED,
+            comment_id,
+        )
 
     @staticmethod
-    async def award_comment_accepted(db: Session, user_id: int) -> User:
+    async def award_comment_accepted(
+        db: AsyncSession, user_id: int, comment_id: int | None = None
+    ) -> None:
         """Award karma points when user's comment is accepted."""
-        return await KarmaService.update_karma(
-            db, user_id, KarmaPoints.COMMENT_ACCEPTED
+        await KarmaService.update_karma(
+            db,
+            user_id,
+            KarmaPoints.COMMENT_ACCEPTED,
+            KarmaReason.COMMENT_ACCEPTED,
+            comment_id,
         )
 
     @staticmethod
-    async def handle_comment_vote(db: Session, user_id: int, is_upvote: bool) -> User:
+    async def handle_comment_vote(
+        db: AsyncSession,
+        user_id: int,
+        is_upvote: bool,
+        comment_id: int | None = None,
+        weight: int = 1,
+    ) -> None:
         """Award or deduct karma points for comment votes."""
-        points = (
-            KarmaPoints.COMMENT_UPVOTED if is_upvote else KarmaPoints.COMMENT_DOWNVOTED
+        if is_upvote:
+            points, reason = KarmaPoints.COMMENT_UPVOTED, KarmaReason.COMMENT_UPVOTED
+        else:
+            points, reason = (
+                KarmaPoints.COMMENT_DOWNVOTED,
+                KarmaReason.COMMENT_DOWNVOTED,
+            )
+        await KarmaService.update_karma(
+            db, user_id, points * weight, reason, comment_id
+        )
+
+    @staticmethod
+    async def recompute_karma(
+        db: AsyncSession, user_ids: list[int] | None = None
+    ) -> None:
+        """Rebuild users.karma from the ledger in one statement."""
+        ledger_total = (
+            select(func.coalesce(func.sum(KarmaLedgerEntry.delta), 0))
+            .where(KarmaLedgerEntry.user_id == User.id)
+            .scalar_subquery()
         )
-        return await KarmaService.update_karma(db, user_id, points)
+        stmt = update(User).values(karma=ledger_total)
+        if user_ids is not None:
+            stmt = stmt.where(User.id.in_(user_ids))
+        await db.execute(stmt.execution_options(synchronize_session=False))
+        await db.commit()
 
 
 karma_service = KarmaService()
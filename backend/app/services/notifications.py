@@ -1,61 +1,349 @@
-from sqlalchemy.orm import Session
-from app.models.notification import Notification, NotificationType
+import logging
+from collections import Counter, defaultdict
+from datetime import timedelta
+from typing import Dict, List
+from sqlalchemy import delete, func, insert, select, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import get_settings
+from app.database import utcnow
+from app.models.notification import (
+    ArchivedNotification,
+    Notification,
+    NotificationType,
+)
+from app.models.user import User
 from app.schemas.notification import NotificationCreate
-from app.websockets.manager import manager
+from app.utils.pagination import PageParams, paginate
+from app.models.outbox import OutboxMessage
+from app.services.outbox import mark_pending
+from app.utils.periodic import run_every
+from app.utils.user import lock_users
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
 
 
 class NotificationService:
     @staticmethod
     async def create_notification(
-        db: Session, notification: NotificationCreate
-    ) -> Notification:
-        db_notification = Notification(**notification.model_dump())
-        db.add(db_notification)
-        db.commit()
-        db.refresh(db_notification)
-
-        unread_count = (
-            db.query(Notification)
-            .filter(
-                Notification.user_id == notification.user_id,
+        db: AsyncSession, notification: NotificationCreate
+    ) -> None:
+        await NotificationService.create_notifications(db, [notification])
+
+    @staticmethod
+    async def create_notifications(
+        db: AsyncSession, notifications: List[NotificationCreate]
+    ) -> None:
+        """Add a batch of notifications to the caller's transaction."""
+        if not notifications:
+            return
+
+        # Every counter below is bumped under these locks, taken in id order
+        # (as mark_all_read's single row is) so concurrent batches serialize
+        # instead of deadlocking. Callers that also write other users' rows,
+        # e.g. karma, lock those together with the recipients beforehand.
+        await lock_users(db, (n.user_id for n in notifications))
+
+        fresh = notifications
+        if settings.NOTIFICATION_COALESCE_WINDOW_SECONDS > 0 and any(
+            n.digest for n in notifications
+        ):
+            fresh = await NotificationService._coalesce(db, notifications)
+
+        if fresh:
+            notification_ids = await db.scalars(
+                insert(Notification).returning(
+                    Notification.id, sort_by_parameter_order=True
+                ),
+                [n.model_dump(exclude={"digest"}) for n in fresh],
+            )
+            unread_counts = await NotificationService._add_unread(
+                db, Counter(n.user_id for n in fresh)
+            )
+            await db.execute(
+                insert(OutboxMessage),
+                [
+                    {
+                        "user_id": n.user_id,
+                        "notification_id": notification_id,
+                        "message": n.message,
+                        "unread_count": unread_counts.get(n.user_id, 0),
+                    }
+                    for n, notification_id in zip(fresh, notification_ids)
+                ],
+            )
+        mark_pending(db.sync_session)
+
+    @staticmethod
+    async def _coalesce(
+        db: AsyncSession, notifications: List[NotificationCreate]
+    ) -> List[NotificationCreate]:
+        """Merge digest-enabled notifications into open rows; return the rest."""
+        window = timedelta(seconds=settings.NOTIFICATION_COALESCE_WINDOW_SECONDS)
+        candidates = [n for n in notifications if n.digest]
+
+        # The recipients are locked by create_notifications, so concurrent
+        # events for one user serialize here instead of both inserting
+        result = await db.execute(
+            select(
+                Notification.id,
+                Notification.user_id,
+                Notification.type,
+                Notification.reference_id,
+                Notification.count,
+                Notification.created_at,
+            ).where(
+                tuple_(
+                    Notification.user_id, Notification.type, Notification.reference_id
+                ).in_([(n.user_id, n.type, n.reference_id) for n in candidates]),
                 Notification.is_read == False,
+                Notification.created_at >= utcnow() - window,
             )
-            .count()
         )
+        open_rows = {}
+        for row in result.all():
+            key = (row.user_id, row.type, row.reference_id)
+            # Keep the newest if an earlier race left two open rows
+            if key not in open_rows or row.id > open_rows[key]["id"]:
+                open_rows[key] = row._asdict()
 
-        await manager.send_notification(
-            notification.user_id, notification.message, unread_count
+        fresh, merged = [], []
+        for n in notifications:
+            row = open_rows.get((n.user_id, n.type, n.reference_id))
+            if n.digest and row is not None:
+                row["count"] += 1
+                row["message"] = n.digest.replace("{count}", str(row["count"]))
+                merged.append(row)
+            else:
+                fresh.append(n)
+        if not merged:
+            return fresh
+
+        unread_counts = dict(
+            (
+                await db.execute(
+                    select(User.id, User.unread_notifications).where(
+                        User.id.in_({row["user_id"] for row in merged})
+                    )
+                )
+            ).all()
         )
+        for row in {row["id"]: row for row in merged}.values():
+            await db.execute(
+                update(Notification)
+                .where(Notification.id == row["id"])
+                .values(count=row["count"], message=row["message"])
+                .execution_options(synchronize_session=False)
+            )
+            digest = {
+                "message": row["message"],
+                "unread_count": unread_counts[row["user_id"]],
+            }
+            queued = await db.scalar(
+                update(OutboxMessage)
+                .where(
+                    OutboxMessage.notification_id == row["id"],
+                    OutboxMessage.attempts == 0,
+                )
+                .values(**digest)
+                .returning(OutboxMessage.id)
+                .execution_options(synchronize_session=False)
+            )
+            if queued is None:
+                await db.execute(
+                    insert(OutboxMessage).values(
+                        user_id=row["user_id"],
+                        notification_id=row["id"],
+                        available_at=row["created_at"] + window,
+                        **digest,
+                    )
+                )
+        return fresh
 
-        return db_notification
+    @staticmethod
+    async def _add_unread(db: AsyncSession, added: Counter) -> Dict[int, int]:
+        # Nearly every recipient gets exactly one notification per batch, so
+        # grouping by increment keeps this at a single UPDATE in practice.
+        by_increment = defaultdict(list)
+        for user_id, count in added.items():
+            by_increment[count].append(user_id)
+
+        unread_counts = {}
+        for increment, user_ids in by_increment.items():
+            result = await db.execute(
+                update(User)
+                .where(User.id.in_(user_ids))
+                .values(unread_notifications=User.unread_notifications + increment)
+                .returning(User.id, User.unread_notifications)
+                .execution_options(synchronize_session=False)
+            )
+            unread_counts.update(result.all())
+        return unread_counts
 
     @staticmethod
-    def mark_all_read(db: Session, user_id: int) -> None:
-        db.query(Notification).filter(
-            Notification.user_id == user_id, Notification.is_read == False
-        ).update({Notification.is_read: True})
-        db.commit()
+    async def mark_all_read(db: AsyncSession, user_id: int) -> None:
+        # Zero the counter first: the row lock orders us after any in-flight
+        # create_notifications for this user, so its rows are visible below.
+        await db.execute(
+            update(User)
+            .where(User.id == user_id)
+            .values(unread_notifications=0)
+            .execution_options(synchronize_session=False)
+        )
+        await db.execute(
+            update(Notification)
+            .where(Notification.user_id == user_id, Notification.is_read == False)
+            .values(is_read=True)
+        )
+        await db.commit()
 
     @staticmethod
-    def get_user_notifications(
-        db: Session, user_id: int, skip: int = 0, limit: int = 50
-    ):
-        return (
-            db.query(Notification)
-            .filter(Notification.user_id == user_id)
-            .order_by(Notification.created_at.desc())
-            .offset(skip)
+    async def mark_read(db: AsyncSession, user_id: int, notification_id: int) -> bool:
+        """Mark one notification read; False if it is not the user's."""
+        # Same lock order as mark_all_read: the user row, then notifications
+        await db.execute(select(User.id).where(User.id == user_id).with_for_update())
+        owned = (Notification.id == notification_id, Notification.user_id == user_id)
+
+        flipped = await db.scalar(
+            update(Notification)
+            .where(*owned, Notification.is_read == False)
+            .values(is_read=True)
+            .returning(Notification.id)
+            .execution_options(synchronize_session=False)
+        )
+        if flipped is None:
+            found = await db.scalar(select(Notification.id).where(*owned))
+            await db.rollback()
+            return found is not None
+
+        await db.execute(
+            update(User)
+            .where(User.id == user_id)
+            .values(unread_notifications=User.unread_notifications - 1)
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+        return True
+
+    @staticmethod
+    async def get_user_notifications(db: AsyncSession, user_id: int, page: PageParams):
+        # Ids grow with created_at, so newest-first by id keeps the old order
+        return await paginate(
+            db,
+            select(Notification).where(Notification.user_id == user_id),
+            Notification.id,
+            page,
+            descending=True,
+        )
+
+    @staticmethod
+    async def get_missed_notifications(
+        db: AsyncSession, user_id: int, last_seen_id: int, limit: int
+    ) -> List[Notification]:
+        """The newest `limit` notifications after last_seen_id, oldest first."""
+        missed = await db.scalars(
+            select(Notification)
+            .where(Notification.user_id == user_id, Notification.id > last_seen_id)
+            .order_by(Notification.id.desc())
             .limit(limit)
-            .all()
         )
+        return list(reversed(missed.all()))
 
     @staticmethod
-    def get_unread_count(db: Session, user_id: int) -> int:
-        return (
-            db.query(Notification)
-            .filter(Notification.user_id == user_id, Notification.is_read == False)
-            .count()
+    async def get_unread_count(db: AsyncSession, user_id: int) -> int:
+        return await db.scalar(
+            select(User.unread_notifications).where(User.id == user_id)
         )
 
+    @staticmethod
+    async def reconcile_unread_counts(
+        db: AsyncSession, user_ids: List[int] | None = None
+    ) -> int:
+        """Repair counters that drifted from the notifications table."""
+        actual = (
+            select(func.count())
+            .select_from(Notification)
+            .where(Notification.user_id == User.id, Notification.is_read == False)
+            .scalar_subquery()
+        )
+        stmt = (
+            update(User)
+            .where(User.unread_notifications != actual)
+            .values(unread_notifications=actual)
+        )
+        if user_ids is not None:
+            stmt = stmt.where(User.id.in_(user_ids))
+        result = await db.execute(stmt.execution_options(synchronize_session=False))
+        await db.commit()
+        return result.rowcount
+
+    @staticmethod
+    async def reconcile_periodically(interval_seconds: float) -> None:
+        """Background job: run reconcile_unread_counts every interval."""
+
+        async def job(db: AsyncSession) -> None:
+            repaired = await NotificationService.reconcile_unread_counts(db)
+            if repaired:
+                logger.warning("Repaired %d unread notification counters", repaired)
+
+        await run_every(interval_seconds, job, "Unread counter reconciliation")
+
+    @staticmethod
+    async def apply_retention(
+        db: AsyncSession,
+        days: int = settings.NOTIFICATION_RETENTION_DAYS,
+        mode: str = settings.NOTIFICATION_RETENTION_MODE,
+        batch_size: int = settings.NOTIFICATION_RETENTION_BATCH_SIZE,
+    ) -> int:
+        """Archive (or delete) read notifications older than days; return how many."""
+        cutoff = utcnow() - timedelta(days=days)
+        columns = [
+            c.key for c in ArchivedNotification.__table__.c if c.key != "archived_at"
+        ]
+        moved = 0
+        while True:
+            ids = (
+                await db.scalars(
+                    select(Notification.id)
+                    .where(
+                        Notification.is_read == True, Notification.created_at < cutoff
+                    )
+                    .order_by(Notification.created_at)
+                    .limit(batch_size)
+                )
+            ).all()
+            if not ids:
+                return moved
+
+            if mode == "archive":
+                await db.execute(
+                    insert(ArchivedNotification).from_select(
+                        columns,
+                        select(
+                            *(Notification.__table__.c[key] for key in columns)
+                        ).where(Notification.id.in_(ids)),
+                    )
+                )
+            await db.execute(
+                delete(Notification)
+                .where(Notification.id.in_(ids))
+                .execution_options(synchronize_session=False)
+            )
+            await db.commit()
+            moved += len(ids)
+            if len(ids) < batch_size:
+                return moved
+
+    @staticmethod
+    async def apply_retention_periodically(interval_seconds: float) -> None:
+        """Background job: run apply_retention every interval."""
+
+        async def job(db: AsyncSession) -> None:
+            moved = await NotificationService.apply_retention(db)
+            if moved:
+                logger.info("Retention removed %d read notifications", moved)
+
+        await run_every(interval_seconds, job, "Notification retention")
+
 
 notification_service = NotificationService()
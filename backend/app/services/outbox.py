@@ -0,0 +1,173 @@
+import asyncio
+import logging
+from collections import defaultdict
+from datetime import timedelta
+from typing import List
+from sqlalchemy import delete, event, select, update
+from sqlalchemy.orm import Session
+from app.config import get_settings
+from app.database import AsyncSessionLocal, utcnow
+from app.models.outbox import OutboxMessage
+from app.websockets.manager import manager
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+_PENDING = "outbox_pending"
+
+
+def mark_pending(session: Session) -> None:
+    """Wake the dispatcher once the session's transaction commits."""
+    session.info[_PENDING] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _wake_dispatcher(session: Session) -> None:
+    if session.info.pop(_PENDING, False):
+        outbox_dispatcher.wake()
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_pending(session: Session) -> None:
+    session.info.pop(_PENDING, None)
+
+
+class OutboxDispatcher:
+    """Sends queued notification pushes in the background."""
+
+    def __init__(
+        self,
+        batch_size: int = settings.OUTBOX_BATCH_SIZE,
+        concurrency: int = settings.OUTBOX_CONCURRENCY,
+        max_attempts: int = settings.OUTBOX_MAX_ATTEMPTS,
+        send_timeout: float = settings.OUTBOX_SEND_TIMEOUT_SECONDS,
+        poll_interval: float = settings.OUTBOX_POLL_INTERVAL_SECONDS,
+    ):
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.max_attempts = max_attempts
+        self.send_timeout = send_timeout
+        self.poll_interval = poll_interval
+        self._wakeup = asyncio.Event()
+
+    def wake(self) -> None:
+        self._wakeup.set()
+
+    async def run(self) -> None:
+        while True:
+            try:
+                claimed = await self.dispatch_batch()
+            except Exception:
+                logger.exception("Outbox dispatch failed")
+                claimed = 0
+            if claimed < self.batch_size:
+                # Caught up: sleep until a commit wakes us or the poll interval
+                # passes (retries and rows from other workers)
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+
+    async def dispatch_batch(self) -> int:
+        """Claim, send and settle one batch; returns how many were claimed."""
+        async with AsyncSessionLocal() as db:
+            messages = await self._claim(db)
+        if not messages:
+            return 0
+
+        by_user = defaultdict(list)
+        for message in messages:
+            by_user[message.user_id].append(message)
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+        failed: List[int] = []
+
+        async def send_in_order(user_messages):
+            async with semaphore:
+                for i, message in enumerate(user_messages):
+                    try:
+                        await asyncio.wait_for(
+                            manager.send_notification(
+                                message.user_id,
+                                message.notification_id,
+                                message.message,
+                                message.unread_count,
+                            ),
+                            self.send_timeout,
+                        )
+                    except Exception:
+                        # Keep the rest queued so they are not delivered out of order
+                        failed.extend(m.id for m in user_messages[i:])
+                        return
+
+        await asyncio.gather(*(send_in_order(msgs) for msgs in by_user.values()))
+        await self._settle(messages, set(failed))
+        return len(messages)
+
+    async def _claim(self, db) -> list:
+        now = utcnow()
+        due = (
+            select(OutboxMessage.id)
+            .where(OutboxMessage.available_at <= now)
+            .order_by(OutboxMessage.id)
+            .limit(self.batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        result = await db.execute(
+            update(OutboxMessage)
+            .where(OutboxMessage.id.in_(due))
+            .values(
+                attempts=OutboxMessage.attempts + 1,
+                available_at=now + timedelta(seconds=self._lease_seconds()),
+            )
+            .returning(
+                OutboxMessage.id,
+                OutboxMessage.user_id,
+                OutboxMessage.notification_id,
+                OutboxMessage.message,
+                OutboxMessage.unread_count,
+                OutboxMessage.attempts,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        messages = sorted(result.all(), key=lambda m: m.id)
+        await db.commit()
+        return messages
+
+    async def _settle(self, messages: list, failed: set) -> None:
+        done = [m.id for m in messages if m.id not in failed]
+        retry = defaultdict(list)
+        for m in messages:
+            if m.id not in failed:
+                continue
+            if m.attempts >= self.max_attempts:
+                logger.warning(
+                    "Dropping outbox message %d after %d attempts", m.id, m.attempts
+                )
+                done.append(m.id)
+            else:
+                retry[m.attempts].append(m.id)
+
+        async with AsyncSessionLocal() as db:
+            if done:
+                await db.execute(
+                    delete(OutboxMessage).where(OutboxMessage.id.in_(done))
+                )
+            now = utcnow()
+            for attempts, ids in retry.items():
+                await db.execute(
+                    update(OutboxMessage)
+                    .where(OutboxMessage.id.in_(ids))
+                    .values(available_at=now + timedelta(seconds=2**attempts))
+                    .execution_options(synchronize_session=False)
+                )
+            await db.commit()
+
+    def _lease_seconds(self) -> float:
+        # Roughly how long a slow batch can take. A batch that overruns may be
+        # reclaimed and resent, so delivery is at-least-once.
+        return self.send_timeout * (self.batch_size // self.concurrency + 1)
+
+
+outbox_dispatcher = OutboxDispatcher()
@@ -0,0 +1,167 @@
+import logging
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Tuple
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+REDIS_KEY_PREFIX = "stackit:read_cache:"
+
+
+def post_key(post_id: int) -> str:
+    return f"post:{post_id}"
+
+
+def comments_key(post_id: int) -> str:
+    return f"comments:{post_id}"
+
+
+class MemoryCacheBackend:
+    """Per-worker LRU of rendered bodies, bounded by their total size."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._data: OrderedDict[str, Tuple[int, Dict[str, bytes]]] = OrderedDict()
+
+    async def get(self, key: str, version: int, variant: str) -> bytes | None:
+        entry = self._data.get(key)
+        if entry is None or entry[0] != version:
+            return None
+        self._data.move_to_end(key)
+        return entry[1].get(variant)
+
+    async def set(self, key: str, version: int, variant: str, body: bytes) -> None:
+        entry = self._data.get(key)
+        if entry is not None and entry[0] > version:
+            # A slow render of an older version finished after a newer one
+            return
+        if entry is None or entry[0] < version:
+            self._drop(key)
+            entry = self._data[key] = (version, {})
+        bodies = entry[1]
+        self.size += len(body) - len(bodies.get(variant, b""))
+        bodies[variant] = body
+        self._data.move_to_end(key)
+        while self.size > self.max_bytes:
+            self._drop(next(iter(self._data)))
+
+    async def delete(self, key: str) -> None:
+        self._drop(key)
+
+    async def close(self) -> None:
+        pass
+
+    async def stats(self) -> dict:
+        return {
+            "backend": "memory",
+            "resources": len(self._data),
+            "bytes": self.size,
+            "max_bytes": self.max_bytes,
+        }
+
+    def _drop(self, key: str) -> None:
+        entry = self._data.pop(key, None)
+        if entry is not None:
+            self.size -= sum(len(body) for body in entry[1].values())
+
+
+class RedisCacheBackend:
+    """Read cache shared through Redis; needs the "redis" extra."""
+
+    # Eviction is left to the server: set maxmemory-policy allkeys-lru
+    def __init__(self, url: str, ttl_seconds: int):
+        import redis.asyncio as redis
+
+        self.client = redis.from_url(url)
+        self.ttl_seconds = ttl_seconds
+
+    async def get(self, key: str, version: int, variant: str) -> bytes | None:
+        return await self.client.hget(REDIS_KEY_PREFIX + key, f"{version}:{variant}")
+
+    async def set(self, key: str, version: int, variant: str, body: bytes) -> None:
+        async with self.client.pipeline(transaction=False) as pipe:
+            pipe.hset(REDIS_KEY_PREFIX + key, f"{version}:{variant}", body)
+            pipe.expire(REDIS_KEY_PREFIX + key, self.ttl_seconds)
+            await pipe.execute()
+
+    async def delete(self, key: str) -> None:
+        await self.client.delete(REDIS_KEY_PREFIX + key)
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+    async def stats(self) -> dict:
+        memory = await self.client.info("memory")
+        return {
+            "backend": "redis",
+            "bytes": memory.get("used_memory"),
+            "max_bytes": memory.get("maxmemory"),
+        }
+
+
+class ReadCache:
+    """Rendered bodies of GET /posts/{id} and its comments, keyed by version."""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+
+    async def get_or_load(
+        self,
+        key: str,
+        version: int,
+        variant: str,
+        load: Callable[[], Awaitable[bytes]],
+    ) -> bytes:
+        try:
+            body = await self.backend.get(key, version, variant)
+        except Exception:
+            logger.exception("Read cache lookup failed for %s", key)
+            body = None
+        if body is not None:
+            self.hits += 1
+            return body
+
+        self.misses += 1
+        body = await load()
+        try:
+            await self.backend.set(key, version, variant, body)
+        except Exception:
+            logger.exception("Read cache store failed for %s", key)
+        return body
+
+    async def invalidate(self, *keys: str) -> None:
+        for key in keys:
+            try:
+                await self.backend.delete(key)
+            except Exception:
+                logger.exception("Read cache invalidation failed for %s", key)
+
+    async def close(self) -> None:
+        await self.backend.close()
+
+    async def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        try:
+            backend = await self.backend.stats()
+        except Exception:
+            logger.exception("Read cache stats failed")
+            backend = {}
+        return {
+            **backend,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+
+def create_cache_backend():
+    if settings.READ_CACHE_BACKEND == "redis":
+        return RedisCacheBackend(settings.REDIS_URL, settings.READ_CACHE_TTL_SECONDS)
+    return MemoryCacheBackend(settings.READ_CACHE_MAX_BYTES)
+
+
+read_cache = ReadCache(create_cache_backend())
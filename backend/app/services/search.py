@@ -0,0 +1,141 @@
+from typing import List, Tuple
+from sqlalchemy import (
+    Float,
+    Integer,
+    cast,
+    func,
+    literal_column,
+    select,
+    text,
+    tuple_,
+)
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.post import Post
+from app.models.tag import Tag
+from app.utils.loaders import post_schema_loaders
+from app.utils.pagination import PageParams, decode_cursor, encode_cursor
+
+SEARCH_CONFIG = "english"
+
+# Title matches outrank body matches, which outrank the accepted answer.
+_PG_VECTOR = f"""
+    setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(posts.title, '')), 'A') ||
+    setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(posts.body, '')), 'B') ||
+    setweight(to_tsvector('{SEARCH_CONFIG}', coalesce((
+        SELECT comments.body FROM comments
+        WHERE comments.post_id = posts.id AND comments.is_accepted
+        LIMIT 1
+    ), '')), 'C')
+"""
+
+_SQLITE_ROW = """
+    SELECT posts.id, posts.title, posts.body, (
+        SELECT comments.body FROM comments
+        WHERE comments.post_id = posts.id AND comments.is_accepted
+        LIMIT 1
+    )
+    FROM posts
+"""
+
+
+def _dialect(db: AsyncSession) -> str:
+    return db.get_bind().dialect.name
+
+
+def _fts5_query(q: str) -> str:
+    # Quote every term so user input can never be parsed as FTS5 syntax
+    terms = ['"' + term.replace('"', '""') + '"' for term in q.split()]
+    return " ".join(terms)
+
+
+class SearchService:
+    @staticmethod
+    async def index_post(db: AsyncSession, post_id: int) -> None:
+        """Refresh a post's search document inside the caller's transaction."""
+        await db.flush()
+        if _dialect(db) == "sqlite":
+            await db.execute(
+                text("DELETE FROM posts_fts WHERE rowid = :id"), {"id": post_id}
+            )
+            await db.execute(
+                text(
+                    "INSERT INTO posts_fts (rowid, title, body, answer)"
+                    f"{_SQLITE_ROW} WHERE posts.id = :id"
+                ),
+                {"id": post_id},
+            )
+        else:
+            await db.execute(
+                text(f"UPDATE posts SET search_vector = {_PG_VECTOR} WHERE id = :id"),
+                {"id": post_id},
+            )
+
+    @staticmethod
+    async def remove_post(db: AsyncSession, post_id: int) -> None:
+        """Drop a deleted post from the index (the tsvector goes with its row)."""
+        if _dialect(db) == "sqlite":
+            await db.execute(
+                text("DELETE FROM posts_fts WHERE rowid = :id"), {"id": post_id}
+            )
+
+    @staticmethod
+    async def reindex_all(db: AsyncSession) -> None:
+        """Rebuild every search document, e.g. after a bulk import."""
+        if _dialect(db) == "sqlite":
+            await db.execute(text("DELETE FROM posts_fts"))
+            await db.execute(
+                text(f"INSERT INTO posts_fts (rowid, title, body, answer){_SQLITE_ROW}")
+            )
+        else:
+            await db.execute(text(f"UPDATE posts SET search_vector = {_PG_VECTOR}"))
+        await db.commit()
+
+    @staticmethod
+    async def search(
+        db: AsyncSession, q: str, page: PageParams, tag_id: int | None = None
+    ) -> Tuple[List[Post], str | None]:
+        """Rank posts matching q, best first, paged on (score, id)."""
+        stmt = select(Post).options(*post_schema_loaders())
+
+        if _dialect(db) == "sqlite":
+            hits = (
+                text(
+                    "SELECT rowid AS post_id, -bm25(posts_fts, 10.0, 4.0, 1.0) "
+                    "AS score FROM posts_fts WHERE posts_fts MATCH :q"
+                )
+                .bindparams(q=_fts5_query(q))
+                .columns(post_id=Integer, score=Float)
+                .subquery("hits")
+            )
+            stmt = stmt.join(hits, hits.c.post_id == Post.id)
+            score = hits.c.score
+        else:
+            tsquery = func.websearch_to_tsquery(literal_column(f"'{SEARCH_CONFIG}'"), q)
+            stmt = stmt.where(Post.search_vector.op("@@")(tsquery))
+            # ts_rank_cd is a real; widened here so the score written to the
+            # cursor compares equal to the row's own when it comes back
+            score = cast(func.ts_rank_cd(Post.search_vector, tsquery), Float(53))
+
+        if tag_id is not None:
+            stmt = stmt.where(Post.tags.any(Tag.id == tag_id))
+
+        if page.cursor is not None:
+            last_score, last_id = decode_cursor(page.cursor, types=(float, int))
+            stmt = stmt.where(tuple_(score, Post.id) < tuple_(last_score, last_id))
+
+        result = await db.execute(
+            stmt.add_columns(score)
+            .order_by(score.desc(), Post.id.desc())
+            .limit(page.limit + 1)
+        )
+        rows = result.all()
+
+        next_cursor = None
+        if len(rows) > page.limit:
+            rows = rows[: page.limit]
+            last_post, last_score = rows[-1]
+            next_cursor = encode_cursor(last_score, last_post.id)
+        return [post for post, _ in rows], next_cursor
+
+
+search_service = SearchService()
@@ -0,0 +1,139 @@
+import asyncio
+import errno
+import os
+import re
+import shutil
+import tempfile
+import aiofiles.os
+from app.config import get_settings
+
+settings = get_settings()
+
+UPLOAD_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "uploads")
+# Uploads are written here while they stream in, out of reach of /uploads
+STAGING_DIR = os.path.join(os.path.dirname(UPLOAD_DIR), "upload-staging")
+
+# Keys name their content, so whatever is stored under one never changes
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+_CONTENT_KEY = re.compile(r"([0-9a-f]{2})/([0-9a-f]{2})/\1\2[0-9a-f]{60}\.[a-z]+")
+
+
+def content_key(digest: str, ext: str) -> str:
+    """ab/cd/abcd...ef.png: two levels of 256-way fan-out keep directories small."""
+    return f"{digest[:2]}/{digest[2:4]}/{digest}.{ext}"
+
+
+def is_content_key(key: str) -> bool:
+    """Whether key was made by content_key (and so names fixed content)."""
+    return _CONTENT_KEY.fullmatch(key) is not None
+
+
+class LocalStorage:
+    """Stores uploads under UPLOAD_DIR, which the app serves at /uploads."""
+
+    def __init__(self, root: str = UPLOAD_DIR, staging: str = STAGING_DIR):
+        self.root = root
+        self.staging = staging
+
+    def staging_dir(self) -> str:
+        return self.staging
+
+    async def put(self, path: str, key: str, content_type: str) -> bool:
+        """Move the file at path to key unless it holds that content; True if stored."""
+        destination = os.path.join(self.root, key)
+        if await aiofiles.os.path.exists(destination):
+            await aiofiles.os.remove(path)
+            return False
+        await aiofiles.os.makedirs(os.path.dirname(destination), exist_ok=True)
+        try:
+            await aiofiles.os.replace(path, destination)
+        except OSError as e:
+            if e.errno != errno.EXDEV:
+                raise
+            # UPLOAD_DIR is its own filesystem (e.g. a volume)
+            await asyncio.to_thread(_copy_into_place, path, destination)
+        return True
+
+    def url(self, key: str) -> str:
+        return f"/uploads/{key}"
+
+
+def _copy_into_place(path: str, destination: str) -> None:
+    # Copied beside the destination and renamed in, so a stored upload is
+    # always complete
+    fd, tmp_path = tempfile.mkstemp(
+        dir=os.path.dirname(destination), prefix=".upload-", suffix=".part"
+    )
+    os.close(fd)
+    try:
+        shutil.copyfile(path, tmp_path)
+        os.replace(tmp_path, destination)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    os.remove(path)
+
+
+class S3Storage:
+    """Stores uploads in an S3-compatible bucket; needs the "s3" extra."""
+
+    # boto3 is blocking, so calls run in a worker thread
+    def __init__(self):
+        import boto3
+
+        self.bucket = settings.S3_BUCKET
+        self.client = boto3.client(
+            "s3",
+            endpoint_url=settings.S3_ENDPOINT_URL,
+            region_name=settings.S3_REGION,
+            aws_access_key_id=settings.S3_ACCESS_KEY_ID,
+            aws_secret_access_key=settings.S3_SECRET_ACCESS_KEY,
+        )
+        self.public_url = settings.S3_PUBLIC_URL or (
+            f"{settings.S3_ENDPOINT_URL or 'https://s3.amazonaws.com'}/{self.bucket}"
+        )
+
+    def staging_dir(self) -> str:
+        return tempfile.gettempdir()
+
+    async def put(self, path: str, key: str, content_type: str) -> bool:
+        try:
+            if await asyncio.to_thread(self._exists, key):
+                return False
+            await asyncio.to_thread(
+                self.client.upload_file,
+                path,
+                self.bucket,
+                key,
+                ExtraArgs={
+                    "ContentType": content_type,
+                    "CacheControl": IMMUTABLE_CACHE_CONTROL,
+                },
+            )
+            return True
+        finally:
+            await aiofiles.os.remove(path)
+
+    def _exists(self, key: str) -> bool:
+        from botocore.exceptions import ClientError
+
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=key)
+        except ClientError as e:
+            if e.response["Error"]["Code"] in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+        return True
+
+    def url(self, key: str) -> str:
+        return f"{self.public_url.rstrip('/')}/{key}"
+
+
+def create_storage():
+    if settings.STORAGE_BACKEND == "s3":
+        return S3Storage()
+    return LocalStorage()
+
+
+storage = create_storage()
@@ -0,0 +1,47 @@
+from typing import Iterable, List, Tuple
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.tag import Tag, post_tags
+from app.services.broadcast import BroadcastDirectory
+from app.utils.prefix_index import PrefixIndex
+
+CHANNEL = "stackit_tag_directory"
+
+
+class TagDirectory(BroadcastDirectory):
+    """Tag title index, ranked by how many posts use each tag."""
+
+    def __init__(self):
+        super().__init__(CHANNEL)
+        self.index = PrefixIndex()
+
+    async def refresh(self, db: AsyncSession) -> None:
+        """Rebuild the index from the tags table and post_tags counts."""
+        rows = await db.execute(
+            select(Tag.id, Tag.title, func.count(post_tags.c.post_id))
+            .outerjoin(post_tags, post_tags.c.tag_id == Tag.id)
+            .group_by(Tag.id, Tag.title)
+        )
+        self.index.replace((id, title, uses) for id, title, uses in rows if title)
+
+    def search(self, prefix: str, limit: int) -> List[Tuple[int, str, int]]:
+        """(id, title, post count) of the most used tags starting with prefix."""
+        return self.index.search(prefix, limit)
+
+    def adjust_usage(self, tag_ids: Iterable[int], delta: int) -> None:
+        # Only adjusts locally; the next refresh recounts post_tags
+        for tag_id in tag_ids:
+            self.index.adjust(tag_id, delta)
+
+    async def publish(self, tag_id: int, title: str | None) -> None:
+        """Record a committed change to a tag's title (None once deleted)."""
+        await self.broadcast(tag_id, {"title": title})
+
+    async def _apply(self, tag_id: int, data: dict) -> None:
+        if data["title"] is None:
+            self.index.remove(tag_id)
+        else:
+            self.index.set(tag_id, data["title"])
+
+
+tag_directory = TagDirectory()
@@ -0,0 +1,76 @@
+from typing import Dict, Iterable, List, Set, Tuple
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.user import User
+from app.services.broadcast import BroadcastDirectory
+from app.utils.prefix_index import PrefixIndex
+
+CHANNEL = "stackit_user_directory"
+
+
+class UserDirectory(BroadcastDirectory):
+    """Username -> id map for @mentions, and a karma-ranked username index."""
+
+    def __init__(self):
+        super().__init__(CHANNEL)
+        self._ids: Dict[str, int] = {}
+        self._usernames: Dict[int, str] = {}
+        self.index = PrefixIndex()
+        self.hits = 0
+        self.misses = 0
+
+    async def refresh(self, db: AsyncSession) -> None:
+        """Replace the whole directory with the current users table."""
+        rows = (await db.execute(select(User.id, User.username, User.karma))).all()
+        rows = [row for row in rows if row.username]
+        self._ids = {username: user_id for user_id, username, _ in rows}
+        self._usernames = {user_id: username for username, user_id in self._ids.items()}
+        self.index.replace((id, username, karma or 0) for id, username, karma in rows)
+
+    def resolve(self, usernames: Iterable[str]) -> Set[int]:
+        """Ids of the users with these usernames; unknown names are skipped."""
+        user_ids = set()
+        for username in usernames:
+            user_id = self._ids.get(username)
+            if user_id is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                user_ids.add(user_id)
+        return user_ids
+
+    def search(self, prefix: str, limit: int) -> List[Tuple[int, str, int]]:
+        """(id, username, karma) of the top users whose name starts with prefix."""
+        return self.index.search(prefix, limit)
+
+    def adjust_karma(self, user_id: int, points: int) -> None:
+        # Only reorders locally; the next refresh re-reads karma
+        self.index.adjust(user_id, points)
+
+    async def publish(self, user_id: int, username: str | None) -> None:
+        """Record a committed change to a user's username (None once deleted)."""
+        await self.broadcast(user_id, {"username": username})
+
+    async def _apply(self, user_id: int, data: dict) -> None:
+        old = self._usernames.pop(user_id, None)
+        if old is not None and self._ids.get(old) == user_id:
+            del self._ids[old]
+        username = data["username"]
+        if username is None:
+            self.index.remove(user_id)
+        else:
+            self._ids[username] = user_id
+            self._usernames[user_id] = username
+            self.index.set(user_id, username)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._ids),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+
+user_directory = UserDirectory()
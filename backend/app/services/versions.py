@@ -0,0 +1,72 @@
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.comment import Comment
+from app.models.post import Post
+from app.models.tag import post_tags
+from app.models.version import ResourceVersion
+
+POSTS = "posts"
+TAGS = "tags"
+
+
+def _increment(column, *where):
+    return (
+        update(column.class_)
+        .where(*where)
+        .values({column: column + 1})
+        .execution_options(synchronize_session=False)
+    )
+
+
+class VersionService:
+    """Version counters behind the ETags of the read endpoints."""
+
+    # Bumps go in the writer's transaction just before commit, so a version is
+    # never visible without its data and shared rows stay locked briefly
+    @staticmethod
+    async def post_version(db: AsyncSession, post_id: int) -> int | None:
+        return await db.scalar(select(Post.version).where(Post.id == post_id))
+
+    @staticmethod
+    async def comments_version(db: AsyncSession, post_id: int) -> int | None:
+        return await db.scalar(select(Post.comments_version).where(Post.id == post_id))
+
+    @staticmethod
+    async def collection_version(db: AsyncSession, name: str) -> int:
+        return await db.scalar(
+            select(ResourceVersion.version).where(ResourceVersion.name == name)
+        )
+
+    @staticmethod
+    async def post_changed(db: AsyncSession, post_id: int) -> None:
+        await db.execute(_increment(Post.version, Post.id == post_id))
+        await VersionService.collection_changed(db, POSTS)
+
+    @staticmethod
+    async def comments_changed(db: AsyncSession, post_id: int) -> None:
+        await db.execute(_increment(Post.comments_version, Post.id == post_id))
+
+    @staticmethod
+    async def tag_changed(db: AsyncSession, tag_id: int) -> None:
+        """A tag was renamed or is about to be deleted."""
+        tagged = select(post_tags.c.post_id).where(post_tags.c.tag_id == tag_id)
+        await db.execute(_increment(Post.version, Post.id.in_(tagged)))
+        await VersionService.collection_changed(db, POSTS)
+        await VersionService.collection_changed(db, TAGS)
+
+    @staticmethod
+    async def user_changed(db: AsyncSession, user_id: int) -> None:
+        """A user's public profile (name, username, role) changed."""
+        await db.execute(_increment(Post.version, Post.user_id == user_id))
+        commented = select(Comment.post_id).where(Comment.user_id == user_id)
+        await db.execute(_increment(Post.comments_version, Post.id.in_(commented)))
+        await VersionService.collection_changed(db, POSTS)
+
+    @staticmethod
+    async def collection_changed(db: AsyncSession, name: str) -> None:
+        await db.execute(
+            _increment(ResourceVersion.version, ResourceVersion.name == name)
+        )
+
+
+version_service = VersionService()
@@ -0,0 +1,73 @@
+from sqlalchemy import delete, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.attributes import set_committed_value
+from app.models.comment import Comment
+from app.models.vote import CommentVote, VoteType
+from app.services.karma import karma_service
+
+
+def _insert_ignoring_duplicates(db: AsyncSession, **values):
+    dialect = postgresql if db.get_bind().dialect.name == "postgresql" else sqlite
+    return (
+        dialect.insert(CommentVote)
+        .values(**values)
+        .on_conflict_do_nothing(index_elements=["user_id", "comment_id"])
+        .returning(CommentVote.id)
+    )
+
+
+class VoteService:
+    @staticmethod
+    async def cast_vote(
+        db: AsyncSession, comment: Comment, user_id: int, vote_type: VoteType
+    ) -> None:
+        """Toggle a user's vote on a comment inside the caller's transaction."""
+        sign = 1 if vote_type == VoteType.UPVOTE else -1
+        key = (CommentVote.user_id == user_id, CommentVote.comment_id == comment.id)
+
+        inserted = await db.scalar(
+            _insert_ignoring_duplicates(
+                db, user_id=user_id, comment_id=comment.id, vote_type=vote_type.value
+            )
+        )
+        if inserted is not None:
+            score_delta, upvote, weight = sign, sign > 0, 1
+        else:
+            switched = await db.scalar(
+                update(CommentVote)
+                .where(*key, CommentVote.vote_type != vote_type.value)
+                .values(vote_type=vote_type.value)
+                .returning(CommentVote.id)
+                .execution_options(synchronize_session=False)
+            )
+            if switched is not None:
+                # -1 -> +1 (or back) moves the score by two
+                score_delta, upvote, weight = 2 * sign, sign > 0, 2
+            else:
+                removed = await db.scalar(
+                    delete(CommentVote)
+                    .where(*key, CommentVote.vote_type == vote_type.value)
+                    .returning(CommentVote.id)
+                    .execution_options(synchronize_session=False)
+                )
+                if removed is None:
+                    # A concurrent click already undid this vote
+                    return
+                score_delta, upvote, weight = -sign, sign < 0, 1
+
+        score = await db.scalar(
+            update(Comment)
+            .where(Comment.id == comment.id)
+            .values(score=Comment.score + score_delta)
+            .returning(Comment.score)
+            .execution_options(synchronize_session=False)
+        )
+        set_committed_value(comment, "score", score)
+
+        await karma_service.handle_comment_vote(
+            db, comment.user_id, upvote, comment.id, weight=weight
+        )
+
+
+vote_service = VoteService()
@@ -1,20 +1,51 @@
-from datetime import datetime, timedelta
+from collections import Counter
+from datetime import datetime, timedelta, timezone
 from typing import Annotated
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from passlib.context import CryptContext
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
 from app.database import get_db
 from app.models.user import User
 from app.schemas.auth import TokenData
 from app.config import get_settings
+from app.services.broadcast import Broadcaster
+from app.utils.cache import TTLCache
 
 settings = get_settings()
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
 
+CHANNEL = "stackit_principals"
+
+# Token subject (username) -> detached, read-only User snapshot. Entries are
+# dropped on every worker whenever a user's identity or role changes; the TTL
+# bounds staleness of everything else (e.g. karma).
+principal_cache = TTLCache(
+    maxsize=settings.PRINCIPAL_CACHE_SIZE, ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS
+)
+# Invalidations seen per username, so a fill that read the row before one
+# arrived knows not to store what it read
+_invalidations: Counter = Counter()
+
+
+class PrincipalInvalidations(Broadcaster):
+    """Drops a user's cached principal on every worker."""
+
+    def __init__(self):
+        super().__init__(CHANNEL)
+
+    async def _apply(self, user_id: int, data: dict) -> None:
+        _invalidations[data["username"]] += 1
+        principal_cache.delete(data["username"])
+
+
+principal_invalidations = PrincipalInvalidations()
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
@@ -24,8 +55,10 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
-def authenticate_user(db: Session, username: str, password: str) -> User | None:
-    user = db.query(User).filter(User.username == username).first()
+async def authenticate_user(
+    db: AsyncSession, username: str, password: str
+) -> User | None:
+    user = await db.scalar(select(User).where(User.username == username))
     if not user:
         return None
     if not verify_password(password, str(user.hashed_password)):
@@ -36,9 +69,9 @@ def authenticate_user(db: Session, username: str, password: str) -> User | None:
 def create_access_token(data: dict, expires_delta: timedelta | None = None) -> str:
     to_encode = data.copy()
     if expires_delta:
-        expire = datetime.utcnow() + expires_delta
+        expire = datetime.now(timezone.utc) + expires_delta
     else:
-        expire = datetime.utcnow() + timedelta(
+        expire = datetime.now(timezone.utc) + timedelta(
             minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES
         )
     to_encode.update({"exp": expire})
@@ -48,9 +81,35 @@ def create_access_token(data: dict, expires_delta: timedelta | None = None) -> s
     return encoded_jwt
 
 
+def _snapshot(user: User) -> User:
+    values = {column.key: getattr(user, column.key) for column in User.__table__.c}
+    snapshot = User(**values)
+    make_transient_to_detached(snapshot)
+    return snapshot
+
+
+async def get_principal(db: AsyncSession, username: str) -> User | None:
+    """Resolve a token subject to a detached, cached User snapshot."""
+    principal = principal_cache.get(username)
+    if principal is None:
+        generation = _invalidations[username]
+        user = await db.scalar(select(User).where(User.username == username))
+        if user is None:
+            return None
+        principal = _snapshot(user)
+        if _invalidations[username] == generation:
+            principal_cache.set(username, principal)
+    return principal
+
+
+async def invalidate_principal(user_id: int, username: str) -> None:
+    """Drop a user's cached principal after a committed change."""
+    await principal_invalidations.broadcast(user_id, {"username": username})
+
+
 async def get_current_user(
     token: Annotated[str, Depends(oauth2_scheme)],
-    db: Annotated[Session, Depends(get_db)],
+    db: Annotated[AsyncSession, Depends(get_db)],
 ) -> User:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -67,7 +126,7 @@ async def get_current_user(
         token_data = TokenData(username=username)
     except JWTError:
         raise credentials_exception
-    user = db.query(User).filter(User.username == token_data.username).first()
+    user = await get_principal(db, token_data.username)
     if user is None:
         raise credentials_exception
     return user
@@ -82,7 +141,7 @@ async def is_admin(current_user: Annotated[User, Depends(get_current_user)]) ->
     return True
 
 
-async def get_user_from_token(token: str, db: Session) -> User | None:
+async def get_user_from_token(token: str, db: AsyncSession) -> User | None:
     try:
         payload = jwt.decode(
             token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
@@ -94,5 +153,4 @@ async def get_user_from_token(token: str, db: Session) -> User | None:
     except JWTError:
         return None
 
-    user = db.query(User).filter(User.username == token_data.username).first()
-    return user
+    return await get_principal(db, token_data.username)
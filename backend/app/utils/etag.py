@@ -0,0 +1,26 @@
+from fastapi import Request, Response
+
+# Browsers may store these but must ask again before each use, which they
+# do with If-None-Match
+CACHE_CONTROL = "no-cache"
+
+
+def weak_etag(*parts: object) -> str:
+    return 'W/"%s"' % ".".join(str(part) for part in parts)
+
+
+def etag_headers(etag: str) -> dict:
+    return {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+
+
+def not_modified(request: Request, response: Response, etag: str) -> Response | None:
+    """Tag the response with etag; return a 304 if If-None-Match already names it."""
+    response.headers.update(etag_headers(etag))
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is None:
+        return None
+    # If-None-Match uses weak comparison: W/ prefixes are ignored
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    if "*" in tags or etag.removeprefix("W/") in tags:
+        return Response(status_code=304, headers=etag_headers(etag))
+    return None
@@ -0,0 +1,63 @@
+import os
+import tempfile
+from typing import List, Tuple
+from PIL import ExifTags, Image, ImageOps
+
+# Larger images are served as uploaded rather than decoded: a 5 MB PNG can
+# still expand to gigabytes of pixels
+MAX_PIXELS = 50_000_000
+
+# EXIF orientations that turn the stored image a quarter turn
+_QUARTER_TURNS = {5, 6, 7, 8}
+
+
+def image_width(source: str) -> int | None:
+    """Width of source as displayed (after EXIF rotation), or None if unreadable."""
+    try:
+        with Image.open(source) as image:
+            width, height = image.size
+            if image.getexif().get(ExifTags.Base.Orientation) in _QUARTER_TURNS:
+                return height
+            return width
+    except (OSError, ValueError, Image.DecompressionBombError):
+        return None
+
+
+def render_variants(
+    source: str, targets: List[Tuple[int, str]], quality: int
+) -> List[str]:
+    """Write source as WebP at each (width, destination) it covers; paths written."""
+    with Image.open(source) as image:
+        if getattr(image, "is_animated", False):
+            return []
+        if image.width * image.height > MAX_PIXELS:
+            return []
+        image = ImageOps.exif_transpose(image)
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if image.has_transparency_data else "RGB")
+        written = []
+        for width, destination in sorted(targets, reverse=True):
+            # Saved under a wider width, the srcset would claim pixels the
+            # upload does not have
+            if width > image.width:
+                continue
+            image.thumbnail((width, image.height), Image.Resampling.LANCZOS)
+            _save_webp(image, destination, quality)
+            written.append(destination)
+    return written
+
+
+def _save_webp(image: Image.Image, destination: str, quality: int) -> None:
+    # Written beside the destination and renamed in, so a variant that
+    # exists is always complete
+    os.makedirs(os.path.dirname(destination), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(
+        dir=os.path.dirname(destination), prefix=".variant-", suffix=".part"
+    )
+    try:
+        with os.fdopen(fd, "wb") as out_file:
+            image.save(out_file, "WEBP", quality=quality)
+        os.replace(tmp_path, destination)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
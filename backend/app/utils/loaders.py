@@ -0,0 +1,22 @@
+from sqlalchemy.orm import joinedload, selectinload
+from app.models.comment import Comment
+from app.models.post import Post
+
+# Loader profiles matching the relationships each response schema serializes.
+# Many-to-one relationships are joined into the main SELECT; collections are
+# fetched with one extra IN query per page so LIMIT still applies to rows.
+# They are built per call because mappers are only configured once every
+# model (and app.models.relationships) has been imported.
+
+
+def post_schema_loaders():
+    """Options for app.schemas.post.Post: user and tags."""
+    return (
+        joinedload(Post.user, innerjoin=True),
+        selectinload(Post.tags),
+    )
+
+
+def comment_schema_loaders():
+    """Options for app.schemas.comment.Comment: user."""
+    return (joinedload(Comment.user, innerjoin=True),)
@@ -1,7 +1,6 @@
 import re
-from typing import List
-from sqlalchemy.orm import Session
-from app.models.user import User
+from typing import List, Set
+from app.services.user_directory import user_directory
 
 
 def extract_mentions(text: str) -> List[str]:
@@ -9,9 +8,6 @@ def extract_mentions(text: str) -> List[str]:
     return list(set(re.findall(mention_pattern, text)))
 
 
-def get_mentioned_users(db: Session, text: str) -> List[User]:
-    usernames = extract_mentions(text)
-    if not usernames:
-        return []
-
-    return db.query(User).filter(User.username.in_(usernames)).all()
+def get_mentioned_user_ids(text: str) -> Set[int]:
+    """Resolve @mentions through the in-process user directory (no query)."""
+    return user_directory.resolve(extract_mentions(text))
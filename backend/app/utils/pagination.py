@@ -0,0 +1,73 @@
+import base64
+import binascii
+import json
+import math
+from typing import Any, List, Tuple
+from fastapi import HTTPException, Query, status
+from sqlalchemy import Select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+class PageParams:
+    """Query parameters shared by every cursor-paginated list endpoint."""
+
+    def __init__(
+        self,
+        cursor: str | None = Query(None, description="Opaque cursor from next_cursor"),
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    ):
+        self.cursor = cursor
+        self.limit = limit
+
+
+def encode_cursor(*values: Any) -> str:
+    raw = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def _is_key_value(value: Any, expected: type) -> bool:
+    # bool is an int subclass, and JSON writes a whole float without a fraction
+    if isinstance(value, bool):
+        return False
+    if expected is float:
+        return isinstance(value, (int, float)) and math.isfinite(value)
+    return isinstance(value, expected)
+
+
+def decode_cursor(cursor: str, types: Tuple[type, ...] = (int,)) -> List[Any]:
+    """Return the key values stored in a cursor, rejecting anything malformed."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded))
+    except (binascii.Error, ValueError, UnicodeDecodeError):
+        values = None
+    if (
+        not isinstance(values, list)
+        or len(values) != len(types)
+        or not all(map(_is_key_value, values, types))
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+        )
+    return [expected(value) for value, expected in zip(values, types)]
+
+
+async def paginate(
+    db: AsyncSession, stmt: Select, key, params: PageParams, descending: bool = False
+) -> Tuple[List[Any], str | None]:
+    """Keyset-paginate a select() on a unique, indexed column."""
+    if params.cursor is not None:
+        (last,) = decode_cursor(params.cursor)
+        stmt = stmt.where(key < last if descending else key > last)
+
+    stmt = stmt.order_by(key.desc() if descending else key.asc())
+    rows = (await db.scalars(stmt.limit(params.limit + 1))).all()
+
+    next_cursor = None
+    if len(rows) > params.limit:
+        rows = rows[: params.limit]
+        next_cursor = encode_cursor(getattr(rows[-1], key.key))
+    return rows, next_cursor
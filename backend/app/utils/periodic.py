@@ -0,0 +1,22 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import AsyncSessionLocal
+
+logger = logging.getLogger(__name__)
+
+
+async def run_every(
+    interval_seconds: float,
+    job: Callable[[AsyncSession], Awaitable[object]],
+    description: str,
+) -> None:
+    """Run job with a fresh session every interval_seconds, logging failures."""
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            async with AsyncSessionLocal() as db:
+                await job(db)
+        except Exception:
+            logger.exception("%s failed", description)
@@ -0,0 +1,100 @@
+import heapq
+from bisect import bisect_left, insort
+from typing import Dict, Iterable, List, Tuple
+
+# Below this many matches a fresh scan is cheaper than remembering the answer
+_MEMO_MIN_MATCHES = 256
+
+
+class PrefixIndex:
+    """Case-insensitive prefix lookup over (id, name, weight) entries."""
+
+    def __init__(self):
+        self._keys: List[Tuple[str, int]] = []
+        self._entries: Dict[int, Tuple[str, int]] = {}
+        # prefix -> limit -> answer, for prefixes with many matches
+        self._memo: Dict[str, Dict[int, List[Tuple[int, str, int]]]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def replace(self, entries: Iterable[Tuple[int, str, int]]) -> None:
+        """Rebuild the index from (id, name, weight) rows."""
+        self._memo.clear()
+        self._entries = {id: (name, weight) for id, name, weight in entries}
+        self._keys = sorted(
+            (name.casefold(), id) for id, (name, _) in self._entries.items()
+        )
+
+    def set(self, id: int, name: str, weight: int | None = None) -> None:
+        """Add or rename an entry; its weight is kept unless one is given."""
+        old = self._entries.get(id)
+        if old is not None:
+            self._forget(old[0].casefold())
+            self._keys.pop(bisect_left(self._keys, (old[0].casefold(), id)))
+            if weight is None:
+                weight = old[1]
+        self._entries[id] = (name, weight or 0)
+        self._forget(name.casefold())
+        insort(self._keys, (name.casefold(), id))
+
+    def remove(self, id: int) -> None:
+        old = self._entries.pop(id, None)
+        if old is not None:
+            self._forget(old[0].casefold())
+            self._keys.pop(bisect_left(self._keys, (old[0].casefold(), id)))
+
+    def adjust(self, id: int, delta: int) -> None:
+        entry = self._entries.get(id)
+        if entry is None or not delta:
+            return
+        self._entries[id] = (entry[0], entry[1] + delta)
+        key = entry[0].casefold()
+        rank = self._rank(id)
+        for end in range(len(key) + 1):
+            answers = self._memo.get(key[:end])
+            if answers is None:
+                continue
+            for limit, best in list(answers.items()):
+                ids = [best_id for best_id, _, _ in best]
+                if id in ids and delta > 0:
+                    # Moved up but still in: only the order within it changes
+                    answers[limit] = sorted(
+                        ((best_id, *self._entries[best_id]) for best_id in ids),
+                        key=lambda best: self._rank(best[0]),
+                    )
+                elif id in ids or len(best) < limit or rank < self._rank(ids[-1]):
+                    # Moved down, or may now make the cut: search again
+                    del answers[limit]
+            if not answers:
+                del self._memo[key[:end]]
+
+    def _rank(self, id: int) -> Tuple[int, int, str, int]:
+        name, weight = self._entries[id]
+        key = name.casefold()
+        return (-weight, len(key), key, id)
+
+    def _forget(self, key: str) -> None:
+        """Drop the memoized answers for every prefix of key."""
+        for end in range(len(key) + 1):
+            self._memo.pop(key[:end], None)
+
+    def search(self, prefix: str, limit: int) -> List[Tuple[int, str, int]]:
+        """Best limit entries starting with prefix: by weight, then shortest, then A-Z."""
+        prefix = prefix.casefold()
+        memoized = self._memo.get(prefix, {}).get(limit)
+        if memoized is not None:
+            return memoized
+        start = bisect_left(self._keys, (prefix,))
+        # "\U0010ffff" sorts after every character a name can continue with
+        end = bisect_left(self._keys, (prefix + "\U0010ffff",), lo=start)
+        matches = [
+            (-self._entries[id][1], len(key), key, id)
+            for key, id in self._keys[start:end]
+        ]
+        best = [
+            (id, *self._entries[id]) for _, _, _, id in heapq.nsmallest(limit, matches)
+        ]
+        if len(matches) > _MEMO_MIN_MATCHES:
+            self._memo.setdefault(prefix, {})[limit] = best
+        return best
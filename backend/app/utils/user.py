@@ -1,6 +1,7 @@
-from typing import Annotated
+from typing import Annotated, Iterable
 from fastapi import Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.database import get_db
 from app.models.user import User
 from app.utils.auth import get_current_user
@@ -25,8 +26,20 @@ def check_user_permission(user_id: int, current_user: User):
         )
 
 
-async def get_user_by_id(user_id: int, db: Session) -> User:
-    user = db.query(User).filter(User.id == user_id).first()
+async def lock_users(db: AsyncSession, user_ids: Iterable[int]) -> None:
+    """Lock users rows in id order, ahead of writes that touch several of them."""
+    await db.execute(
+        select(User.id)
+        .where(User.id.in_(sorted(set(user_ids))))
+        .order_by(User.id)
+        # NO KEY UPDATE, like the UPDATEs it precedes: FOR UPDATE would also
+        # wait on the key-share locks that inserts referencing users take
+        .with_for_update(key_share=True)
+    )
+
+
+async def get_user_by_id(user_id: int, db: AsyncSession) -> User:
+    user = await db.get(User, user_id)
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -35,28 +48,28 @@ async def get_user_by_id(user_id: int, db: Session) -> User:
     return user
 
 
-def check_email_username_exists(
-    db: Session,
+async def check_email_username_exists(
+    db: AsyncSession,
     email: str | None = None,
     username: str | None = None,
     exclude_user_id: int | None = None,
 ) -> None:
-    query = db.query(User)
+    query = select(User.id)
     if email:
-        email_query = query.filter(User.email == email)
+        email_query = query.where(User.email == email)
         if exclude_user_id:
-            email_query = email_query.filter(User.id != exclude_user_id)
-        if email_query.first():
+            email_query = email_query.where(User.id != exclude_user_id)
+        if await db.scalar(email_query):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Email already registered",
             )
 
     if username:
-        username_query = query.filter(User.username == username)
+        username_query = query.where(User.username == username)
         if exclude_user_id:
-            username_query = username_query.filter(User.id != exclude_user_id)
-        if username_query.first():
+            username_query = username_query.where(User.id != exclude_user_id)
+        if await db.scalar(username_query):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Username already taken",
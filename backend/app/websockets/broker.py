@@ -0,0 +1,88 @@
+import asyncio
+import json
+import logging
+from typing import Awaitable, Callable
+import psycopg
+from sqlalchemy.engine import make_url
+from app.config import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+CHANNEL = "stackit_notifications"
+
+Deliver = Callable[[int, dict], Awaitable[None]]
+
+
+class InProcessBroker:
+    """Stand-in for a single worker (and SQLite): publish delivers directly."""
+
+    def __init__(self, deliver: Deliver):
+        self.deliver = deliver
+
+    async def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
+
+    async def publish(self, user_id: int, data: dict) -> None:
+        await self.deliver(user_id, data)
+
+
+class PostgresBroker:
+    """Fans pushes out to every worker through LISTEN/NOTIFY."""
+
+    def __init__(self, dsn: str, deliver: Deliver, channel: str = CHANNEL):
+        self.dsn = dsn
+        self.deliver = deliver
+        self.channel = channel
+        self._publisher = None
+        self._publish_lock = asyncio.Lock()
+        self._listener = None
+
+    async def start(self) -> None:
+        self._listener = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+        if self._publisher is not None:
+            await self._publisher.close()
+
+    async def publish(self, user_id: int, data: dict) -> None:
+        payload = json.dumps({"user_id": user_id, "data": data})
+        async with self._publish_lock:
+            if self._publisher is None or self._publisher.closed:
+                self._publisher = await psycopg.AsyncConnection.connect(
+                    self.dsn, autocommit=True
+                )
+            await self._publisher.execute(
+                "SELECT pg_notify(%s, %s)", (self.channel, payload)
+            )
+
+    async def _listen(self) -> None:
+        while True:
+            try:
+                async with await psycopg.AsyncConnection.connect(
+                    self.dsn, autocommit=True
+                ) as conn:
+                    await conn.execute(f"LISTEN {self.channel}")
+                    async for notify in conn.notifies():
+                        event = json.loads(notify.payload)
+                        await self.deliver(event["user_id"], event["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception(
+                    "Listener on %s disconnected, reconnecting", self.channel
+                )
+                await asyncio.sleep(1)
+
+
+def create_broker(deliver: Deliver, channel: str = CHANNEL):
+    url = make_url(settings.DATABASE_URL)
+    if url.get_backend_name() == "postgresql":
+        dsn = url.set(drivername="postgresql").render_as_string(hide_password=False)
+        return PostgresBroker(dsn, deliver, channel)
+    return InProcessBroker(deliver)
@@ -1,24 +1,160 @@
-from fastapi import WebSocket
-from typing import Dict
+import asyncio
+import time
+from collections import deque
+from fastapi import WebSocket, status
+from typing import Dict, Set
+from app.config import get_settings
+from app.websockets.broker import create_broker
+
+settings = get_settings()
+
+
+class ClientConnection:
+    """One open socket with its own bounded outbound queue and writer task."""
+
+    def __init__(
+        self, websocket: WebSocket, user_id: int, manager: "ConnectionManager"
+    ):
+        self.websocket = websocket
+        self.user_id = user_id
+        self.manager = manager
+        self.messages = deque(maxlen=settings.WS_SEND_QUEUE_SIZE)
+        self.unread_count = None
+        self.replayed = deque()
+        self._replayed_messages = set()
+        self.last_seen = time.monotonic()
+        self._ready = asyncio.Event()
+        self._writer = None
+
+    def start(self) -> None:
+        self._writer = asyncio.create_task(self._run())
+
+    def stop(self) -> None:
+        if self._writer is not None:
+            self._writer.cancel()
+
+    def touch(self) -> None:
+        """Record that the client is alive (any frame counts as a pong)."""
+        self.last_seen = time.monotonic()
+
+    def enqueue(self, notification_id: int, message: str, unread_count: int) -> None:
+        self.messages.append((notification_id, message))
+        self.unread_count = unread_count
+        self._ready.set()
+
+    def replay(self, notifications: list, unread_count: int) -> None:
+        self.replayed.extend((n.id, n.message) for n in notifications)
+        self._replayed_messages.update((n.id, n.message) for n in notifications)
+        if self.unread_count is None:
+            self.unread_count = unread_count
+
+    def _next_message(self):
+        if self.replayed:
+            return self.replayed.popleft()
+        while self.messages:
+            pending = self.messages.popleft()
+            # Skip live copies of replayed rows; a growing digest keeps its id
+            if pending not in self._replayed_messages:
+                return pending
+        return None
+
+    async def _send(self, data: dict) -> None:
+        await asyncio.wait_for(
+            self.websocket.send_json(data), settings.WS_SEND_TIMEOUT_SECONDS
+        )
+
+    async def _run(self) -> None:
+        interval = settings.WS_HEARTBEAT_INTERVAL_SECONDS
+        next_ping = time.monotonic() + interval
+        try:
+            while True:
+                if not self.messages and not self.replayed:
+                    try:
+                        await asyncio.wait_for(
+                            self._ready.wait(), max(next_ping - time.monotonic(), 0)
+                        )
+                    except asyncio.TimeoutError:
+                        pass
+                    self._ready.clear()
+
+                # One message per pass so a busy socket still gets heartbeats
+                pending = self._next_message()
+                if pending is not None:
+                    notification_id, message = pending
+                    await self._send(
+                        {
+                            "id": notification_id,
+                            "msg": message,
+                            "unread_count": self.unread_count,
+                        }
+                    )
+
+                now = time.monotonic()
+                if now >= next_ping:
+                    if now - self.last_seen > settings.WS_HEARTBEAT_TIMEOUT_SECONDS:
+                        break
+                    await self._send({"type": "ping"})
+                    next_ping = now + interval
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # Send timed out or the socket is already gone
+            pass
+
+        self.manager.remove(self)
+        try:
+            await asyncio.wait_for(
+                self.websocket.close(code=status.WS_1001_GOING_AWAY),
+                settings.WS_SEND_TIMEOUT_SECONDS,
+            )
+        except Exception:
+            pass
 
 
 class ConnectionManager:
     def __init__(self):
-        self.active_connections: Dict[int, WebSocket] = {}
+        # A user may have several tabs or devices open at once
+        self.active_connections: Dict[int, Set[ClientConnection]] = {}
+        self.broker = create_broker(self._deliver_local)
 
-    async def connect(self, websocket: WebSocket, user_id: int):
+    async def start(self):
+        await self.broker.start()
+
+    async def stop(self):
+        await self.broker.stop()
+
+    async def connect(self, websocket: WebSocket, user_id: int) -> ClientConnection:
+        """Accept and register; live events queue up until connection.start()."""
         await websocket.accept()
-        self.active_connections[user_id] = websocket
+        connection = ClientConnection(websocket, user_id, self)
+        self.active_connections.setdefault(user_id, set()).add(connection)
+        return connection
 
-    def disconnect(self, user_id: int):
-        if user_id in self.active_connections:
-            del self.active_connections[user_id]
+    def disconnect(self, connection: ClientConnection):
+        self.remove(connection)
+        connection.stop()
 
-    async def send_notification(self, user_id: int, message: str, unread_count: int):
-        if user_id in self.active_connections:
-            await self.active_connections[user_id].send_json(
-                {"msg": message, "unread_count": unread_count}
-            )
+    def remove(self, connection: ClientConnection):
+        connections = self.active_connections.get(connection.user_id)
+        if connections is None:
+            return
+        connections.discard(connection)
+        if not connections:
+            del self.active_connections[connection.user_id]
+
+    async def send_notification(
+        self, user_id: int, notification_id: int, message: str, unread_count: int
+    ):
+        # Goes through the broker so the user's sockets on every worker get it
+        await self.broker.publish(
+            user_id,
+            {"id": notification_id, "msg": message, "unread_count": unread_count},
+        )
+
+    async def _deliver_local(self, user_id: int, data: dict):
+        # Only queues: the per-connection writers do the actual sending
+        for connection in self.active_connections.get(user_id, ()):
+            connection.enqueue(data["id"], data["msg"], data["unread_count"])
 
 
 manager = ConnectionManager()
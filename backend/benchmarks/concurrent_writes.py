@@ -0,0 +1,85 @@
+"""Mixed GET post / POST comment load, with a GET / probe on the event loop."""
+
+import asyncio
+import random
+import time
+import httpx
+from benchmarks.harness import (
+    parser,
+    percentile,
+    register,
+    scratch_database,
+    server,
+    wait_until_up,
+)
+
+CLIENTS = 32
+POSTS = 20
+
+
+async def run(base_url: str, seconds: float) -> None:
+    async with httpx.AsyncClient(base_url=base_url, timeout=60) as client:
+        await wait_until_up(client)
+        headers = await register(client, "bench")
+        tag = await client.post("/tags", json={"title": "bench"}, headers=headers)
+        post_ids = []
+        for i in range(POSTS):
+            response = await client.post(
+                "/posts",
+                json={
+                    "title": f"post {i}",
+                    "body": "body",
+                    "tag_ids": [tag.json()["id"]],
+                },
+                headers=headers,
+            )
+            post_ids.append(response.json()["id"])
+
+        done = 0
+        stop = time.monotonic() + seconds
+
+        async def worker():
+            nonlocal done
+            while time.monotonic() < stop:
+                post_id = random.choice(post_ids)
+                if random.random() < 0.3:
+                    response = await client.post(
+                        f"/posts/{post_id}/comments",
+                        json={"body": "answer"},
+                        headers=headers,
+                    )
+                else:
+                    response = await client.get(f"/posts/{post_id}", headers=headers)
+                response.raise_for_status()
+                done += 1
+
+        latencies = []
+
+        async def probe():
+            async with httpx.AsyncClient(base_url=base_url, timeout=60) as probe:
+                while time.monotonic() < stop:
+                    started = time.perf_counter()
+                    await probe.get("/")
+                    latencies.append(time.perf_counter() - started)
+                    await asyncio.sleep(0.01)
+
+        await asyncio.gather(probe(), *(worker() for _ in range(CLIENTS)))
+
+    print(f"{done / seconds:.0f} req/s from {CLIENTS} clients")
+    print(
+        f"GET / probe p50 {percentile(latencies, 0.5) * 1000:.0f}ms "
+        f"p99 {percentile(latencies, 0.99) * 1000:.0f}ms"
+    )
+
+
+def main() -> None:
+    args = parser(__doc__)
+    args.add_argument("--seconds", type=float, default=10)
+    options = args.parse_args()
+    url = scratch_database(options.admin_url, "stackit_bench_writes")
+    with server(url, options.port, options.workers) as base_url:
+        asyncio.run(run(base_url, options.seconds))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""Open many notification sockets over USERS users, then time one push to all."""
+
+import asyncio
+import resource
+import time
+import httpx
+import websockets
+from benchmarks.harness import (
+    parser,
+    percentile,
+    register,
+    scratch_database,
+    server,
+    wait_until_up,
+)
+
+USERS = 10
+
+
+async def run(base_url: str, sockets: int) -> None:
+    ws_url = base_url.replace("http", "ws", 1) + "/notifications/ws"
+    async with httpx.AsyncClient(base_url=base_url, timeout=120) as client:
+        await wait_until_up(client)
+        author = await register(client, "author")
+        tokens = [
+            (await register(client, f"listener{i}"))["Authorization"].split()[1]
+            for i in range(USERS)
+        ]
+        tag = await client.post("/tags", json={"title": "fanout"}, headers=author)
+
+        opened, failed = [], []
+        handshakes = asyncio.Semaphore(200)
+
+        async def connect(i: int):
+            async with handshakes:
+                try:
+                    opened.append(
+                        await websockets.connect(
+                            f"{ws_url}?token={tokens[i % USERS]}",
+                            open_timeout=120,
+                            max_queue=None,
+                        )
+                    )
+                except Exception as exc:
+                    failed.append(type(exc).__name__)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(connect(i) for i in range(sockets)))
+        print(
+            f"opened {len(opened)}/{sockets} sockets in "
+            f"{time.perf_counter() - started:.1f}s, failures {set(failed) or 0}"
+        )
+
+        received, last = 0, 0.0
+
+        async def read(socket):
+            nonlocal received, last
+            try:
+                async for message in socket:
+                    if '"ping"' in message:
+                        await socket.send("pong")
+                        continue
+                    received += 1
+                    last = time.perf_counter()
+            except websockets.ConnectionClosed:
+                pass
+
+        readers = [asyncio.create_task(read(socket)) for socket in opened]
+        await asyncio.sleep(1)
+
+        # One post mentioning every listener pushes to each of their sockets
+        body = " ".join(f"@listener{i}" for i in range(USERS))
+        posted = time.perf_counter()
+        response = await client.post(
+            "/posts",
+            json={"title": "fanout", "body": body, "tag_ids": [tag.json()["id"]]},
+            headers=author,
+        )
+        response.raise_for_status()
+        post_ms = (time.perf_counter() - posted) * 1000
+        for _ in range(300):
+            if received >= len(opened):
+                break
+            await asyncio.sleep(0.1)
+
+        latencies = []
+        for _ in range(50):
+            started = time.perf_counter()
+            await client.get("/posts", params={"limit": 5})
+            latencies.append(time.perf_counter() - started)
+
+        print(
+            f"POST /posts {post_ms:.0f}ms; pushes received {received}/{len(opened)}, "
+            f"last {last - posted if received else 0:.2f}s after the POST"
+        )
+        print(
+            f"GET /posts with every socket open: p50 "
+            f"{percentile(latencies, 0.5) * 1000:.0f}ms"
+        )
+        for reader in readers:
+            reader.cancel()
+        await asyncio.gather(
+            *(socket.close() for socket in opened), return_exceptions=True
+        )
+
+
+def main() -> None:
+    args = parser(__doc__)
+    args.add_argument("--sockets", type=int, default=10_000)
+    options = args.parse_args()
+    # Each socket is a file descriptor here and in the server
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+    url = scratch_database(options.admin_url, "stackit_bench_sockets")
+    with server(url, options.port, options.workers) as base_url:
+        asyncio.run(run(base_url, options.sockets))
+
+
+if __name__ == "__main__":
+    main()
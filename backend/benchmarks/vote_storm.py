@@ -0,0 +1,104 @@
+"""USERS voters each fire CLICKS upvotes and one downvote at one comment at once."""
+
+import asyncio
+import time
+import httpx
+import psycopg
+from sqlalchemy import make_url
+from benchmarks.harness import (
+    parser,
+    percentile,
+    register,
+    scratch_database,
+    server,
+    wait_until_up,
+)
+
+USERS = 100
+CLICKS = 3
+
+
+async def storm(base_url: str) -> int:
+    limits = httpx.Limits(max_connections=USERS * (CLICKS + 1))
+    async with httpx.AsyncClient(
+        base_url=base_url, timeout=120, limits=limits
+    ) as client:
+        await wait_until_up(client)
+        voters = [await register(client, f"voter{i}") for i in range(USERS)]
+        author = voters[0]
+        tag = await client.post("/tags", json={"title": "storm"}, headers=author)
+        post = await client.post(
+            "/posts",
+            json={"title": "storm", "body": "body", "tag_ids": [tag.json()["id"]]},
+            headers=author,
+        )
+        comment = await client.post(
+            f"/posts/{post.json()['id']}/comments", json={"body": "c"}, headers=author
+        )
+        comment_id = comment.json()["id"]
+
+        statuses, latencies = {}, []
+
+        async def click(headers: dict, vote_type: str):
+            started = time.perf_counter()
+            response = await client.post(
+                f"/comments/{comment_id}/vote/{vote_type}", headers=headers
+            )
+            latencies.append(time.perf_counter() - started)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+        started = time.perf_counter()
+        await asyncio.gather(
+            *(
+                click(headers, vote_type)
+                for headers in voters
+                for vote_type in ["upvote"] * CLICKS + ["downvote"]
+            )
+        )
+        elapsed = time.perf_counter() - started
+
+    votes = len(latencies)
+    print(
+        f"{votes} votes in {elapsed:.2f}s ({votes / elapsed:.0f}/s), "
+        f"p50 {percentile(latencies, 0.5) * 1000:.0f}ms "
+        f"p99 {percentile(latencies, 0.99) * 1000:.0f}ms, statuses {statuses}"
+    )
+    return comment_id
+
+
+def check(database_url: str, comment_id: int) -> None:
+    """Print whether the score, the vote rows and karma still agree."""
+    dsn = make_url(database_url).set(drivername="postgresql")
+    with psycopg.connect(dsn.render_as_string(hide_password=False)) as conn:
+        duplicates = conn.execute(
+            "SELECT count(*) FROM (SELECT 1 FROM comment_votes "
+            "GROUP BY user_id, comment_id HAVING count(*) > 1) d"
+        ).fetchone()[0]
+        score, votes = conn.execute(
+            "SELECT c.score, coalesce(sum(CASE v.vote_type WHEN 'upvote' THEN 1 "
+            "ELSE -1 END), 0) FROM comments c LEFT JOIN comment_votes v "
+            "ON v.comment_id = c.id WHERE c.id = %s GROUP BY c.score",
+            (comment_id,),
+        ).fetchone()
+        karma, ledger = conn.execute(
+            "SELECT u.karma, (SELECT coalesce(sum(delta), 0) FROM karma_ledger "
+            "WHERE user_id = u.id) FROM users u JOIN comments c ON c.user_id = u.id "
+            "WHERE c.id = %s",
+            (comment_id,),
+        ).fetchone()
+    print(
+        f"duplicate vote pairs {duplicates}, comment.score {score} vs votes {votes}, "
+        f"author karma {karma} vs ledger {ledger}"
+    )
+
+
+def main() -> None:
+    options = parser(__doc__).parse_args()
+    url = scratch_database(options.admin_url, "stackit_bench_votes")
+    with server(url, options.port, options.workers) as base_url:
+        comment_id = asyncio.run(storm(base_url))
+    check(url, comment_id)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+from logging.config import fileConfig
+from alembic import context
+from app.database import Base, _database_url, engine
+
+# Register every table on Base.metadata for autogenerate
+from app.models import (
+    comment,
+    karma,
+    notification,
+    outbox,
+    post,
+    relationships,
+    tag,
+    user,
+    version,
+    vote,
+)
+
+config = context.config
+
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    # Search is dialect specific: the GIN index only exists on PostgreSQL, and
+    # the SQLite fallback (posts_fts and its shadow tables) has no model
+    if type_ == "index" and name == "ix_posts_search_vector":
+        return context.get_bind().dialect.name == "postgresql"
+    if type_ == "table" and name.startswith("posts_fts"):
+        return False
+    return True
+
+
+def run_migrations_offline() -> None:
+    """Emit the migration SQL for DATABASE_URL without connecting."""
+    context.configure(
+        url=_database_url(),
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+        include_object=include_object,
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online() -> None:
+    """Apply migrations over the application's sync engine."""
+    with engine.connect() as connection:
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            include_object=include_object,
+            # SQLite can only change constraints by rebuilding the table
+            render_as_batch=connection.dialect.name == "sqlite",
+        )
+
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,282 @@
+"""search, vote uniqueness, karma ledger and notification delivery
+
+Adds the full-text search document, one vote per user per comment, the karma
+ledger, the maintained unread counter, the push outbox, coalescing counts and
+the notification archive. Existing rows are backfilled where they can be:
+duplicate votes are collapsed to the latest one and comment scores recounted,
+unread counters and search documents are rebuilt. Karma earned before this
+revision is entered in the ledger as one opening balance per user.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 00:00:00
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, Sequence[str], None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Frozen copies of the search document from app.services.search as of this
+# revision, so later changes to the service cannot alter what this backfills
+_PG_VECTOR = """
+    setweight(to_tsvector('english', coalesce(posts.title, '')), 'A') ||
+    setweight(to_tsvector('english', coalesce(posts.body, '')), 'B') ||
+    setweight(to_tsvector('english', coalesce((
+        SELECT comments.body FROM comments
+        WHERE comments.post_id = posts.id AND comments.is_accepted
+        LIMIT 1
+    ), '')), 'C')
+"""
+
+_SQLITE_ROW = """
+    SELECT posts.id, posts.title, posts.body, (
+        SELECT comments.body FROM comments
+        WHERE comments.post_id = posts.id AND comments.is_accepted
+        LIMIT 1
+    )
+    FROM posts
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    dialect = op.get_bind().dialect.name
+
+    # Search: a weighted tsvector with a GIN index on PostgreSQL, a standalone
+    # FTS5 table keyed by post id on SQLite
+    op.add_column(
+        "posts",
+        sa.Column(
+            "search_vector",
+            postgresql.TSVECTOR().with_variant(sa.Text(), "sqlite"),
+            nullable=True,
+        ),
+    )
+    if dialect == "postgresql":
+        op.create_index(
+            "ix_posts_search_vector",
+            "posts",
+            ["search_vector"],
+            unique=False,
+            postgresql_using="gin",
+        )
+        op.execute(f"UPDATE posts SET search_vector = {_PG_VECTOR}")
+    elif dialect == "sqlite":
+        op.execute(
+            "CREATE VIRTUAL TABLE posts_fts "
+            "USING fts5(title, body, answer, tokenize='porter unicode61')"
+        )
+        op.execute(f"INSERT INTO posts_fts (rowid, title, body, answer){_SQLITE_ROW}")
+
+    # Votes: keep each user's latest vote on a comment, then recount scores
+    op.execute(
+        "DELETE FROM comment_votes WHERE EXISTS ("
+        "SELECT 1 FROM comment_votes AS newer "
+        "WHERE newer.user_id = comment_votes.user_id "
+        "AND newer.comment_id = comment_votes.comment_id "
+        "AND newer.id > comment_votes.id)"
+    )
+    op.execute(
+        "UPDATE comments SET score = COALESCE(("
+        "SELECT SUM(CASE WHEN vote_type = 'upvote' THEN 1 ELSE -1 END) "
+        "FROM comment_votes WHERE comment_votes.comment_id = comments.id), 0)"
+    )
+    with op.batch_alter_table("comment_votes") as batch_op:
+        batch_op.create_unique_constraint(
+            "uq_comment_votes_user_comment", ["user_id", "comment_id"]
+        )
+
+    op.create_table(
+        "karma_ledger",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("delta", sa.Integer(), nullable=False),
+        sa.Column(
+            "reason",
+            sa.Enum(
+                "OPENING_BALANCE",
+                "POST_CREATED",
+                "COMMENT_CREATED",
+                "COMMENT_ACCEPTED",
+                "COMMENT_UPVOTED",
+                "COMMENT_DOWNVOTED",
+                name="karmareason",
+            ),
+            nullable=False,
+        ),
+        sa.Column("reference_id", sa.Integer(), nullable=True),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.func.now(),
+            nullable=True,
+        ),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(op.f("ix_karma_ledger_id"), "karma_ledger", ["id"], unique=False)
+    op.create_index(
+        op.f("ix_karma_ledger_user_id"), "karma_ledger", ["user_id"], unique=False
+    )
+    # So the ledger sums to users.karma from the start
+    op.execute(
+        "INSERT INTO karma_ledger (user_id, delta, reason) "
+        "SELECT id, karma, 'OPENING_BALANCE' FROM users WHERE karma <> 0"
+    )
+
+    # Notifications: unread counter, coalescing count and the inbox indexes
+    op.add_column(
+        "users",
+        sa.Column(
+            "unread_notifications", sa.Integer(), server_default="0", nullable=False
+        ),
+    )
+    op.execute(
+        "UPDATE users SET unread_notifications = ("
+        "SELECT COUNT(*) FROM notifications "
+        "WHERE notifications.user_id = users.id AND NOT notifications.is_read)"
+    )
+    op.add_column(
+        "notifications",
+        sa.Column("count", sa.Integer(), server_default="1", nullable=False),
+    )
+    op.create_index(
+        "ix_notifications_user_id_id", "notifications", ["user_id", "id"], unique=False
+    )
+    op.create_index(
+        "ix_notifications_user_id_created_at",
+        "notifications",
+        ["user_id", sa.literal_column("created_at DESC")],
+        unique=False,
+    )
+    op.create_index(
+        "ix_notifications_unread_user_id",
+        "notifications",
+        ["user_id"],
+        unique=False,
+        postgresql_where=sa.text("NOT is_read"),
+        sqlite_where=sa.text("NOT is_read"),
+    )
+    op.create_index(
+        "ix_notifications_read_created_at",
+        "notifications",
+        ["created_at"],
+        unique=False,
+        postgresql_where=sa.text("is_read"),
+        sqlite_where=sa.text("is_read"),
+    )
+
+    op.create_table(
+        "notification_outbox",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("notification_id", sa.Integer(), nullable=False),
+        sa.Column("message", sa.String(), nullable=False),
+        sa.Column("unread_count", sa.Integer(), nullable=False),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column("available_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        op.f("ix_notification_outbox_available_at"),
+        "notification_outbox",
+        ["available_at"],
+        unique=False,
+    )
+    op.create_index(
+        op.f("ix_notification_outbox_id"), "notification_outbox", ["id"], unique=False
+    )
+    op.create_index(
+        op.f("ix_notification_outbox_notification_id"),
+        "notification_outbox",
+        ["notification_id"],
+        unique=False,
+    )
+
+    op.create_table(
+        "notifications_archive",
+        sa.Column("id", sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=True),
+        sa.Column("message", sa.String(), nullable=True),
+        sa.Column("is_read", sa.Boolean(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column(
+            "type",
+            postgresql.ENUM(
+                "ANSWER",
+                "COMMENT",
+                "MENTION",
+                name="notificationtype",
+                create_type=False,
+            ),
+            nullable=True,
+        ),
+        sa.Column("reference_id", sa.Integer(), nullable=True),
+        sa.Column("count", sa.Integer(), nullable=False),
+        sa.Column(
+            "archived_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.func.now(),
+            nullable=True,
+        ),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_notifications_archive_user_id_id",
+        "notifications_archive",
+        ["user_id", "id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    dialect = op.get_bind().dialect.name
+
+    op.drop_index(
+        "ix_notifications_archive_user_id_id", table_name="notifications_archive"
+    )
+    op.drop_table("notifications_archive")
+    op.drop_index(
+        op.f("ix_notification_outbox_notification_id"), table_name="notification_outbox"
+    )
+    op.drop_index(op.f("ix_notification_outbox_id"), table_name="notification_outbox")
+    op.drop_index(
+        op.f("ix_notification_outbox_available_at"), table_name="notification_outbox"
+    )
+    op.drop_table("notification_outbox")
+
+    op.drop_index("ix_notifications_read_created_at", table_name="notifications")
+    op.drop_index("ix_notifications_unread_user_id", table_name="notifications")
+    op.drop_index("ix_notifications_user_id_created_at", table_name="notifications")
+    op.drop_index("ix_notifications_user_id_id", table_name="notifications")
+    with op.batch_alter_table("notifications") as batch_op:
+        batch_op.drop_column("count")
+    with op.batch_alter_table("users") as batch_op:
+        batch_op.drop_column("unread_notifications")
+
+    op.drop_index(op.f("ix_karma_ledger_user_id"), table_name="karma_ledger")
+    op.drop_index(op.f("ix_karma_ledger_id"), table_name="karma_ledger")
+    op.drop_table("karma_ledger")
+    sa.Enum(name="karmareason").drop(op.get_bind(), checkfirst=True)
+
+    with op.batch_alter_table("comment_votes") as batch_op:
+        batch_op.drop_constraint("uq_comment_votes_user_comment", type_="unique")
+
+    if dialect == "postgresql":
+        op.drop_index("ix_posts_search_vector", table_name="posts")
+    elif dialect == "sqlite":
+        op.execute("DROP TABLE posts_fts")
+    with op.batch_alter_table("posts") as batch_op:
+        batch_op.drop_column("search_vector")
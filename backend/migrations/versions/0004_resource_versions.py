@@ -0,0 +1,50 @@
+"""resource versions
+
+Version counters behind the ETags of the read endpoints: posts.version for
+a post, posts.comments_version for its comment list, and a
+resource_versions row for each whole collection ("posts" and "tags").
+Everything starts at 1.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 00:00:00
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "0004"
+down_revision: Union[str, Sequence[str], None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "posts",
+        sa.Column("version", sa.Integer(), server_default="1", nullable=False),
+    )
+    op.add_column(
+        "posts",
+        sa.Column("comments_version", sa.Integer(), server_default="1", nullable=False),
+    )
+    resource_versions = op.create_table(
+        "resource_versions",
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("version", sa.Integer(), server_default="1", nullable=False),
+        sa.PrimaryKeyConstraint("name"),
+    )
+    op.bulk_insert(resource_versions, [{"name": "posts"}, {"name": "tags"}])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("resource_versions")
+    with op.batch_alter_table("posts") as batch_op:
+        batch_op.drop_column("comments_version")
+        batch_op.drop_column("version")
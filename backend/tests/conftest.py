@@ -0,0 +1,91 @@
+import os
+import tempfile
+from contextlib import contextmanager
+import pytest
+from alembic import command
+from alembic.config import Config
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+# Settings and engines are created when app is first imported, so the test
+# database has to be chosen before that. TEST_DATABASE_URL should name a
+# disposable PostgreSQL database: it is wiped at the start of every run.
+# Without it the suite runs on a temporary SQLite file and the
+# PostgreSQL-only tests are skipped.
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.environ["DATABASE_URL"] = os.environ.get(
+    "TEST_DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/stackit-test.db"
+)
+# Commits wake the outbox dispatcher; no polling in between keeps the pool
+# quiet while a test inspects it
+os.environ["OUTBOX_POLL_INTERVAL_SECONDS"] = "3600"
+
+from app.database import async_engine  # noqa: E402
+from app.services.read_cache import MemoryCacheBackend, read_cache  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def client():
+    config = Config(os.path.join(BACKEND_DIR, "alembic.ini"))
+    command.downgrade(config, "base")
+    command.upgrade(config, "head")
+
+    from app.main import app
+
+    with TestClient(app) as client:
+        yield client
+
+
+def register(client, username: str):
+    user = client.post(
+        "/register",
+        json={
+            "name": username,
+            "email": f"{username}@example.com",
+            "username": username,
+            "password": "password",
+        },
+    )
+    assert user.status_code == 201, user.text
+    login = client.post("/login", json={"username": username, "password": "password"})
+    assert login.status_code == 200, login.text
+    token = login.json()["access_token"]
+    return user.json()["id"], {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture(scope="session")
+def admin(client):
+    """Auth headers of the first user registered, who becomes the admin."""
+    _, headers = register(client, "admin")
+    return headers
+
+
+@pytest.fixture(scope="session")
+def make_user(client, admin):
+    """Register a (non-admin) user and return (id, auth headers)."""
+    return lambda username: register(client, username)
+
+
+@pytest.fixture
+def no_read_cache(monkeypatch):
+    """Render every read from the database, as on a cache miss."""
+    monkeypatch.setattr(read_cache, "backend", MemoryCacheBackend(0))
+
+
+@contextmanager
+def capture_statements():
+    """Collect (statement, parameters) for everything sent to the database."""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, many):
+        statements.append((statement, parameters))
+
+    event.listen(
+        async_engine.sync_engine, "before_cursor_execute", before_cursor_execute
+    )
+    try:
+        yield statements
+    finally:
+        event.remove(
+            async_engine.sync_engine, "before_cursor_execute", before_cursor_execute
+        )
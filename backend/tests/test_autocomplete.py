@@ -0,0 +1,34 @@
+import pytest
+from app.utils import prefix_index
+from app.utils.prefix_index import PrefixIndex
+
+
+@pytest.mark.parametrize("q", ["@", "#", "@@"])
+def test_bare_sigil_suggests_nothing(client, admin, q):
+    response = client.get("/autocomplete", params={"q": q})
+    assert response.status_code == 200, response.text
+    assert response.json() == {"users": [], "tags": []}
+
+
+def test_mention_suggestions_match_the_prefix(client, make_user):
+    make_user("prefixed")
+    response = client.get("/autocomplete", params={"q": "@prefix", "type": "users"})
+    assert [user["username"] for user in response.json()["users"]] == ["prefixed"]
+
+
+def test_memoized_answers_follow_weight_changes(monkeypatch):
+    monkeypatch.setattr(prefix_index, "_MEMO_MIN_MATCHES", 1)
+    index = PrefixIndex()
+    index.replace([(1, "ann", 3), (2, "amy", 2), (3, "abe", 1), (4, "bob", 9)])
+    assert [id for id, _, _ in index.search("a", 2)] == [1, 2]
+
+    index.adjust(4, 100)  # no "a" prefix: the memo for "a" stays
+    assert index._memo["a"]
+    index.adjust(3, 5)  # now makes the cut
+    assert [id for id, _, _ in index.search("a", 2)] == [3, 1]
+    index.adjust(3, 1)  # moves up within the answer
+    assert [id for id, _, _ in index.search("a", 2)] == [3, 1]
+    index.adjust(3, -10)  # drops out
+    assert [id for id, _, _ in index.search("a", 2)] == [1, 2]
+    index.set(2, "zed")
+    assert [id for id, _, _ in index.search("a", 2)] == [1, 3]
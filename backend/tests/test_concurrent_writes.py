@@ -0,0 +1,38 @@
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from app.database import engine
+
+pytestmark = pytest.mark.skipif(
+    engine.dialect.name != "postgresql",
+    reason="row lock ordering is checked on PostgreSQL (set TEST_DATABASE_URL)",
+)
+
+ROUNDS = 20
+
+
+def test_users_answering_each_other_do_not_deadlock(client, admin, make_user):
+    tag = client.post("/tags", json={"title": "crossfire"}, headers=admin).json()
+    users = [make_user("crossfire-a"), make_user("crossfire-b")]
+    posts = [
+        client.post(
+            "/posts",
+            json={"title": "question", "body": "body", "tag_ids": [tag["id"]]},
+            headers=headers,
+        ).json()["id"]
+        for _, headers in users
+    ]
+
+    def answer(author: int) -> int:
+        # Each user comments on the other's post: karma for the author,
+        # a notification for the other
+        _, headers = users[author]
+        response = client.post(
+            f"/posts/{posts[1 - author]}/comments",
+            json={"body": "answer"},
+            headers=headers,
+        )
+        return response.status_code
+
+    with ThreadPoolExecutor(2) as pool:
+        for _ in range(ROUNDS):
+            assert list(pool.map(answer, [0, 1])) == [201, 201]
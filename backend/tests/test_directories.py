@@ -0,0 +1,61 @@
+from app.services.user_directory import user_directory
+
+
+def suggested(client, q: str, type: str) -> list:
+    response = client.get("/autocomplete", params={"q": q, "type": type})
+    assert response.status_code == 200, response.text
+    return response.json()[type]
+
+
+def test_mentions_resolve_through_renames_and_deletes(client, admin, make_user):
+    user_id, headers = make_user("dir_before")
+    assert user_directory.resolve(["dir_before"]) == {user_id}
+
+    response = client.put(
+        f"/users/{user_id}", json={"username": "dir_after"}, headers=headers
+    )
+    assert response.status_code == 200, response.text
+    assert user_directory.resolve(["dir_after"]) == {user_id}
+    assert user_directory.resolve(["dir_before"]) == set()
+    assert [user["username"] for user in suggested(client, "dir_", "users")] == [
+        "dir_after"
+    ]
+
+    assert client.delete(f"/users/{user_id}", headers=admin).status_code == 204
+    assert user_directory.resolve(["dir_after"]) == set()
+    assert suggested(client, "dir_", "users") == []
+
+
+def test_tags_rank_by_use_and_follow_edits(client, admin):
+    def tag(title: str) -> int:
+        return client.post("/tags", json={"title": title}, headers=admin).json()["id"]
+
+    def post(tag_ids: list) -> int:
+        response = client.post(
+            "/posts",
+            json={"title": "ranked", "body": "body", "tag_ids": tag_ids},
+            headers=admin,
+        )
+        return response.json()["id"]
+
+    def ranked() -> list:
+        return [tag["title"] for tag in suggested(client, "rank", "tags")]
+
+    rare, common = tag("rank_rare"), tag("rank_common")
+    post([common])
+    moved = post([common])
+    assert ranked() == ["rank_common", "rank_rare"]
+
+    client.put(
+        f"/posts/{moved}",
+        json={"title": "ranked", "body": "body", "tag_ids": [rare]},
+        headers=admin,
+    )
+    post([rare])
+    assert ranked() == ["rank_rare", "rank_common"]
+
+    client.put(f"/tags/{common}", json={"title": "renamed"}, headers=admin)
+    assert ranked() == ["rank_rare"]
+    client.delete(f"/posts/{moved}", headers=admin)
+    client.delete(f"/tags/{rare}", headers=admin)
+    assert ranked() == []
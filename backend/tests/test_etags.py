@@ -0,0 +1,60 @@
+from itertools import count
+import pytest
+
+_tags = count()
+
+
+@pytest.fixture
+def post(client, admin):
+    tag = client.post(
+        "/tags", json={"title": f"etags{next(_tags)}"}, headers=admin
+    ).json()
+    response = client.post(
+        "/posts",
+        json={"title": "before", "body": "body", "tag_ids": [tag["id"]]},
+        headers=admin,
+    )
+    return response.json()
+
+
+def revalidate(client, url: str, etag: str):
+    return client.get(url, headers={"If-None-Match": etag})
+
+
+def test_post_etag_changes_with_an_edit(client, admin, post):
+    url = f"/posts/{post['id']}"
+    etag = client.get(url).headers["etag"]
+    assert etag.startswith('W/"')
+    response = revalidate(client, url, etag)
+    assert response.status_code == 304
+    assert response.content == b""
+
+    client.put(
+        url,
+        json={"title": "after", "body": "body", "tag_ids": [post["tags"][0]["id"]]},
+        headers=admin,
+    )
+    response = revalidate(client, url, etag)
+    assert response.status_code == 200
+    assert response.json()["title"] == "after"
+    assert response.headers["etag"].startswith('W/"')
+    assert response.headers["etag"] != etag
+    assert revalidate(client, url, response.headers["etag"]).status_code == 304
+
+
+def test_comment_list_etag_changes_with_a_new_comment(client, admin, post):
+    url = f"/posts/{post['id']}/comments"
+    etag = client.get(url).headers["etag"]
+    assert revalidate(client, url, etag).status_code == 304
+
+    client.post(url, json={"body": "first"}, headers=admin)
+    response = revalidate(client, url, etag)
+    assert response.status_code == 200
+    assert [comment["body"] for comment in response.json()["items"]] == ["first"]
+
+
+def test_post_list_etag_changes_when_a_post_is_deleted(client, admin, post):
+    etag = client.get("/posts").headers["etag"]
+    assert revalidate(client, "/posts", etag).status_code == 304
+    client.delete(f"/posts/{post['id']}", headers=admin)
+    assert revalidate(client, "/posts", etag).status_code == 200
@@ -0,0 +1,61 @@
+import asyncio
+from types import SimpleNamespace
+from app.websockets.manager import ClientConnection, manager
+
+
+class RecordingWebSocket:
+    def __init__(self):
+        self.sent = []
+
+    async def send_json(self, data):
+        self.sent.append(data)
+
+    async def close(self, code=None):
+        pass
+
+
+async def deliver(replayed, live_before_start, live_after_start):
+    websocket = RecordingWebSocket()
+    connection = ClientConnection(websocket, 1, manager)
+    connection.replay(
+        [SimpleNamespace(id=id, message=message) for id, message in replayed], 1
+    )
+    for id, message in live_before_start:
+        connection.enqueue(id, message, 1)
+    connection.start()
+    for id, message in live_after_start:
+        await asyncio.sleep(0.01)
+        connection.enqueue(id, message, 1)
+    await asyncio.sleep(0.05)
+    connection.stop()
+    return [(data["id"], data["msg"]) for data in websocket.sent]
+
+
+def test_live_copy_of_replayed_notification_is_skipped():
+    sent = asyncio.run(
+        deliver(
+            replayed=[(7, "New comment on your post")],
+            live_before_start=[(7, "New comment on your post")],
+            live_after_start=[],
+        )
+    )
+    assert sent == [(7, "New comment on your post")]
+
+
+def test_digest_of_replayed_notification_is_delivered():
+    # A digest push keeps the id of the notification it merged into
+    sent = asyncio.run(
+        deliver(
+            replayed=[(7, "New comment on your post")],
+            live_before_start=[],
+            live_after_start=[
+                (7, "2 new comments on your post"),
+                (7, "3 new comments on your post"),
+            ],
+        )
+    )
+    assert sent == [
+        (7, "New comment on your post"),
+        (7, "2 new comments on your post"),
+        (7, "3 new comments on your post"),
+    ]
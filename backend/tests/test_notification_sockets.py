@@ -0,0 +1,50 @@
+import time
+from contextlib import ExitStack
+from app.database import async_engine
+from app.websockets.manager import manager
+
+# More sockets than the pool has connections (5 plus 10 overflow), so a
+# socket that kept its session open would exhaust it
+SOCKETS = 20
+
+
+def wait_for_idle_pool(timeout: float = 5.0) -> int:
+    """Connections still checked out once in-flight work (e.g. the outbox) settles."""
+    deadline = time.monotonic() + timeout
+    while async_engine.pool.checkedout() and time.monotonic() < deadline:
+        time.sleep(0.05)
+    return async_engine.pool.checkedout()
+
+
+def test_open_sockets_hold_no_connections(client, admin, make_user):
+    owner_id, owner = make_user("listener")
+    _, replier = make_user("replier")
+    token = owner["Authorization"].removeprefix("Bearer ")
+    tag = client.post("/tags", json={"title": "sockets"}, headers=admin).json()
+    post = client.post(
+        "/posts",
+        json={"title": "question", "body": "body", "tag_ids": [tag["id"]]},
+        headers=owner,
+    ).json()
+
+    with ExitStack() as stack:
+        sockets = [
+            stack.enter_context(
+                client.websocket_connect(
+                    f"/notifications/ws?token={token}&last_seen_id=0"
+                )
+            )
+            for _ in range(SOCKETS)
+        ]
+        assert len(manager.active_connections[owner_id]) == SOCKETS
+
+        # A push reaches every socket while none of them holds a connection
+        response = client.post(
+            f"/posts/{post['id']}/comments", json={"body": "answer"}, headers=replier
+        )
+        assert response.status_code == 201, response.text
+        for socket in sockets:
+            assert socket.receive_json()["unread_count"] == 1
+
+        assert wait_for_idle_pool() == 0
+        assert len(manager.active_connections[owner_id]) == SOCKETS
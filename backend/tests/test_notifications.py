@@ -0,0 +1,119 @@
+import asyncio
+from datetime import timedelta
+from itertools import count
+import pytest
+from sqlalchemy import select, update
+from app.database import AsyncSessionLocal, engine, utcnow
+from app.models.notification import ArchivedNotification, Notification
+from app.models.user import User
+from app.services.notifications import notification_service
+
+_names = count()
+
+
+@pytest.fixture
+def reader(client, admin, make_user):
+    """A fresh user, their headers, and a way to mention them in new posts."""
+    n = next(_names)
+    user_id, headers = make_user(f"reader{n}")
+    tag = client.post("/tags", json={"title": f"unread{n}"}, headers=admin).json()
+
+    def mention(times: int) -> None:
+        for i in range(times):
+            response = client.post(
+                "/posts",
+                json={
+                    "title": f"mention {i}",
+                    "body": f"hello @reader{n}",
+                    "tag_ids": [tag["id"]],
+                },
+                headers=admin,
+            )
+            assert response.status_code == 201, response.text
+
+    return user_id, headers, mention
+
+
+def unread(client, headers) -> int:
+    return client.get("/notifications/unread", headers=headers).json()["unread_count"]
+
+
+def test_unread_count_follows_reads(client, reader, make_user):
+    _, headers, mention = reader
+    mention(3)
+    assert unread(client, headers) == 3
+
+    first, second, _ = client.get("/notifications/", headers=headers).json()["items"]
+    assert client.post(f"/notifications/{first['id']}/read", headers=headers).json()
+    assert unread(client, headers) == 2
+    # Reading it again changes nothing
+    client.post(f"/notifications/{first['id']}/read", headers=headers)
+    assert unread(client, headers) == 2
+
+    _, other = make_user(f"other{next(_names)}")
+    response = client.post(f"/notifications/{second['id']}/read", headers=other)
+    assert response.status_code == 404
+    assert unread(client, headers) == 2
+
+    client.post("/notifications/read_all", headers=headers)
+    assert unread(client, headers) == 0
+    mention(1)
+    assert unread(client, headers) == 1
+
+
+def test_reconcile_repairs_a_drifted_counter(client, reader):
+    user_id, headers, mention = reader
+    mention(2)
+    with engine.begin() as conn:
+        conn.execute(
+            update(User).where(User.id == user_id).values(unread_notifications=7)
+        )
+
+    async def reconcile() -> int:
+        async with AsyncSessionLocal() as db:
+            return await notification_service.reconcile_unread_counts(db, [user_id])
+
+    assert asyncio.run(reconcile()) == 1
+    assert unread(client, headers) == 2
+    assert asyncio.run(reconcile()) == 0
+
+
+@pytest.mark.parametrize("mode", ["archive", "delete"])
+def test_retention_takes_only_old_read_notifications(client, reader, mode):
+    user_id, headers, mention = reader
+    mention(4)
+    items = client.get("/notifications/", headers=headers).json()["items"]
+    old_read, other_old_read, old_unread, recent_read = [
+        item["id"] for item in reversed(items)
+    ]
+    for id in (old_read, other_old_read, recent_read):
+        client.post(f"/notifications/{id}/read", headers=headers)
+    with engine.begin() as conn:
+        conn.execute(
+            update(Notification)
+            .where(Notification.id.in_([old_read, other_old_read, old_unread]))
+            .values(created_at=utcnow() - timedelta(days=100))
+        )
+
+    async def apply_retention() -> int:
+        async with AsyncSessionLocal() as db:
+            return await notification_service.apply_retention(
+                db, days=90, mode=mode, batch_size=1
+            )
+
+    assert asyncio.run(apply_retention()) == 2
+    with engine.connect() as conn:
+        kept = conn.scalars(
+            select(Notification.id).where(Notification.user_id == user_id)
+        ).all()
+        archived = conn.scalars(
+            select(ArchivedNotification.id).where(
+                ArchivedNotification.user_id == user_id
+            )
+        ).all()
+    assert sorted(kept) == [old_unread, recent_read]
+    if mode == "archive":
+        assert sorted(archived) == [old_read, other_old_read]
+    else:
+        assert archived == []
+    assert unread(client, headers) == 1
@@ -0,0 +1,97 @@
+import asyncio
+from datetime import timedelta
+from itertools import count
+import pytest
+from sqlalchemy import delete, insert, select, update
+from app.database import AsyncSessionLocal, utcnow
+from app.models.outbox import OutboxMessage
+from app.services.outbox import OutboxDispatcher
+from app.websockets.manager import manager
+
+_names = count()
+
+
+@pytest.fixture
+def outbox(make_user):
+    """Queue pushes for two fresh users; returns their ids and a dispatcher."""
+    n = next(_names)
+    first, _ = make_user(f"outbox_first{n}")
+    second, _ = make_user(f"outbox_second{n}")
+    rows = [
+        {
+            "user_id": user_id,
+            "notification_id": n,
+            "message": f"m{n}",
+            "unread_count": n,
+        }
+        for user_id, n in [(first, 1), (second, 2), (first, 3), (second, 4)]
+    ]
+
+    async def queue(rows):
+        # Digest pushes left by other tests wait out their window; drop them
+        async with AsyncSessionLocal() as db:
+            await db.execute(delete(OutboxMessage))
+            if rows:
+                await db.execute(insert(OutboxMessage), rows)
+            await db.commit()
+
+    asyncio.run(queue(rows))
+    yield first, second, OutboxDispatcher(batch_size=10, max_attempts=2)
+    asyncio.run(queue([]))
+
+
+async def queued() -> list:
+    async with AsyncSessionLocal() as db:
+        rows = await db.execute(
+            select(
+                OutboxMessage.notification_id,
+                OutboxMessage.attempts,
+                OutboxMessage.available_at,
+            ).order_by(OutboxMessage.id)
+        )
+        return rows.all()
+
+
+def test_failed_pushes_wait_and_stay_in_order(outbox, monkeypatch):
+    first, second, dispatcher = outbox
+    sent = []
+
+    async def send(user_id, notification_id, message, unread_count):
+        if user_id == second:
+            raise ConnectionError
+        sent.append(notification_id)
+
+    monkeypatch.setattr(manager, "send_notification", send)
+    assert asyncio.run(dispatcher.dispatch_batch()) == 4
+    assert sent == [1, 3]
+
+    # The second user's pushes stay queued, in order, backed off
+    rows = asyncio.run(queued())
+    assert [(n, attempts) for n, attempts, _ in rows] == [(2, 1), (4, 1)]
+    assert all(available_at > utcnow() for _, _, available_at in rows)
+    assert asyncio.run(dispatcher.dispatch_batch()) == 0
+
+    async def make_due():
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                update(OutboxMessage).values(available_at=utcnow() - timedelta(1))
+            )
+            await db.commit()
+
+    # max_attempts reached: dropped rather than retried forever
+    asyncio.run(make_due())
+    assert asyncio.run(dispatcher.dispatch_batch()) == 2
+    assert asyncio.run(queued()) == []
+
+
+def test_claimed_pushes_are_leased(outbox):
+    _, _, dispatcher = outbox
+
+    async def claim():
+        async with AsyncSessionLocal() as db:
+            return await dispatcher._claim(db)
+
+    assert [m.notification_id for m in asyncio.run(claim())] == [1, 2, 3, 4]
+    # Until the lease runs out no other dispatcher can take them
+    assert asyncio.run(claim()) == []
+    assert [attempts for _, attempts, _ in asyncio.run(queued())] == [1, 1, 1, 1]
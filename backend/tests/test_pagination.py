@@ -0,0 +1,39 @@
+import base64
+import json
+import pytest
+
+
+def crafted(value) -> str:
+    return base64.urlsafe_b64encode(json.dumps(value).encode()).decode().rstrip("=")
+
+
+CURSORS = [
+    "not base64!",
+    crafted({"a": 1}),
+    crafted([{"a": 1}]),
+    crafted([None]),
+    crafted(["x"]),
+    crafted([True]),
+    crafted([1.5]),
+    crafted([1, 2]),
+]
+
+
+@pytest.fixture(scope="module")
+def post_id(client, admin):
+    tag = client.post("/tags", json={"title": "cursors"}, headers=admin).json()
+    response = client.post(
+        "/posts",
+        json={"title": "paged", "body": "body", "tag_ids": [tag["id"]]},
+        headers=admin,
+    )
+    assert response.status_code == 201, response.text
+    return response.json()["id"]
+
+
+@pytest.mark.parametrize("cursor", CURSORS)
+@pytest.mark.parametrize("url", ["/posts", "/posts/{post_id}/comments"])
+def test_malformed_cursor_is_rejected(client, post_id, url, cursor):
+    response = client.get(url.format(post_id=post_id), params={"cursor": cursor})
+    assert response.status_code == 400, response.text
+    assert response.json()["detail"] == "Invalid cursor"
@@ -0,0 +1,56 @@
+import asyncio
+import time
+import pytest
+from app.database import engine
+from app.models.user import User
+from app.utils.auth import (
+    CHANNEL,
+    get_principal,
+    principal_cache,
+    principal_invalidations,
+)
+from app.websockets.broker import create_broker
+
+
+async def publish_from_other_worker(user_id: int, username: str) -> None:
+    async def ignore(user_id, data):
+        pass
+
+    broker = create_broker(ignore, CHANNEL)
+    try:
+        await broker.publish(user_id, {"username": username})
+    finally:
+        await broker.stop()
+
+
+@pytest.mark.skipif(
+    engine.dialect.name != "postgresql",
+    reason="workers share invalidations over LISTEN/NOTIFY (set TEST_DATABASE_URL)",
+)
+def test_principal_invalidated_on_another_worker(client, make_user):
+    user_id, headers = make_user("elsewhere")
+    assert client.get("/me", headers=headers).status_code == 200
+    assert principal_cache.get("elsewhere") is not None
+
+    asyncio.run(publish_from_other_worker(user_id, "elsewhere"))
+
+    deadline = time.monotonic() + 5
+    while principal_cache.get("elsewhere") is not None:
+        assert time.monotonic() < deadline, "principal still cached"
+        time.sleep(0.05)
+
+
+class RacingSession:
+    """Returns a row read just before an invalidation for it arrives."""
+
+    async def scalar(self, stmt):
+        user = User(id=1, username="racer", role="admin")
+        await principal_invalidations._apply(1, {"username": "racer"})
+        return user
+
+
+@pytest.mark.usefixtures("client")
+def test_fill_racing_an_invalidation_is_not_cached():
+    principal = asyncio.run(get_principal(RacingSession(), "racer"))
+    assert principal.role == "admin"
+    assert principal_cache.get("racer") is None
@@ -0,0 +1,48 @@
+import pytest
+from conftest import capture_statements
+
+PAGE_SIZES = (5, 25)
+
+
+@pytest.fixture(scope="module")
+def thread(client, admin, make_user):
+    """A tag with more posts, and a post with more answers, than a page holds."""
+    _, headers = make_user("counter")
+    tag_ids = [
+        client.post("/tags", json={"title": f"count-{i}"}, headers=admin).json()["id"]
+        for i in range(3)
+    ]
+    for i in range(max(PAGE_SIZES) + 1):
+        response = client.post(
+            "/posts",
+            json={"title": f"question {i}", "body": "body", "tag_ids": tag_ids},
+            headers=headers,
+        )
+        assert response.status_code == 201, response.text
+    post_id = response.json()["id"]
+    for i in range(max(PAGE_SIZES) + 1):
+        response = client.post(
+            f"/posts/{post_id}/comments", json={"body": f"answer {i}"}, headers=headers
+        )
+        assert response.status_code == 201, response.text
+    return post_id, tag_ids[0]
+
+
+def count_queries(client, url: str, limit: int) -> int:
+    with capture_statements() as statements:
+        response = client.get(url, params={"limit": limit})
+        assert response.status_code == 200, response.text
+        assert len(response.json()["items"]) == limit
+    return len(statements)
+
+
+@pytest.mark.usefixtures("no_read_cache")
+@pytest.mark.parametrize(
+    "url",
+    ["/posts", "/posts/by-tag/{tag_id}", "/posts/{post_id}/comments"],
+)
+def test_query_count_does_not_grow_with_page_size(client, thread, url):
+    post_id, tag_id = thread
+    url = url.format(post_id=post_id, tag_id=tag_id)
+    counts = [count_queries(client, url, limit) for limit in PAGE_SIZES]
+    assert counts[0] == counts[1], f"{url}: {counts} queries for {PAGE_SIZES} items"
@@ -0,0 +1,123 @@
+import re
+import pytest
+from sqlalchemy import text
+from app.database import engine
+from conftest import capture_statements
+
+pytestmark = [
+    pytest.mark.skipif(
+        engine.dialect.name != "postgresql",
+        reason="query plans are checked on PostgreSQL (set TEST_DATABASE_URL)",
+    ),
+    pytest.mark.usefixtures("no_read_cache"),
+]
+
+# Tables that grow with the site; a sequential scan of any of them on a hot
+# path means a missing or unusable index
+LARGE_TABLES = {"users", "posts", "comments", "post_tags", "comment_votes"}
+
+# Each range starts at the first id the seed itself inserted: rows other
+# tests deleted leave gaps below that
+SEED = [
+    "INSERT INTO users (name, username, email, karma, role) "
+    "SELECT 'seed' || g, 'seed' || g, 'seed' || g || '@example.com', 0, 'user' "
+    "FROM generate_series(1, 5000) g",
+    "INSERT INTO tags (title) SELECT 'seed' || g FROM generate_series(1, 500) g",
+    "INSERT INTO posts (title, body, user_id) "
+    "SELECT 'seed ' || g, 'body', (SELECT max(id) - 4999 FROM users) + g % 5000 "
+    "FROM generate_series(1, 50000) g",
+    "INSERT INTO post_tags (post_id, tag_id) "
+    "SELECT DISTINCT p.id, (SELECT max(id) - 499 FROM tags) + (p.id + k * 7) % 500 "
+    "FROM posts p, generate_series(1, 3) k WHERE p.title LIKE 'seed %'",
+    "INSERT INTO comments (body, score, is_accepted, user_id, post_id) "
+    "SELECT 'answer', 0, false, (SELECT max(id) - 4999 FROM users) + g % 5000, "
+    "(SELECT max(id) - 49999 FROM posts) + g % 50000 "
+    "FROM generate_series(1, 500000) g",
+    "INSERT INTO comment_votes (user_id, comment_id, vote_type) "
+    "SELECT DISTINCT (SELECT max(id) - 4999 FROM users) + g % 5000, "
+    "(SELECT max(id) - 499999 FROM comments) + g % 500000, 'upvote' "
+    "FROM generate_series(1, 200000) g",
+    "ANALYZE",
+]
+
+
+@pytest.fixture(scope="module")
+def seeded(client, make_user):
+    with engine.begin() as conn:
+        for statement in SEED:
+            conn.execute(text(statement))
+        post_id = conn.scalar(text("SELECT max(post_id) FROM comments"))
+        tag_id = conn.scalar(text("SELECT min(id) FROM tags WHERE title LIKE 'seed%'"))
+    _, headers = make_user("planner")
+    return post_id, tag_id, headers
+
+
+def assert_no_sequential_scans(statements) -> None:
+    """EXPLAIN each captured query and fail on sequential scans of LARGE_TABLES."""
+    scans = {}
+    with engine.connect() as conn:
+        for statement, parameters in statements:
+            if (
+                not statement.lstrip()
+                .upper()
+                .startswith(("SELECT", "UPDATE", "DELETE"))
+            ):
+                continue
+            plan = "\n".join(
+                row[0]
+                for row in conn.exec_driver_sql("EXPLAIN " + statement, parameters)
+            )
+            if set(re.findall(r"Seq Scan on (\w+)", plan)) & LARGE_TABLES:
+                scans[statement] = plan
+    assert not scans, "\n\n".join(f"{sql}\n{plan}" for sql, plan in scans.items())
+
+
+def test_comment_list(client, seeded):
+    post_id, _, _ = seeded
+    with capture_statements() as statements:
+        assert client.get(f"/posts/{post_id}/comments").status_code == 200
+    assert_no_sequential_scans(statements)
+
+
+def test_posts_by_tag(client, seeded):
+    _, tag_id, _ = seeded
+    with capture_statements() as statements:
+        assert client.get(f"/posts/by-tag/{tag_id}").status_code == 200
+    assert_no_sequential_scans(statements)
+
+
+def test_post_list(client, seeded):
+    with capture_statements() as statements:
+        assert client.get("/posts").status_code == 200
+    assert_no_sequential_scans(statements)
+
+
+def test_post_detail(client, seeded):
+    post_id, _, _ = seeded
+    with capture_statements() as statements:
+        assert client.get(f"/posts/{post_id}").status_code == 200
+    assert_no_sequential_scans(statements)
+
+
+def test_vote(client, seeded):
+    post_id, _, headers = seeded
+    comment = client.post(
+        f"/posts/{post_id}/comments", json={"body": "vote on me"}, headers=headers
+    ).json()
+    with capture_statements() as statements:
+        response = client.post(
+            f"/comments/{comment['id']}/vote/upvote", headers=headers
+        )
+        assert response.status_code == 200
+    assert_no_sequential_scans(statements)
+
+
+def test_comment_delete(client, seeded):
+    post_id, _, headers = seeded
+    comment = client.post(
+        f"/posts/{post_id}/comments", json={"body": "delete me"}, headers=headers
+    ).json()
+    with capture_statements() as statements:
+        response = client.delete(f"/comments/{comment['id']}", headers=headers)
+        assert response.status_code == 204
+    assert_no_sequential_scans(statements)
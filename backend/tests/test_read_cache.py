@@ -0,0 +1,76 @@
+import asyncio
+from itertools import count
+import pytest
+from app.services.read_cache import (
+    MemoryCacheBackend,
+    comments_key,
+    post_key,
+    read_cache,
+)
+
+_tags = count()
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    """An empty cache for this test alone."""
+    backend = MemoryCacheBackend(1024 * 1024)
+    monkeypatch.setattr(read_cache, "backend", backend)
+    return backend
+
+
+@pytest.fixture
+def post(client, admin):
+    tag = client.post(
+        "/tags", json={"title": f"cached{next(_tags)}"}, headers=admin
+    ).json()
+    response = client.post(
+        "/posts",
+        json={"title": "before", "body": "body", "tag_ids": [tag["id"]]},
+        headers=admin,
+    )
+    return response.json()
+
+
+def test_post_edit_invalidates_the_cached_page(client, admin, cache, post):
+    url = f"/posts/{post['id']}"
+    assert client.get(url).json()["title"] == "before"
+    hits = read_cache.hits
+    assert client.get(url).json()["title"] == "before"
+    assert read_cache.hits == hits + 1
+
+    client.put(
+        url,
+        json={"title": "after", "body": "body", "tag_ids": [post["tags"][0]["id"]]},
+        headers=admin,
+    )
+    assert post_key(post["id"]) not in cache._data
+    assert client.get(url).json()["title"] == "after"
+
+
+def test_new_comment_invalidates_the_cached_list(client, admin, cache, post):
+    url = f"/posts/{post['id']}/comments"
+    assert client.get(url).json()["items"] == []
+    assert comments_key(post["id"]) in cache._data
+
+    client.post(url, json={"body": "first"}, headers=admin)
+    assert comments_key(post["id"]) not in cache._data
+    assert [c["body"] for c in client.get(url).json()["items"]] == ["first"]
+
+
+def test_memory_backend_serves_only_the_current_version():
+    backend = MemoryCacheBackend(10)
+
+    async def scenario():
+        await backend.set("a", 2, "", b"new")
+        # A slow render of version 1 finishing late must not replace it
+        await backend.set("a", 1, "", b"old")
+        assert await backend.get("a", 2, "") == b"new"
+        assert await backend.get("a", 1, "") is None
+
+        await backend.set("b", 1, "", b"12345678")  # over 10 bytes: evicts "a"
+        assert await backend.get("a", 2, "") is None
+        assert await backend.get("b", 1, "") == b"12345678"
+        assert backend.size == 8
+
+    asyncio.run(scenario())
@@ -0,0 +1,56 @@
+import pytest
+
+
+@pytest.fixture(scope="module")
+def question(client, admin, make_user):
+    _, headers = make_user("searcher")
+    tag = client.post("/tags", json={"title": "search"}, headers=admin).json()
+    response = client.post(
+        "/posts",
+        json={
+            "title": "Borrow checker lifetimes",
+            "body": "body",
+            "tag_ids": [tag["id"]],
+        },
+        headers=headers,
+    )
+    assert response.status_code == 201, response.text
+    return response.json()
+
+
+def test_search_finds_title_words(client, question):
+    response = client.get("/search", params={"q": "  lifetimes  "})
+    assert response.status_code == 200, response.text
+    assert [post["id"] for post in response.json()["items"]] == [question["id"]]
+
+
+@pytest.mark.parametrize("q", [" ", "   ", "\t\n"])
+def test_blank_query_is_rejected(client, q):
+    response = client.get("/search", params={"q": q})
+    assert response.status_code == 400, response.text
+
+
+def test_pages_through_equally_ranked_posts(client, admin):
+    tag = client.post("/tags", json={"title": "ties"}, headers=admin).json()
+    ids = []
+    for _ in range(5):
+        response = client.post(
+            "/posts",
+            # A body-only match ranks 0.4, which a real cannot hold exactly
+            json={"title": "tie", "body": "quokka", "tag_ids": [tag["id"]]},
+            headers=admin,
+        )
+        assert response.status_code == 201, response.text
+        ids.append(response.json()["id"])
+
+    seen, cursor = [], None
+    while True:
+        params = {"q": "quokka", "limit": 2}
+        if cursor is not None:
+            params["cursor"] = cursor
+        page = client.get("/search", params=params).json()
+        seen += [post["id"] for post in page["items"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert seen == sorted(ids, reverse=True)
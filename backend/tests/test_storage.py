@@ -0,0 +1,68 @@
+import asyncio
+import errno
+import hashlib
+import pytest
+from app.services import storage as storage_module
+from app.services.storage import LocalStorage, content_key, is_content_key
+
+DIGEST = hashlib.sha256(b"image").hexdigest()
+
+
+def test_content_keys_fan_out_on_the_digest():
+    key = content_key(DIGEST, "png")
+    assert key == f"{DIGEST[:2]}/{DIGEST[2:4]}/{DIGEST}.png"
+    assert is_content_key(key)
+
+
+@pytest.mark.parametrize(
+    "key",
+    [
+        f"{DIGEST}.png",
+        f"{DIGEST[:2]}/{DIGEST[2:4]}/{DIGEST[:-1]}.png",
+        f"ff/{DIGEST[2:4]}/{DIGEST}.png",
+        f"{DIGEST[:2]}/{DIGEST[2:4]}/{DIGEST}.png/../../x",
+        "variants/320/x.webp",
+    ],
+)
+def test_other_paths_are_not_content_keys(key):
+    assert not is_content_key(key)
+
+
+@pytest.fixture
+def local(tmp_path):
+    return LocalStorage(str(tmp_path / "uploads"), str(tmp_path / "staging"))
+
+
+def stage(tmp_path) -> str:
+    """Write an upload as save_upload_file leaves it before put."""
+    path = tmp_path / "upload.part"
+    path.write_bytes(b"image")
+    return str(path)
+
+
+def test_put_stores_each_content_once(local, tmp_path):
+    key = content_key(DIGEST, "png")
+    staged = stage(tmp_path)
+    assert asyncio.run(local.put(staged, key, "image/png"))
+    assert (tmp_path / "uploads" / key).read_bytes() == b"image"
+
+    # The same content again: nothing is written, the staged copy is dropped
+    staged = stage(tmp_path)
+    assert not asyncio.run(local.put(staged, key, "image/png"))
+    assert not (tmp_path / "upload.part").exists()
+    assert local.url(key) == f"/uploads/{key}"
+
+
+def test_put_copies_across_filesystems(local, tmp_path, monkeypatch):
+    async def cross_device(src, dst):
+        raise OSError(errno.EXDEV, "Invalid cross-device link")
+
+    monkeypatch.setattr(storage_module.aiofiles.os, "replace", cross_device)
+    key = content_key(DIGEST, "png")
+    staged = stage(tmp_path)
+    assert asyncio.run(local.put(staged, key, "image/png"))
+    assert (tmp_path / "uploads" / key).read_bytes() == b"image"
+    assert not (tmp_path / "upload.part").exists()
+    assert list((tmp_path / "uploads" / key).parent.iterdir()) == [
+        tmp_path / "uploads" / key
+    ]
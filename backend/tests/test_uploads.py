@@ -0,0 +1,126 @@
+import io
+import os
+import pytest
+from PIL import Image
+from app.main import app
+from app.routes.uploads import MULTIPART_OVERHEAD
+from app.services.file_service import MAX_FILE_SIZE
+from app.services.image_variants import image_variants
+from app.services.storage import storage
+from app.utils.images import render_variants
+
+PNG = b"\x89PNG\r\n\x1a\n" + bytes(100)
+
+
+@pytest.fixture
+def upload_dirs(monkeypatch, tmp_path):
+    """Point local storage at scratch directories; returns (uploads, staging)."""
+    uploads, staging = tmp_path / "uploads", tmp_path / "staging"
+    monkeypatch.setattr(storage, "root", str(uploads))
+    monkeypatch.setattr(storage, "staging", str(staging))
+    monkeypatch.setattr(image_variants, "enabled", False)
+    monkeypatch.setattr(image_variants, "root", str(uploads))
+    served = next(route.app for route in app.routes if route.path == "/uploads")
+    monkeypatch.setattr(served, "directory", str(uploads))
+    return uploads, staging
+
+
+def stored_files(directory) -> list[str]:
+    return sorted(
+        os.path.relpath(os.path.join(path, name), directory)
+        for path, _, names in os.walk(directory)
+        for name in names
+    )
+
+
+def test_upload_is_staged_outside_the_served_directory(client, upload_dirs):
+    uploads, staging = upload_dirs
+    response = client.post("/upload", files={"file": ("a.png", PNG, "image/png")})
+    assert response.status_code == 200, response.text
+    key = response.json()["url"].removeprefix("/uploads/")
+    assert stored_files(uploads) == [key]
+    assert stored_files(staging) == []
+
+
+def test_oversized_upload_is_refused_before_it_is_read(client, upload_dirs):
+    body = PNG + bytes(MAX_FILE_SIZE + MULTIPART_OVERHEAD)
+    response = client.post("/upload", files={"file": ("a.png", body, "image/png")})
+    assert response.status_code == 413, response.text
+    assert not any(path.exists() for path in upload_dirs)
+
+
+def test_oversized_chunked_upload_is_refused(client, upload_dirs):
+    def body():
+        yield b'--x\r\nContent-Disposition: form-data; name="file"; filename="a.png"'
+        yield b"\r\nContent-Type: image/png\r\n\r\n" + PNG
+        for _ in range((MAX_FILE_SIZE + MULTIPART_OVERHEAD) // 65536 + 1):
+            yield bytes(65536)
+        yield b"\r\n--x--\r\n"
+
+    response = client.post(
+        "/upload",
+        content=body(),
+        headers={"content-type": "multipart/form-data; boundary=x"},
+    )
+    assert response.status_code == 413, response.text
+    assert stored_files(upload_dirs[0]) == []
+
+
+def test_variant_revalidation_skips_the_renderer(client, upload_dirs, monkeypatch):
+    url = client.post("/upload", files={"file": ("a.png", PNG, "image/png")}).json()[
+        "url"
+    ]
+    key = url.removeprefix("/uploads/")
+    variant = image_variants.path(key, 320)
+    os.makedirs(os.path.dirname(variant))
+    with open(variant, "wb") as f:
+        f.write(b"RIFF")
+
+    async def render(*args):
+        raise AssertionError("revalidation went through the renderer")
+
+    monkeypatch.setattr(image_variants, "enabled", True)
+    monkeypatch.setattr(image_variants, "get", render)
+    digest = os.path.splitext(os.path.basename(key))[0]
+    response = client.get(
+        url, params={"w": 300}, headers={"if-none-match": f'"{digest}-320"'}
+    )
+    assert response.status_code == 304
+    assert response.headers["etag"] == f'"{digest}-320"'
+
+
+@pytest.mark.parametrize("width", [None, 320])
+def test_missing_upload_is_never_not_modified(client, upload_dirs, monkeypatch, width):
+    monkeypatch.setattr(image_variants, "enabled", True)
+    digest = "ab" * 32
+    etag = f'"{digest}-320"' if width else f'"{digest}"'
+    response = client.get(
+        f"/uploads/ab/ab/{digest}.png",
+        params={"w": width} if width else {},
+        headers={"if-none-match": etag},
+    )
+    assert response.status_code == 404
+
+
+def png(width: int, height: int) -> bytes:
+    out = io.BytesIO()
+    Image.new("RGB", (width, height), "teal").save(out, "PNG")
+    return out.getvalue()
+
+
+def test_upload_reports_its_width(client, upload_dirs):
+    response = client.post(
+        "/upload", files={"file": ("a.png", png(500, 100), "image/png")}
+    )
+    assert response.json()["width"] == 500
+
+
+def test_variants_are_never_wider_than_the_upload(tmp_path):
+    source = tmp_path / "a.png"
+    source.write_bytes(png(500, 100))
+    targets = [(width, str(tmp_path / f"{width}.webp")) for width in (320, 500, 640)]
+    written = render_variants(str(source), targets, quality=80)
+    assert sorted(written) == [str(tmp_path / "320.webp"), str(tmp_path / "500.webp")]
+    assert not (tmp_path / "640.webp").exists()
+    with Image.open(tmp_path / "320.webp") as variant:
+        assert variant.width == 320
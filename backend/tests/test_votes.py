@@ -0,0 +1,90 @@
+from concurrent.futures import ThreadPoolExecutor
+from itertools import count
+import asyncio
+import pytest
+from app.database import AsyncSessionLocal
+from app.models.karma import KarmaReason
+from app.services.karma import karma_service
+from app.services.user_directory import user_directory
+
+UPVOTE, DOWNVOTE = 10, -2
+
+_names = count()
+
+
+@pytest.fixture
+def answer(client, admin, make_user):
+    """A fresh answer to vote on, its author's id and a voter."""
+    n = next(_names)
+    author_id, author = make_user(f"answerer{n}")
+    _, voter = make_user(f"voter{n}")
+    tag = client.post("/tags", json={"title": f"votes{n}"}, headers=admin).json()
+    post = client.post(
+        "/posts",
+        json={"title": "question", "body": "body", "tag_ids": [tag["id"]]},
+        headers=admin,
+    ).json()
+    comment = client.post(
+        f"/posts/{post['id']}/comments", json={"body": "answer"}, headers=author
+    ).json()
+    return comment["id"], author_id, voter
+
+
+def karma(client, user_id: int) -> int:
+    return client.get(f"/users/{user_id}").json()["karma"]
+
+
+def vote(client, comment_id: int, vote_type: str, headers: dict) -> int:
+    response = client.post(f"/comments/{comment_id}/vote/{vote_type}", headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()["score"]
+
+
+@pytest.mark.parametrize(
+    "clicks, scores, karma_change",
+    [
+        (["upvote", "upvote"], [1, 0], UPVOTE + DOWNVOTE),
+        (["upvote", "downvote"], [1, -1], UPVOTE + 2 * DOWNVOTE),
+        (["downvote", "downvote"], [-1, 0], DOWNVOTE + UPVOTE),
+    ],
+)
+def test_vote_sequence(client, answer, clicks, scores, karma_change):
+    comment_id, author_id, voter = answer
+    before = karma(client, author_id)
+    assert [vote(client, comment_id, click, voter) for click in clicks] == scores
+    assert karma(client, author_id) - before == karma_change
+
+
+def test_racing_first_votes_from_one_user(client, answer):
+    # Two clicks land together: whichever commits second undoes the first,
+    # exactly as if they had arrived one after the other
+    comment_id, author_id, voter = answer
+    before = karma(client, author_id)
+    with ThreadPoolExecutor(2) as pool:
+        scores = list(
+            pool.map(lambda _: vote(client, comment_id, "upvote", voter), "ab")
+        )
+    assert sorted(scores) == [0, 1]
+    assert karma(client, author_id) - before == UPVOTE + DOWNVOTE
+    assert vote(client, comment_id, "upvote", voter) == 1
+
+
+def test_directory_karma_moves_only_on_commit(client, make_user):
+    user_id, _ = make_user("ranked")
+
+    def directory_karma() -> int:
+        return user_directory.index._entries[user_id][1]
+
+    async def award(commit: bool):
+        async with AsyncSessionLocal() as db:
+            await karma_service.update_karma(
+                db, user_id, UPVOTE, KarmaReason.COMMENT_UPVOTED
+            )
+            assert directory_karma() == before
+            await (db.commit() if commit else db.rollback())
+
+    before = directory_karma()
+    asyncio.run(award(commit=False))
+    assert directory_karma() == before
+    asyncio.run(award(commit=True))
+    assert directory_karma() == before + UPVOTE
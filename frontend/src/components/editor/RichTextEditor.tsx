@@ -86,6 +86,24 @@ function EmojiPicker({ editor }: { editor: Editor }) {
   );
 }
 
+// Uploads keep their pixel width as data-width, so the srcset rendered for
+// them lists only the resized variants the API has (see lib/images.ts)
+const UploadedImage = Image.extend({
+  addAttributes() {
+    return {
+      ...this.parent?.(),
+      uploadWidth: {
+        default: null,
+        parseHTML: (element) => element.getAttribute("data-width"),
+        renderHTML: (attributes) =>
+          attributes.uploadWidth
+            ? { "data-width": attributes.uploadWidth }
+            : {},
+      },
+    };
+  },
+});
+
 function ImageUploader({ editor }: { editor: Editor }) {
   const fileInputRef = useRef<HTMLInputElement>(null);
   const baseURL = process.env.NEXT_PUBLIC_API_URL || "http://localhost:8000";
@@ -101,7 +119,14 @@ function ImageUploader({ editor }: { editor: Editor }) {
         const imageUrl = data.url.startsWith("http")
           ? data.url
           : `${baseURL}${data.url}`;
-        editor.chain().focus().setImage({ src: imageUrl }).run();
+        editor
+          .chain()
+          .focus()
+          .insertContent({
+            type: "image",
+            attrs: { src: imageUrl, uploadWidth: data.width },
+          })
+          .run();
       }
     } catch (e) {
       console.log(e);
@@ -264,7 +289,7 @@ export function RichTextEditor({
         openOnClick: false,
         validate: (href) => /^https?:\/\//.test(href),
       }),
-      Image.configure({
+      UploadedImage.configure({
         inline: false,
         allowBase64: true,
       }),
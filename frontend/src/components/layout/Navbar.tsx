@@ -15,6 +15,7 @@ import { useMe } from "@/hooks/useMe";
 import {
   useMarkAllNotificationsAsRead,
   useNotifications,
+  useUnreadNotificationCount,
 } from "@/hooks/useNotifications";
 import { Bell, Check, LogOut, Plus, User } from "lucide-react";
 import Link from "next/link";
@@ -25,8 +26,8 @@ export function Navbar() {
   const markAllAsRead = useMarkAllNotificationsAsRead();
   const logout = useLogout();
 
-  const unreadCount =
-    notifications?.data?.filter((n) => !n.is_read).length || 0;
+  const { data: unread } = useUnreadNotificationCount();
+  const unreadCount = unread?.unread_count || 0;
 
   const handleLogout = () => {
     logout.mutate();
@@ -18,6 +18,7 @@ import {
 } from "@/hooks/useComments";
 import { useMe } from "@/hooks/useMe";
 import { usePost } from "@/hooks/usePosts";
+import { responsiveImages } from "@/lib/images";
 import { formatDistanceToNow } from "date-fns";
 import parse from "html-react-parser";
 import {
@@ -50,7 +51,16 @@ interface Comment {
 
 export function PostDetail({ postId }: PostDetailProps) {
   const { data: post, isLoading: postLoading } = usePost(postId);
-  const { data: comments, isLoading: commentsLoading } = useComments(postId);
+  const {
+    data: commentPages,
+    isLoading: commentsLoading,
+    hasNextPage: hasMoreComments,
+    fetchNextPage: fetchMoreComments,
+    isFetchingNextPage: fetchingMoreComments,
+  } = useComments(postId);
+  const comments = commentPages?.pages.flatMap((page) => page.items) ?? [];
+  // Only the loaded answers are counted; "+" marks that more remain
+  const answerCount = `${comments.length}${hasMoreComments ? "+" : ""}`;
   const { data: currentUser } = useMe();
   const createComment = useCreateComment();
   const acceptComment = useAcceptComment();
@@ -136,7 +146,7 @@ export function PostDetail({ postId }: PostDetailProps) {
               <div className="flex items-center space-x-4 text-sm text-gray-500 mb-4">
                 <div className="flex items-center space-x-1">
                   <MessageCircle className="w-4 h-4" />
-                  <span>{comments?.data?.length || 0} answers</span>
+                  <span>{answerCount} answers</span>
                 </div>
 
                 <div className="flex items-center space-x-1">
@@ -176,7 +186,7 @@ export function PostDetail({ postId }: PostDetailProps) {
                 }
               },
             } as HTMLReactParserOptions)} */}
-            {parse(postData.body)}
+            {parse(postData.body, responsiveImages)}
           </div>
 
           {postData.tags && postData.tags.length > 0 && (
@@ -218,8 +228,8 @@ export function PostDetail({ postId }: PostDetailProps) {
       {/* Comments/Answers */}
       <div className="space-y-4">
         <h3 className="text-xl font-semibold">
-          {comments?.data?.length || 0} Answer
-          {comments?.data?.length !== 1 ? "s" : ""}
+          {answerCount} Answer
+          {comments.length !== 1 || hasMoreComments ? "s" : ""}
         </h3>
 
         {commentsLoading ? (
@@ -228,7 +238,7 @@ export function PostDetail({ postId }: PostDetailProps) {
             <div className="h-32 bg-gray-200 rounded"></div>
           </div>
         ) : (
-          comments?.data?.map((comment: Comment) => (
+          comments.map((comment: Comment) => (
             <Card key={comment.id}>
               <CardHeader>
                 <div className="flex">
@@ -312,7 +322,7 @@ export function PostDetail({ postId }: PostDetailProps) {
                       </div>
                     )}
                     <div className="prose dark:prose-invert max-w-none">
-                      {parse(comment.body)}
+                      {parse(comment.body, responsiveImages)}
                       {/* {parse(DOMPurify.sanitize(comment.body), {
                         htmlparser2: {
                           lowerCaseTags: true,
@@ -337,6 +347,18 @@ export function PostDetail({ postId }: PostDetailProps) {
             </Card>
           ))
         )}
+
+        {hasMoreComments && (
+          <div className="text-center">
+            <Button
+              variant="outline"
+              onClick={() => fetchMoreComments()}
+              disabled={fetchingMoreComments}
+            >
+              {fetchingMoreComments ? "Loading..." : "Load more answers"}
+            </Button>
+          </div>
+        )}
       </div>
     </div>
   );
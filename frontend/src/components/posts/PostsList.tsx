@@ -1,12 +1,21 @@
 "use client";
 
 import { Badge } from "@/components/ui/badge";
+import { Button } from "@/components/ui/button";
 import { Card, CardContent, CardHeader } from "@/components/ui/card";
 import { usePosts } from "@/hooks/usePosts";
 import Link from "next/link";
 
 export function PostsList() {
-  const { data: posts, isLoading, error } = usePosts();
+  const {
+    data,
+    isLoading,
+    error,
+    hasNextPage,
+    fetchNextPage,
+    isFetchingNextPage,
+  } = usePosts();
+  const posts = data?.pages.flatMap((page) => page.items) ?? [];
 
   if (isLoading) {
     return (
@@ -31,7 +40,7 @@ export function PostsList() {
     );
   }
 
-  if (!posts?.data?.length) {
+  if (!posts.length) {
     return (
       <div className="text-center py-8">
         <p className="text-gray-500">
@@ -49,7 +58,7 @@ export function PostsList() {
 
   return (
     <div className="space-y-4">
-      {posts.data.map((post) => (
+      {posts.map((post) => (
         <Card key={post.id} className="hover:shadow-md transition-shadow">
           <CardHeader className="">
             {post.user && (
@@ -116,6 +125,18 @@ export function PostsList() {
           </CardContent>
         </Card>
       ))}
+
+      {hasNextPage && (
+        <div className="text-center">
+          <Button
+            variant="outline"
+            onClick={() => fetchNextPage()}
+            disabled={isFetchingNextPage}
+          >
+            {isFetchingNextPage ? "Loading..." : "Load more questions"}
+          </Button>
+        </div>
+      )}
     </div>
   );
 }
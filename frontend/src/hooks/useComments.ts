@@ -1,11 +1,18 @@
-import { useMutation, useQuery, useQueryClient } from "@tanstack/react-query";
+import {
+  useInfiniteQuery,
+  useMutation,
+  useQueryClient,
+} from "@tanstack/react-query";
 import { commentsAPI } from "@/services/api";
 import { CreateCommentRequest, UpdateCommentRequest } from "@/types/api";
 
 export const useComments = (postId: number) => {
-  return useQuery({
+  return useInfiniteQuery({
     queryKey: ["comments", postId],
-    queryFn: () => commentsAPI.getComments(postId),
+    queryFn: ({ pageParam }) =>
+      commentsAPI.getComments(postId, { cursor: pageParam }),
+    initialPageParam: undefined as string | undefined,
+    getNextPageParam: (lastPage) => lastPage.next_cursor ?? undefined,
     enabled: !!postId,
   });
 };
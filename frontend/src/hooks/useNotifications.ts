@@ -17,6 +17,22 @@ export const useNotifications = () => {
   });
 };
 
+// Kept current by the WebSocket, which writes the same query key
+export const useUnreadNotificationCount = () => {
+  const [enabled, setEnabled] = useState(false);
+
+  useEffect(() => {
+    const token = localStorage.getItem("auth_token");
+    setEnabled(!!token);
+  }, []);
+
+  return useQuery({
+    queryKey: ["notifications", "unread"],
+    queryFn: () => notificationsAPI.getUnreadCount(),
+    enabled,
+  });
+};
+
 export const useMarkAllNotificationsAsRead = () => {
   const queryClient = useQueryClient();
 
@@ -1,11 +1,19 @@
-import { useMutation, useQuery, useQueryClient } from '@tanstack/react-query';
+import {
+  useInfiniteQuery,
+  useMutation,
+  useQuery,
+  useQueryClient,
+} from '@tanstack/react-query';
 import { postsAPI } from '@/services/api';
-import { CreatePostRequest, UpdatePostRequest } from '@/types/api';
+import { CreatePostRequest, PageParams, UpdatePostRequest } from '@/types/api';
 
-export const usePosts = (params?: { page?: number; limit?: number; tag?: string }) => {
-  return useQuery({
+export const usePosts = (params?: Omit<PageParams, 'cursor'>) => {
+  return useInfiniteQuery({
     queryKey: ['posts', params],
-    queryFn: () => postsAPI.getPosts(params),
+    queryFn: ({ pageParam }) =>
+      postsAPI.getPosts({ ...params, cursor: pageParam }),
+    initialPageParam: undefined as string | undefined,
+    getNextPageParam: (lastPage) => lastPage.next_cursor ?? undefined,
   });
 };
 
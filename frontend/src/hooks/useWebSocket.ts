@@ -4,12 +4,18 @@ import { useEffect, useRef } from "react";
 import { useQuery, useQueryClient } from "@tanstack/react-query";
 
 interface NotificationMessage {
+  id: number;
   msg: string;
   unread_count: number;
 }
 
+interface HeartbeatMessage {
+  type: "ping";
+}
+
 export function useWebSocket() {
   const wsRef = useRef<WebSocket | null>(null);
+  const lastSeenIdRef = useRef<number | null>(null);
   const queryClient = useQueryClient();
 
   const { data: meData } = useQuery({
@@ -34,64 +40,96 @@ export function useWebSocket() {
       return;
     }
 
-    const wsUrl = `${
-      process.env.NEXT_PUBLIC_WS_URL || "ws://localhost:8000"
-    }/notifications/ws?token=${token}`;
-
-    const ws = new WebSocket(wsUrl);
-    wsRef.current = ws;
-
-    ws.onopen = () => {
-      console.log("WebSocket connected");
-    };
-
-    ws.onmessage = (event) => {
-      try {
-        const data: NotificationMessage = JSON.parse(event.data);
-        console.log("Received notification:", data);
-
-        queryClient.setQueryData<{ unread_count: number }>(
-          ["notifications", "unread"],
-          () => ({ unread_count: data.unread_count })
-        );
-
-        queryClient.invalidateQueries({ queryKey: ["notifications"] });
-
-        if (Notification.permission === "granted") {
-          new Notification("StackIt", {
-            body: data.msg,
-            icon: "/favicon.ico",
-          });
+    let reconnectTimer: ReturnType<typeof setTimeout> | undefined;
+
+    const connect = () => {
+      // Before the first push arrives, the newest loaded notification is
+      // the last one we have seen
+      if (lastSeenIdRef.current === null) {
+        const loaded = queryClient.getQueryData<{ data: { id: number }[] }>([
+          "notifications",
+        ]);
+        if (loaded?.data.length) {
+          lastSeenIdRef.current = Math.max(...loaded.data.map((n) => n.id));
         }
-      } catch (error) {
-        console.error("Failed to parse WebSocket message:", error);
       }
-    };
 
-    ws.onclose = (event) => {
-      console.log("WebSocket disconnected:", event.code, event.reason);
-
-      if (event.code !== 1000) {
-        setTimeout(() => {
-          if (!wsRef.current || wsRef.current.readyState === WebSocket.CLOSED) {
-            const token = localStorage.getItem("auth_token");
-            if (token && meData) {
-              const wsUrl = `${
-                process.env.NEXT_PUBLIC_WS_URL || "ws://localhost:8000"
-              }/notifications/ws?token=${token}`;
-              const newWs = new WebSocket(wsUrl);
-              wsRef.current = newWs;
-            }
+      // After a drop, ask the server to replay what we missed in between
+      const lastSeen =
+        lastSeenIdRef.current !== null
+          ? `&last_seen_id=${lastSeenIdRef.current}`
+          : "";
+      const wsUrl = `${
+        process.env.NEXT_PUBLIC_WS_URL || "ws://localhost:8000"
+      }/notifications/ws?token=${token}${lastSeen}`;
+
+      const ws = new WebSocket(wsUrl);
+      wsRef.current = ws;
+
+      ws.onopen = () => {
+        console.log("WebSocket connected");
+      };
+
+      ws.onmessage = (event) => {
+        try {
+          const data: NotificationMessage | HeartbeatMessage = JSON.parse(
+            event.data
+          );
+          if ("type" in data) {
+            // Server heartbeat; unanswered pings get the socket closed
+            ws.send("pong");
+            return;
           }
-        }, 5000);
-      }
-    };
+          console.log("Received notification:", data);
+          lastSeenIdRef.current = Math.max(
+            lastSeenIdRef.current ?? 0,
+            data.id
+          );
+
+          queryClient.setQueryData<{ unread_count: number }>(
+            ["notifications", "unread"],
+            () => ({ unread_count: data.unread_count })
+          );
+
+          queryClient.invalidateQueries({ queryKey: ["notifications"] });
+
+          if (Notification.permission === "granted") {
+            new Notification("StackIt", {
+              body: data.msg,
+              icon: "/favicon.ico",
+            });
+          }
+        } catch (error) {
+          console.error("Failed to parse WebSocket message:", error);
+        }
+      };
+
+      ws.onclose = (event) => {
+        console.log("WebSocket disconnected:", event.code, event.reason);
+
+        if (event.code !== 1000) {
+          reconnectTimer = setTimeout(() => {
+            if (
+              !wsRef.current ||
+              wsRef.current.readyState === WebSocket.CLOSED
+            ) {
+              if (localStorage.getItem("auth_token")) {
+                connect();
+              }
+            }
+          }, 5000);
+        }
+      };
 
-    ws.onerror = (error) => {
-      console.log("WebSocket error:", error);
+      ws.onerror = (error) => {
+        console.log("WebSocket error:", error);
+      };
     };
 
+    connect();
+
     return () => {
+      clearTimeout(reconnectTimer);
       if (wsRef.current) {
         wsRef.current.close(1000, "Component unmounted");
         wsRef.current = null;
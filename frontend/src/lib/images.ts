@@ -0,0 +1,36 @@
+import { Element, type HTMLReactParserOptions } from "html-react-parser";
+
+// Keep in step with IMAGE_VARIANT_WIDTHS on the API
+const VARIANT_WIDTHS = [320, 640, 1280];
+
+// Only uploads stored under their content hash have resized variants
+const UPLOAD_URL = /\/uploads\/[0-9a-f]{2}\/[0-9a-f]{2}\/[0-9a-f]{64}\.\w+$/;
+
+// Parser options for post and answer bodies: uploaded images get a srcset
+// of resized WebP variants, so readers download one sized for their screen
+// rather than the full upload. The API makes no variant wider than the
+// upload, so the srcset needs its width (data-width, set by the editor);
+// images inserted before that is known are left as uploaded.
+export const responsiveImages: HTMLReactParserOptions = {
+  replace: (domNode) => {
+    if (domNode instanceof Element && domNode.name === "img") {
+      const src = domNode.attribs.src;
+      const uploadWidth = Number(domNode.attribs["data-width"]);
+      if (src && UPLOAD_URL.test(src)) {
+        if (uploadWidth > 0) {
+          const widths = VARIANT_WIDTHS.filter((width) => width <= uploadWidth);
+          const candidates = widths.map(
+            (width) => `${src}?w=${width} ${width}w`
+          );
+          if (!widths.includes(uploadWidth)) {
+            candidates.push(`${src} ${uploadWidth}w`);
+          }
+          domNode.attribs.srcset = candidates.join(", ");
+          domNode.attribs.sizes = "(max-width: 768px) 100vw, 768px";
+        }
+        domNode.attribs.loading = "lazy";
+        domNode.attribs.decoding = "async";
+      }
+    }
+  },
+};
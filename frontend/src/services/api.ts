@@ -1,3 +1,4 @@
+import { AxiosResponse } from "axios";
 import apiClient from "@/lib/axios";
 import {
   User,
@@ -5,6 +6,9 @@ import {
   Comment,
   Tag,
   Notification,
+  Page,
+  PageParams,
+  Suggestions,
   RegisterRequest,
   LoginRequest,
   LoginResponse,
@@ -14,14 +18,20 @@ import {
   UpdateCommentRequest,
   CreateTagRequest,
   UpdateTagRequest,
+  UploadResponse,
 } from "@/types/api";
 
+// List endpoints are cursor-paginated; callers that only need the first page
+// receive a plain array in `data`, the others page through `next_cursor`.
+const firstPage = <T>(request: Promise<AxiosResponse<Page<T>>>) =>
+  request.then((res) => ({ ...res, data: res.data.items }));
+
 export const uploadAPI = {
   uploadFile: async (file: File) => {
     console.log(file);
     const formData = new FormData();
     formData.append("file", file);
-    return apiClient.post<{ url: string }>("/upload", formData, {
+    return apiClient.post<UploadResponse>("/upload", formData, {
       headers: {
         "Content-Type": "multipart/form-data",
       },
@@ -40,7 +50,8 @@ export const authAPI = {
 };
 
 export const usersAPI = {
-  getUsers: () => apiClient.get<User[]>("/users"),
+  getUsers: (params?: PageParams) =>
+    apiClient.get<Page<User>>("/users", { params }),
 
   getUser: (id: number) => apiClient.get<User>(`/users/${id}`),
 
@@ -51,8 +62,8 @@ export const usersAPI = {
 };
 
 export const postsAPI = {
-  getPosts: (params?: { page?: number; limit?: number; tag?: string }) =>
-    apiClient.get<Post[]>("/posts", { params }),
+  getPosts: (params?: PageParams) =>
+    apiClient.get<Page<Post>>("/posts", { params }).then((res) => res.data),
 
   getPost: (id: number) => apiClient.get<Post>(`/posts/${id}`),
 
@@ -65,8 +76,12 @@ export const postsAPI = {
 };
 
 export const commentsAPI = {
-  getComments: (postId: number) =>
-    apiClient.get<Comment[]>(`/posts/${postId}/comments`),
+  getComments: (postId: number, params?: PageParams) =>
+    apiClient
+      .get<Page<Comment>>(`/posts/${postId}/comments`, {
+        params: { limit: 100, ...params },
+      })
+      .then((res) => res.data),
 
   createComment: (postId: number, data: CreateCommentRequest) =>
     apiClient.post<Comment>(`/posts/${postId}/comments`, data),
@@ -101,7 +116,21 @@ export const tagsAPI = {
 };
 
 export const notificationsAPI = {
-  getNotifications: () => apiClient.get<Notification[]>("/notifications"),
+  getNotifications: () =>
+    firstPage(apiClient.get<Page<Notification>>("/notifications")),
+
+  getUnreadCount: () =>
+    apiClient
+      .get<{ unread_count: number }>("/notifications/unread")
+      .then((res) => res.data),
 
   markAllAsRead: () => apiClient.post("/notifications/read_all"),
 };
+
+export const autocompleteAPI = {
+  // Typeahead for @mentions and tags; `type` limits it to one kind
+  suggest: (q: string, type?: "users" | "tags", limit = 10) =>
+    apiClient
+      .get<Suggestions>("/autocomplete", { params: { q, type, limit } })
+      .then((res) => res.data),
+};
@@ -44,6 +44,21 @@ export interface Notification {
   created_at: string;
 }
 
+export interface Suggestions {
+  users: { id: number; username: string; karma: number }[];
+  tags: { id: number; title: string; post_count: number }[];
+}
+
+export interface Page<T> {
+  items: T[];
+  next_cursor: string | null;
+}
+
+export interface PageParams {
+  cursor?: string;
+  limit?: number;
+}
+
 export interface RegisterRequest {
   name: string;
   email: string;
@@ -89,3 +104,9 @@ export interface CreateTagRequest {
 export interface UpdateTagRequest {
   title: string;
 }
+
+export interface UploadResponse {
+  url: string;
+  // Pixel width of the image as displayed; null if it could not be read
+  width: number | null;
+}